@@ -20,6 +20,9 @@ import nox
 BASE_REQUIREMENTS: typing.Final[tuple[str, ...]] = ("-r", "requirements.txt")
 DEV_REQUIREMENTS: typing.Final[tuple[str, ...]] = ("-r", "dev-requirements.txt")
 
+# CI запускает `nox` без аргументов: бенчмарки запускаются только явно.
+nox.options.sessions = ["pytest"]
+
 
 @nox.session
 def pytest(session: nox.Session) -> None:
@@ -27,3 +30,10 @@ def pytest(session: nox.Session) -> None:
     session.install(*BASE_REQUIREMENTS)
 
     session.run("pytest")
+
+
+@nox.session
+def benchmark(session: nox.Session) -> None:
+    session.install(*BASE_REQUIREMENTS)
+
+    session.run("python", "-m", "src.tests.benchmarks.bench_replay", *session.posargs)
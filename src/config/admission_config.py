@@ -0,0 +1,15 @@
+from __future__ import annotations
+
+import pydantic_settings
+import pydantic
+
+
+class AdmissionConfig(pydantic_settings.BaseSettings):
+    # Discord ждёт ответа на взаимодействие 3 секунды, оставляем запас на отправку.
+    query_deadline: float = pydantic.Field(default=2.5)
+    query_max_concurrency: int = pydantic.Field(default=16)
+    query_max_queue: int = pydantic.Field(default=64)
+    http_max_concurrency: int = pydantic.Field(default=16)
+    http_max_queue: int = pydantic.Field(default=64)
+    mongo_max_pool_size: int = pydantic.Field(default=32)
+    mongo_wait_queue_timeout: float = pydantic.Field(default=2.0)
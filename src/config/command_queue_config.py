@@ -0,0 +1,13 @@
+from __future__ import annotations
+
+import pydantic_settings
+import pydantic
+
+
+class CommandQueueConfig(pydantic_settings.BaseSettings):
+    command_workers: int = pydantic.Field(default=4)
+    command_queue_size: int = pydantic.Field(default=1024)
+    command_max_attempts: int = pydantic.Field(default=5)
+    # Сохранять ли фоновые команды в Mongo, чтобы они пережили перезапуск.
+    command_queue_durable: bool = pydantic.Field(default=False)
+    command_drain_timeout: float = pydantic.Field(default=5.0)
@@ -8,20 +8,67 @@ from motor.motor_asyncio import AsyncIOMotorClient
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from motor.motor_asyncio import AsyncIOMotorCollection
 
+from src.config.admission_config import AdmissionConfig
+from src.config.command_queue_config import CommandQueueConfig
 from src.config.mongo_config import MongoConfig
+from src.config.outbox_config import OutboxConfig
+from src.config.projection_config import ProjectionConfig
+from src.config.storage_config import StorageConfig
 from src.modules.csm.application.module import csm_module
 from src.seedwork.application.module import Application
+from src.seedwork.application.admission import AdmissionController
+from src.seedwork.application.admission import AdmissionLimit
+from src.seedwork.application.command_queue import CommandWorkerPool
+from src.seedwork.application.middleware import TimingMiddleware
+from src.seedwork.application.outbox import InMemoryOutbox
+from src.seedwork.application.outbox import OutboxRelay
+from src.seedwork.application.query_cache import QueryCache
 from src.seedwork.infrastructure.ioc import IocProvider
+from src.seedwork.infrastructure.sqlite import SqliteDatabase
+from src.seedwork.infrastructure.mongo import MongoTimeoutMiddleware
+from src.seedwork.infrastructure.mongo import MongoCommandStore
+from src.seedwork.infrastructure.mongo import MongoOutbox
+from src.seedwork.infrastructure.mongo import MongoEventStore
+from src.seedwork.infrastructure.mongo import MongoSnapshotStore
+from src.seedwork.infrastructure.mongo import MongoCheckpointStore
+from src.seedwork.infrastructure.event_store import EventStore
+from src.seedwork.infrastructure.event_store import InMemoryEventStore
+from src.seedwork.infrastructure.event_store import InMemorySnapshotStore
+from src.seedwork.infrastructure.event_store import SnapshotStore
+from src.seedwork.infrastructure.event_codec import EventCodec
+from src.seedwork.infrastructure.projection import CheckpointStore
+from src.seedwork.infrastructure.projection import InMemoryCheckpointStore
+from src.seedwork.infrastructure.projection import ProjectionRunner
+from src.seedwork.bulkhead import Bulkhead
 from src.modules.csm.application.services.query_service import PlayerQueryService
 from src.modules.csm.application.services.http_service import AsyncHttpService
+from src.modules.csm.application.services.rating_service import PlayerRatingService
 from src.modules.csm.domain.player_repository import PlayerRepository
-from src.modules.csm.infrastructure.query_service import MongoPlayerQueryService
+from src.modules.csm.domain.player_stats_history import PlayerStatsHistory
+from src.modules.csm.domain.player_stats_history_repository import PlayerStatsHistoryRepository
+from src.modules.csm.infrastructure.query_service import PlayerQueryServiceImpl
 from src.modules.csm.infrastructure.http_service import HttpxCristalixService
+from src.modules.csm.infrastructure.stub_http_service import StubCristalixService
+from src.modules.csm.infrastructure.event_registry import create_event_codec
 from src.modules.csm.infrastructure.player_repository import MongoPlayerRepository
+from src.modules.csm.infrastructure.player_repository import SqlitePlayerRepository
+from src.modules.csm.infrastructure.player_repository import InMemoryPlayerRepository
+from src.modules.csm.infrastructure.player_repository import SQLITE_PLAYER_SCHEMA
+from src.modules.csm.infrastructure.player_projection import PlayerReadModelProjection
+from src.modules.csm.infrastructure.player_stats_history_repository import EventSourcedPlayerStatsHistoryRepository
+from src.modules.csm.infrastructure.rating_service import MongoPlayerRatingService
+from src.modules.csm.infrastructure.rating_service import SqlitePlayerRatingService
+from src.modules.csm.infrastructure.rating_service import InMemoryPlayerRatingService
+from src.modules.csm.infrastructure.rating_service import SQLITE_RATING_SCHEMA
 
 
 def csm_engine(config: typing.Mapping[str, typing.Any]) -> AsyncIOMotorClient:
-    engine = AsyncIOMotorClient(config["url"])
+    # Пул соединений драйвера служит bulkhead-ом для Mongo.
+    engine = AsyncIOMotorClient(
+        config["url"],
+        maxPoolSize=config["mongo_max_pool_size"],
+        waitQueueTimeoutMS=int(config["mongo_wait_queue_timeout"] * 1000),
+    )
     return engine
 
 
@@ -37,9 +84,62 @@ def csm_players_collection(
     return collection
 
 
+def csm_rating_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["csm_rating_collection"]]
+    return collection
+
+
+def csm_command_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["command_collection"]]
+    return collection
+
+
+def csm_outbox_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["outbox_collection"]]
+    return collection
+
+
+def csm_event_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["csm_event_collection"]]
+    return collection
+
+
+def csm_snapshot_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["csm_snapshot_collection"]]
+    return collection
+
+
+def csm_read_model_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["csm_read_model_collection"]]
+    return collection
+
+
+def csm_checkpoint_collection(
+    database: AsyncIOMotorDatabase, config: typing.Mapping[str, typing.Any],
+) -> AsyncIOMotorCollection:
+    collection = database[config["checkpoint_collection"]]
+    return collection
+
+
 def create_application() -> Application:
     csm_container = CsmContainer()
     csm_container.config.from_dict(MongoConfig().model_dump())
+    csm_container.config.from_dict(StorageConfig().model_dump())
+    csm_container.config.from_dict(ProjectionConfig().model_dump())
+    admission_config = AdmissionConfig()
+    csm_container.config.from_dict(admission_config.model_dump())
 
     application = Application(
         "CristalixUnofficialBot",
@@ -48,6 +148,35 @@ def create_application() -> Application:
         dependency_provider=IocProvider(csm_container),
     )
     application.include_module(csm_module)
+    # Кеш снаружи, чтобы попадания не занимали места в очередях, а
+    # гистограммы учитывали только реальные вызовы обработчиков.
+    # Все мидлвари доступны через `application.middlewares`.
+    application.add_middleware(QueryCache())
+    application.add_middleware(AdmissionController(
+        admission_config.query_deadline,
+        default_limit=AdmissionLimit(
+            admission_config.query_max_concurrency, admission_config.query_max_queue,
+        ),
+    ))
+    application.add_middleware(TimingMiddleware())
+    application.add_middleware(MongoTimeoutMiddleware())
+
+    command_queue_config = CommandQueueConfig()
+    application.configure_command_workers(CommandWorkerPool(
+        application,
+        workers=command_queue_config.command_workers,
+        max_queue=command_queue_config.command_queue_size,
+        store=csm_container.command_store() if command_queue_config.command_queue_durable else None,
+        max_attempts=command_queue_config.command_max_attempts,
+    ))
+
+    outbox_config = OutboxConfig()
+    application.configure_outbox(OutboxRelay(
+        csm_container.outbox() if outbox_config.outbox_durable else InMemoryOutbox(),
+        batch_size=outbox_config.outbox_batch_size,
+        flush_interval=outbox_config.outbox_flush_interval,
+    ))
+    application.validate_dependencies()
 
     return application
 
@@ -67,16 +196,141 @@ class CsmContainer(containers.DeclarativeContainer):
         csm_players_collection, database, config,
     )
 
-    player_repository: PlayerRepository = providers.Factory(
-        MongoPlayerRepository, player_collection,
+    rating_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_rating_collection, database, config,
+    )
+
+    command_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_command_collection, database, config,
+    )
+
+    command_store: providers.Provider[MongoCommandStore] = providers.Singleton(
+        MongoCommandStore, command_collection,
+    )
+
+    outbox_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_outbox_collection, database, config,
+    )
+
+    outbox: providers.Provider[MongoOutbox] = providers.Singleton(
+        MongoOutbox, outbox_collection,
+    )
+
+    # Провайдер по классу, чтобы базу можно было получить по типу и
+    # закрыть при остановке. Соединение открывается лениво.
+    sqlite_database: SqliteDatabase = providers.Singleton(
+        SqliteDatabase, config.csm_sqlite_path, (*SQLITE_PLAYER_SCHEMA, *SQLITE_RATING_SCHEMA),
+    )
+
+    event_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_event_collection, database, config,
+    )
+
+    snapshot_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_snapshot_collection, database, config,
+    )
+
+    read_model_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_read_model_collection, database, config,
+    )
+
+    checkpoint_collection: AsyncIOMotorCollection = providers.Singleton(
+        csm_checkpoint_collection, database, config,
+    )
+
+    event_codec: EventCodec = providers.Singleton(create_event_codec)
+
+    # Без Mongo история статистики живёт в памяти процесса, а read model
+    # не ведётся: запросы всегда идут на сервер.
+    event_store: EventStore[PlayerStatsHistory] = providers.Selector(
+        config.csm_storage_backend,
+        mongo=providers.Singleton(MongoEventStore, event_collection, event_codec),
+        sqlite=providers.Singleton(InMemoryEventStore),
+        memory=providers.Singleton(InMemoryEventStore),
+    )
+
+    snapshot_store: SnapshotStore = providers.Selector(
+        config.csm_storage_backend,
+        mongo=providers.Singleton(MongoSnapshotStore, snapshot_collection),
+        sqlite=providers.Singleton(InMemorySnapshotStore),
+        memory=providers.Singleton(InMemorySnapshotStore),
+    )
+
+    checkpoint_store: CheckpointStore = providers.Selector(
+        config.csm_storage_backend,
+        mongo=providers.Singleton(MongoCheckpointStore, checkpoint_collection),
+        sqlite=providers.Singleton(InMemoryCheckpointStore),
+        memory=providers.Singleton(InMemoryCheckpointStore),
+    )
+
+    projections = providers.Selector(
+        config.csm_storage_backend,
+        mongo=providers.List(providers.Singleton(PlayerReadModelProjection, read_model_collection)),
+        sqlite=providers.List(),
+        memory=providers.List(),
+    )
+
+    projection_runner: ProjectionRunner = providers.Singleton(
+        ProjectionRunner,
+        event_store,
+        checkpoint_store,
+        projections,
+        config.projection_batch_size,
+        config.projection_poll_interval,
+        config.projection_gap_timeout,
+    )
+
+    stats_history_repository: PlayerStatsHistoryRepository = providers.Singleton(
+        EventSourcedPlayerStatsHistoryRepository, event_store, snapshot_store,
+    )
+
+    # Реализация хранилища выбирается через `csm_storage_backend`.
+    # ContextLocalSingleton: один инстанс на транзакционный контекст.
+    player_repository: PlayerRepository = providers.Selector(
+        config.csm_storage_backend,
+        mongo=providers.ContextLocalSingleton(
+            MongoPlayerRepository, player_collection, config.csm_raw_documents,
+        ),
+        sqlite=providers.ContextLocalSingleton(SqlitePlayerRepository, sqlite_database),
+        # Состояние живёт в самом репозитории, поэтому он один на приложение.
+        memory=providers.Singleton(InMemoryPlayerRepository, config.csm_memory_snapshot_path),
+    )
+
+    http_bulkhead: Bulkhead = providers.Singleton(
+        Bulkhead, config.http_max_concurrency, config.http_max_queue,
+    )
+
+    # Держит пул соединений, поэтому один на приложение.
+    cristalix_service: AsyncHttpService = providers.Selector(
+        config.csm_http_backend,
+        cristalix=providers.Singleton(HttpxCristalixService, http_bulkhead),
+        stub=providers.Singleton(StubCristalixService),
+    )
+
+    # Скетчи рейтинга копят состояние между запросами, поэтому синглтон.
+    rating_service: PlayerRatingService = providers.Selector(
+        config.csm_storage_backend,
+        mongo=providers.Singleton(
+            MongoPlayerRatingService, rating_collection, config.csm_rating_flush_interval,
+        ),
+        sqlite=providers.Singleton(
+            SqlitePlayerRatingService, sqlite_database, config.csm_rating_flush_interval,
+        ),
+        memory=providers.Singleton(
+            InMemoryPlayerRatingService, config.csm_rating_flush_interval,
+        ),
     )
 
-    cristalix_service: AsyncHttpService = providers.Factory(
-        HttpxCristalixService,
+    # Read model ведётся только в Mongo, без неё запросы всегда идут на сервер.
+    player_read_models = providers.Selector(
+        config.csm_storage_backend,
+        mongo=read_model_collection,
+        sqlite=providers.Object(None),
+        memory=providers.Object(None),
     )
 
-    player_query_service: PlayerQueryService = providers.Factory(
-        MongoPlayerQueryService, player_repository, cristalix_service,
+    player_query_service: PlayerQueryService = providers.ContextLocalSingleton(
+        PlayerQueryServiceImpl, player_repository, cristalix_service, rating_service, player_read_models,
     )
 
 
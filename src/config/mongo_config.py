@@ -8,3 +8,12 @@ class MongoConfig(pydantic_settings.BaseSettings):
     url: str = pydantic.Field(default="localhost:27017")
     csm_database: str = pydantic.Field(default="csm")
     csm_player_collection: str = pydantic.Field(default="players")
+    csm_raw_documents: bool = pydantic.Field(default=False)
+    csm_rating_collection: str = pydantic.Field(default="rating_sketches")
+    csm_rating_flush_interval: float = pydantic.Field(default=60.0)
+    command_collection: str = pydantic.Field(default="commands")
+    outbox_collection: str = pydantic.Field(default="outbox")
+    csm_event_collection: str = pydantic.Field(default="player_events")
+    csm_snapshot_collection: str = pydantic.Field(default="player_snapshots")
+    csm_read_model_collection: str = pydantic.Field(default="player_read_models")
+    checkpoint_collection: str = pydantic.Field(default="projection_checkpoints")
@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import pydantic_settings
+import pydantic
+
+
+class OutboxConfig(pydantic_settings.BaseSettings):
+    outbox_batch_size: int = pydantic.Field(default=100)
+    outbox_flush_interval: float = pydantic.Field(default=1.0)
+    # Сохранять ли интеграционные события в Mongo, чтобы они пережили перезапуск.
+    outbox_durable: bool = pydantic.Field(default=False)
@@ -0,0 +1,10 @@
+from __future__ import annotations
+
+import pydantic_settings
+import pydantic
+
+
+class ProjectionConfig(pydantic_settings.BaseSettings):
+    projection_batch_size: int = pydantic.Field(default=500)
+    projection_poll_interval: float = pydantic.Field(default=1.0)
+    projection_gap_timeout: float = pydantic.Field(default=2.0)
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+import typing
+
+import pydantic_settings
+import pydantic
+
+
+class StorageConfig(pydantic_settings.BaseSettings):
+    csm_storage_backend: typing.Literal["mongo", "sqlite", "memory"] = pydantic.Field(default="mongo")
+    csm_sqlite_path: str = pydantic.Field(default="csm.sqlite3")
+    csm_memory_snapshot_path: typing.Optional[str] = pydantic.Field(default=None)
+    # "stub" отвечает без сети, для бенчмарков и локальных запусков.
+    csm_http_backend: typing.Literal["cristalix", "stub"] = pydantic.Field(default="cristalix")
@@ -1,12 +1,18 @@
 from __future__ import annotations
 
+import logging
 import typing
 
 import alluka
 import tanjun
 
 from src.modules.csm.application.queries.get_player import GetPlayer
+from src.modules.csm.application.queries.get_player_rating import GetPlayerRating
+from src.modules.csm.application.commands.record_player_stats import PLAYER_STATS_REFRESH_INTERVAL
+from src.modules.csm.application.commands.record_player_stats import RecordPlayerStats
+from src.seedwork.application.command_queue import CommandQueueFullError
 from src.seedwork.application.module import Application
+from src.seedwork.deadline import Deadline
 from src.discord import util
 from src.modules.csm.infrastructure import util as csm_util
 
@@ -16,8 +22,13 @@ if typing.TYPE_CHECKING:
     from src.modules.csm.domain.events import EventsStatistic
     from src.modules.csm.domain.csc import CscStatistic
 
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
 component = tanjun.Component()
 
+# Ответ на взаимодействие должен уйти в течение 3 секунд после его создания.
+INTERACTION_DEADLINE: typing.Final[float] = 2.5
+
 
 def _build_events_message(events_stats: EventsStatistic) -> str:
     # FIXME: это так быть не должно
@@ -50,22 +61,66 @@ def _build_csc_message(csc_stats: CscStatistic) -> str:
     return message
 
 
+_RATING_LABELS: typing.Final[typing.Mapping[str, str]] = {
+    "csc_rating": "Рейтинг CSC",
+    "csc_wins": "Побед в CSC",
+    "csc_games_played": "Игр в CSC",
+    "csc_player_kills": "Убийств игроков в CSC",
+    "events_wins": "Побед на ивентах",
+    "events_kills": "Убийств на ивентах",
+}
+
+
+def _build_rating_message(top_percents: typing.Mapping[str, float]) -> str:
+    message = "**Место среди игроков**\n"
+    for metric, percent in top_percents.items():
+        message += f"{_RATING_LABELS.get(metric, metric)}: топ {max(percent, 0.1)}%\n"
+    return message
+
+
+async def _record_stats(app: Application, player: Player) -> None:
+    # Запись статистики (и проекция для следующих запросов) выполняется
+    # воркерами команд и не задерживает ответ.
+    if app.command_workers is None:
+        return
+
+    command = RecordPlayerStats.from_player(player)
+    # Одна запись на игрока за интервал обновления: повторные запросы в
+    # нём не ставят в очередь дубликаты.
+    idempotency_key = f"{player.id}:{int(command.recorded_at // PLAYER_STATS_REFRESH_INTERVAL)}"
+    try:
+        await app.enqueue_command(command, idempotency_key)
+    except CommandQueueFullError:
+        _LOGGER.warning("Command queue is full, stats of %s are not recorded", player.id)
+
+
 @component.with_slash_command
 @tanjun.with_str_slash_option("nickname", "Никнейм пользователя, статистику которого необходимо узнать.")
 @tanjun.as_slash_command("статы", "Показывает статистику пользователя сервере мини-игр.")
 async def get_active_scrims(ctx: tanjun.abc.Context, nickname: str, app: alluka.Injected[Application]) -> None:
+    deadline = Deadline.after(INTERACTION_DEADLINE)
     try:
-        query_result: QueryResult[Player] = await app.execute_query(GetPlayer(nickname))
+        query_result: QueryResult[Player] = await app.execute_query(GetPlayer(nickname), deadline=deadline)
         if not query_result.has_errors():
+            player = query_result.payload
+            assert player is not None
+            message = (
+                _build_events_message(player.stats.events_stats)
+                + "\n"
+                + _build_csc_message(player.stats.csc_stats)
+            )
+            rating_result = await app.execute_query(
+                GetPlayerRating(player.stats), deadline=deadline,
+            )
+            if rating_result.is_success() and rating_result.payload:
+                message += "\n" + _build_rating_message(rating_result.payload)
+
             embed = util.success_message(
-                title=f"Статистика игрока {query_result.payload.id}",
-                message=(
-                    _build_events_message(query_result.payload.stats.events_stats)
-                    + "\n"
-                    + _build_csc_message(query_result.payload.stats.csc_stats)
-                ),
+                title=f"Статистика игрока {player.id}",
+                message=message,
             )
             await ctx.respond(embed=embed)
+            await _record_stats(app, player)
             return
 
         embed = util.fail_command_message(query_result)
@@ -12,6 +12,13 @@ from src.seedwork.infrastructure.ioc import inject
 from src.seedwork.application.module import Application
 from src.config.container import TopLevelContainer
 from src.config.container import CsmContainer
+from src.config.command_queue_config import CommandQueueConfig
+from src.modules.csm.application.services.rating_service import PlayerRatingService
+from src.modules.csm.application.services.http_service import AsyncHttpService
+from src.modules.csm.domain.player_repository import PlayerRepository
+from src.modules.csm.infrastructure.player_repository import InMemoryPlayerRepository
+from src.seedwork.infrastructure.projection import ProjectionRunner
+from src.seedwork.infrastructure.sqlite import SqliteDatabase
 
 TEST_GUILD_ID: typing.Final[int] = 1190739228053749790
 
@@ -53,6 +60,42 @@ def run(
     )
     client.set_type_dependency(Application, application)
 
+    # Скетчи рейтинга переживают перезапуски бота: подгружаем при старте,
+    # сбрасываем в бд при остановке.
+    rating_service = application.dependency_provider.get_dependency(PlayerRatingService)
+    projection_runner = application.dependency_provider.get_dependency(ProjectionRunner)
+
+    async def on_started(_: hikari.StartedEvent) -> None:
+        await rating_service.load()
+        await projection_runner.start()
+        if application.command_workers is not None:
+            await application.command_workers.start()
+        if application.outbox is not None:
+            await application.outbox.start()
+
+    async def on_stopping(_: hikari.StoppingEvent) -> None:
+        if application.command_workers is not None:
+            await application.command_workers.stop(CommandQueueConfig().command_drain_timeout)
+        # После воркеров: их команды тоже могли собрать интеграционные события.
+        if application.outbox is not None:
+            await application.outbox.stop()
+        await projection_runner.stop()
+        await rating_service.flush()
+
+        player_repository = application.dependency_provider.get_dependency(PlayerRepository)
+        if isinstance(player_repository, InMemoryPlayerRepository):
+            await player_repository.snapshot()
+
+        cristalix_service = application.dependency_provider.get_dependency(AsyncHttpService)
+        await cristalix_service.close()
+
+        # Последним: до этого в базу ещё пишут воркеры команд и сброс рейтинга.
+        sqlite_database = application.dependency_provider.get_dependency(SqliteDatabase)
+        await sqlite_database.close()
+
+    bot.subscribe(hikari.StartedEvent, on_started)
+    bot.subscribe(hikari.StoppingEvent, on_stopping)
+
     bot.run()
 
 
@@ -0,0 +1 @@
+from .record_player_stats import RecordPlayerStats
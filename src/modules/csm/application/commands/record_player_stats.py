@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import dataclasses
+import time
+import typing
+
+from src.seedwork.application.command import Command
+from src.seedwork.application.command_handler import CommandResult
+from src.modules.csm.application.module import csm_module
+from src.modules.csm.domain.csc import CscStatistic
+from src.modules.csm.domain.events import EventsStatistic
+from src.modules.csm.domain.player import Player
+from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.domain.player_repository import PlayerRepository
+from src.modules.csm.domain.player_stats import PlayerStats
+from src.modules.csm.domain.player_stats_history import PlayerStatsHistory
+from src.modules.csm.domain.player_stats_history_repository import PlayerStatsHistoryRepository
+
+# Не чаще раза в минуту, как и обновление кеша `GetPlayer`.
+PLAYER_STATS_REFRESH_INTERVAL: typing.Final[float] = 60.0
+
+
+@dataclasses.dataclass(frozen=True)
+class RecordPlayerStats(Command):
+    nickname: str
+    api_uuid: str
+    csc_stats: dict[str, int]
+    events_stats: dict[str, int]
+    recorded_at: float
+
+    @classmethod
+    def from_player(cls, player: Player) -> RecordPlayerStats:
+        return cls(
+            nickname=player.id,
+            api_uuid=player.api_uuid,
+            csc_stats=dataclasses.asdict(player.stats.csc_stats),
+            events_stats=dataclasses.asdict(player.stats.events_stats),
+            recorded_at=time.time(),
+        )
+
+
+@csm_module.command_handler()
+async def record_player_stats(
+    command: RecordPlayerStats,
+    history_repository: PlayerStatsHistoryRepository,
+    player_repository: PlayerRepository,
+) -> CommandResult:
+    # Новый игрок сохраняется здесь, в фоне, а не при ответе на запрос.
+    if await player_repository.get_by_id(PlayerId(command.nickname)) is None:
+        await player_repository.insert(Player(id=PlayerId(command.nickname), api_uuid=command.api_uuid))
+
+    history = await history_repository.get(command.nickname)
+    stats = PlayerStats(
+        csc_stats=CscStatistic(**command.csc_stats),
+        events_stats=EventsStatistic(**command.events_stats),
+    )
+    if history.record(
+        command.nickname, command.api_uuid, stats, command.recorded_at, PLAYER_STATS_REFRESH_INTERVAL,
+    ):
+        await history_repository.save(command.nickname, history)
+
+    return CommandResult.success(entity_id=PlayerStatsHistory.stream_id(command.nickname))
@@ -1,2 +1,4 @@
 from .get_player import GetPlayer
+from .get_player_rating import GetPlayerRating
+from .get_players import GetPlayers
 
@@ -4,12 +4,16 @@ import dataclasses
 import typing
 
 from src.seedwork.application.query import Query
+from src.seedwork.application.query_cache import cached_query
 from src.modules.csm.application.module import csm_module
 from src.modules.csm.domain.player import Player
 from src.modules.csm.domain.player_id import PlayerId
 from src.modules.csm.application.services.query_service import PlayerQueryService
 from src.seedwork.application.query_handler import QueryResult
 
+# Для команд бота статистики минутной давности достаточно.
+GET_PLAYER_CACHE_TTL: typing.Final[float] = 60.0
+
 
 @dataclasses.dataclass(frozen=True)
 class GetPlayer(Query):
@@ -17,6 +21,7 @@ class GetPlayer(Query):
 
 
 @csm_module.query_handler()
+@cached_query(ttl=GET_PLAYER_CACHE_TTL)
 async def get_player(
     query: GetPlayer, query_service: PlayerQueryService,
 ) -> QueryResult[Player]:
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+import dataclasses
+import typing
+
+from src.seedwork.application.query import Query
+from src.modules.csm.application.module import csm_module
+from src.modules.csm.domain.player_stats import PlayerStats
+from src.modules.csm.application.services.rating_service import PlayerRatingService
+from src.seedwork.application.query_handler import QueryResult
+
+
+@dataclasses.dataclass(frozen=True)
+class GetPlayerRating(Query):
+    stats: PlayerStats
+
+
+@csm_module.query_handler()
+async def get_player_rating(
+    query: GetPlayerRating, rating_service: PlayerRatingService,
+) -> QueryResult[typing.Mapping[str, float]]:
+    return QueryResult.success(payload=rating_service.top_percent(query.stats))
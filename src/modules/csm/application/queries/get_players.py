@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import dataclasses
+import typing
+
+from src.seedwork.application.query import Query
+from src.seedwork.domain.value_object import ValueObject
+from src.modules.csm.application.module import csm_module
+from src.modules.csm.domain.player import Player
+from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.application.services.query_service import PlayerQueryService
+from src.seedwork.application.query_handler import QueryResult
+
+GET_PLAYERS_CONCURRENCY: typing.Final[int] = 8
+
+
+@dataclasses.dataclass(frozen=True)
+class GetPlayers(Query):
+    nicknames: tuple[str, ...]
+
+
+@dataclasses.dataclass(frozen=True)
+class PlayersBatch(ValueObject):
+    players: typing.Mapping[str, Player]
+    errors: typing.Mapping[str, Exception]
+
+
+def normalize_nicknames(nicknames: typing.Iterable[str]) -> list[str]:
+    # Ники на сервере регистронезависимы: оставляем первое написание.
+    seen: set[str] = set()
+    normalized = []
+    for nickname in nicknames:
+        nickname = nickname.strip()
+        if nickname and (key := nickname.casefold()) not in seen:
+            seen.add(key)
+            normalized.append(nickname)
+
+    return normalized
+
+
+@csm_module.query_handler()
+async def get_players(
+    query: GetPlayers, query_service: PlayerQueryService,
+) -> QueryResult[PlayersBatch]:
+    read_models = await query_service.get_players(
+        normalize_nicknames(query.nicknames), concurrency=GET_PLAYERS_CONCURRENCY,
+    )
+
+    players: dict[str, Player] = {}
+    errors: dict[str, Exception] = {}
+    for nickname, read_model in read_models.items():
+        if isinstance(read_model, Exception):
+            errors[nickname] = read_model
+            continue
+
+        player = Player(
+            id=PlayerId(read_model.nickname),
+            api_uuid=read_model.api_uuid,
+        )
+        player.set_stats(read_model.stats)
+        players[nickname] = player
+
+    return QueryResult.success(payload=PlayersBatch(players=players, errors=errors))
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import abc
+import asyncio
 import typing
 
 if typing.TYPE_CHECKING:
@@ -27,3 +28,24 @@ class AsyncHttpService(abc.ABC):
         self, player_nickname: str, player_api_id: typing.Optional[str] = None,
     ) -> PlayerStats:
         ...
+
+    async def request_players_stats(
+        self, player_api_ids: typing.Mapping[str, str],
+    ) -> typing.Mapping[str, typing.Union[PlayerStats, Exception]]:
+        # Реализации с bulk-апи переопределяют это одним запросом.
+        nicknames = list(player_api_ids)
+        results = await asyncio.gather(
+            *(self.request_player_stats(nickname, player_api_ids[nickname]) for nickname in nicknames),
+            return_exceptions=True,
+        )
+        players_stats: dict[str, typing.Union[PlayerStats, Exception]] = {}
+        for nickname, result in zip(nicknames, results):
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                # Отмену не выдаём за ошибку запроса одного игрока.
+                raise result
+            players_stats[nickname] = result
+        return players_stats
+
+    async def close(self) -> None:
+        # Реализации с долгоживущими соединениями освобождают их здесь.
+        pass
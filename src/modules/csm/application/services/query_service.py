@@ -14,3 +14,9 @@ class PlayerQueryService(abc.ABC):
     async def get_player(self, nickname: str) -> PlayerReadModel:
         ...
 
+    @abc.abstractmethod
+    async def get_players(
+        self, nicknames: typing.Sequence[str], concurrency: int,
+    ) -> typing.Mapping[str, typing.Union[PlayerReadModel, Exception]]:
+        ...
+
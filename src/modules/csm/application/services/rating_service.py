@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import abc
+import typing
+
+if typing.TYPE_CHECKING:
+    from src.modules.csm.domain.player_stats import PlayerStats
+
+
+class PlayerRatingService(abc.ABC):
+    __slots__: typing.Sequence[str] = ()
+
+    @abc.abstractmethod
+    def observe(self, stats: PlayerStats) -> None:
+        ...
+
+    @abc.abstractmethod
+    def top_percent(self, stats: PlayerStats) -> typing.Mapping[str, float]:
+        ...
+
+    @abc.abstractmethod
+    async def load(self) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def flush(self) -> None:
+        ...
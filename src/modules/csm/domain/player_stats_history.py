@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import dataclasses
+import functools
+import typing
+import uuid
+
+from src.seedwork.domain.aggregate import EventSourcedAggregate
+from src.seedwork.domain.entity_uuid import EntityId
+from src.seedwork.domain.event import Event
+from src.modules.csm.domain.csc import CscStatistic
+from src.modules.csm.domain.events import EventsStatistic
+from src.modules.csm.domain.player_stats import PlayerStats
+
+_STREAM_NAMESPACE: typing.Final[uuid.UUID] = uuid.UUID("5b0d6f0e-6c1c-4f61-9a55-2f4a3c1d7e90")
+"""Пространство имён uuid5 для айди потоков истории игроков."""
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class PlayerStatsRecorded(Event):
+    # Статистика хранится словарями: событие должно сохраняться и
+    # восстанавливаться по полям без вложенных датаклассов.
+    nickname: str
+    api_uuid: str
+    csc_stats: dict[str, int]
+    events_stats: dict[str, int]
+    recorded_at: float
+
+    @property
+    def stats(self) -> PlayerStats:
+        return PlayerStats(
+            csc_stats=CscStatistic(**self.csc_stats),
+            events_stats=EventsStatistic(**self.events_stats),
+        )
+
+
+class PlayerStatsHistory(EventSourcedAggregate):
+    """История статистики игрока, полученной с сервера."""
+
+    __slots__: typing.Sequence[str] = ("_stats", "_recorded_at")
+
+    supports_snapshots: typing.ClassVar[bool] = True
+
+    def __init__(self, version: int = 0) -> None:
+        super().__init__(version)
+        self._stats: typing.Optional[PlayerStats] = None
+        self._recorded_at = 0.0
+
+    @staticmethod
+    def stream_id(nickname: str) -> EntityId:
+        return EntityId.from_str(str(uuid.uuid5(_STREAM_NAMESPACE, nickname)))
+
+    @property
+    def stats(self) -> typing.Optional[PlayerStats]:
+        return self._stats
+
+    @property
+    def recorded_at(self) -> float:
+        return self._recorded_at
+
+    def record(
+        self, nickname: str, api_uuid: str, stats: PlayerStats, recorded_at: float, refresh_interval: float,
+    ) -> bool:
+        """Записывает статистику игрока.
+
+        Неизменившаяся статистика записывается не чаще, чем раз в
+        `refresh_interval` секунд.
+
+        Returns
+        -------
+        bool
+            True, если статистика записана.
+        """
+        if stats == self._stats and recorded_at - self._recorded_at < refresh_interval:
+            return False
+
+        self._record_that(PlayerStatsRecorded(
+            nickname=nickname,
+            api_uuid=api_uuid,
+            csc_stats=dataclasses.asdict(stats.csc_stats),
+            events_stats=dataclasses.asdict(stats.events_stats),
+            recorded_at=recorded_at,
+        ))
+        return True
+
+    def snapshot_state(self) -> typing.Mapping[str, typing.Any]:
+        return {
+            "csc_stats": None if self._stats is None else dataclasses.asdict(self._stats.csc_stats),
+            "events_stats": None if self._stats is None else dataclasses.asdict(self._stats.events_stats),
+            "recorded_at": self._recorded_at,
+        }
+
+    @classmethod
+    def from_snapshot(cls, state: typing.Mapping[str, typing.Any], version: int) -> PlayerStatsHistory:
+        history = cls(version)
+        if state["csc_stats"] is not None:
+            history._stats = PlayerStats(
+                csc_stats=CscStatistic(**state["csc_stats"]),
+                events_stats=EventsStatistic(**state["events_stats"]),
+            )
+        history._recorded_at = state["recorded_at"]
+        return history
+
+    @functools.singledispatchmethod
+    def _aggregate(self, event: Event) -> None:
+        raise ValueError(f"Unknown event {event!r}")
+
+    @_aggregate.register
+    def _(self, event: PlayerStatsRecorded) -> None:
+        self._stats = event.stats
+        self._recorded_at = event.recorded_at
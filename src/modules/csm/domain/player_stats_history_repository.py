@@ -0,0 +1,19 @@
+from __future__ import annotations
+
+import abc
+import typing
+
+if typing.TYPE_CHECKING:
+    from src.modules.csm.domain.player_stats_history import PlayerStatsHistory
+
+
+class PlayerStatsHistoryRepository(abc.ABC):
+    __slots__: typing.Sequence[str] = ()
+
+    @abc.abstractmethod
+    async def get(self, nickname: str) -> PlayerStatsHistory:
+        """Вернёт пустую историю, если статистика игрока ещё не записывалась."""
+
+    @abc.abstractmethod
+    async def save(self, nickname: str, history: PlayerStatsHistory) -> None:
+        ...
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import typing
+
+from src.seedwork.infrastructure.event_codec import EventCodec
+from src.seedwork.infrastructure.event_codec import EventRegistry
+from src.modules.csm.domain.player_stats_history import PlayerStatsRecorded
+
+csm_event_registry: typing.Final[EventRegistry] = EventRegistry()
+"""Стабильные имена событий модуля в хранилище событий. Имена не
+меняются при переносе и переименовании классов.
+"""
+
+csm_event_registry.add(PlayerStatsRecorded, "csm.player_stats_recorded")
+
+
+def create_event_codec() -> EventCodec:
+    return EventCodec(csm_event_registry)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import typing
 
@@ -10,6 +11,8 @@ import fake_useragent
 from src.seedwork.api import Route
 from src.seedwork.api import GET
 from src.seedwork.api import POST
+from src.seedwork.bulkhead import Bulkhead
+from src.seedwork.deadline import remaining_timeout
 from src.modules.csm.infrastructure import util
 from src.modules.csm.domain.player_stats import PlayerStats
 from src.modules.csm.domain.csc import CscStatistic
@@ -27,6 +30,9 @@ PLAYER_STATS_URL = "https://testapistatistics.cristalix.gg/graphql"
 PLAYER_PROFILE: Route = Route(GET, "{player_nickname}")
 PLAYER_STATS: Route = Route(POST, "")
 
+STATS_BATCH_SIZE: typing.Final[int] = 25
+REQUEST_TIMEOUT: typing.Final[float] = 5.0
+
 
 def _build_payloads(raw_payloads: list[typing.Mapping[str, typing.Any]]) -> dict[str, typing.Any]:
     # FIXME: щиткод + SRP
@@ -71,6 +77,31 @@ def _build_events_stats(payloads: list[typing.Mapping[str, typing.Any]]) -> Even
     return statistic
 
 
+def _build_stats_headers() -> dict[str, str]:
+    return {
+        "authority": "testapistatistics.cristalix.gg",
+        "accept": "*/*",
+        "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
+        "content-type": "application/json",
+        "origin": "https://statistics.cristalix.gg",
+        "sec-fetch-dest": "empty",
+        "sec-fetch-mode": "cors",
+        "sec-fetch-site": "same-site",
+        "user-agent": fake_useragent.UserAgent().random,
+    }
+
+
+def _build_bulk_stats_query(aliases: typing.Sequence[str]) -> str:
+    # Один GraphQL-запрос со статистикой нескольких игроков через алиасы.
+    variables = ", ".join(f"${alias}: ID" for alias in aliases)
+    fields = "\n".join(
+        f"{alias}: feedAllCategoriesStatistics(id: ${alias}) "
+        "{ category games { game statisticsMap { field value } } }"
+        for alias in aliases
+    )
+    return f"query getProfilesCategoriesStatistics({variables}) {{\n{fields}\n}}"
+
+
 def parse_player_id(response_text: str) -> str:
     # FIXME: щиткод
     soup = bs4.BeautifulSoup(response_text, "lxml")
@@ -88,13 +119,30 @@ def parse_player_id(response_text: str) -> str:
 
 
 class HttpxCristalixService(AsyncHttpService):
-    __slots__: typing.Sequence[str] = ("_allowed_categories",)
+    __slots__: typing.Sequence[str] = ("_allowed_categories", "_client", "_bulkhead")
 
-    def __init__(self) -> None:
+    def __init__(self, bulkhead: typing.Optional[Bulkhead] = None) -> None:
         self._allowed_categories: typing.Sequence[str] = (
             "csc",
             "events",
         )
+        self._client: typing.Optional[httpx.AsyncClient] = None
+        # Ограничивает одновременные запросы к Cristalix, чтобы при наплыве
+        # команд не копить их в пуле httpx до таймаута.
+        self._bulkhead = bulkhead
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Клиент создаётся лениво, т.к. сервис может быть создан вне event loop.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient()
+
+        return self._client
+
+    async def close(self) -> None:
+        """Закрывает общий пул соединений сервиса."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def _request(
         self,
@@ -108,23 +156,40 @@ class HttpxCristalixService(AsyncHttpService):
     ) -> httpx.Response:
         # TODO: Нужен ли нам условный tenacity для повторного
         #       вызова запросов, в случае неудачи?
-        async with httpx.AsyncClient() as client:
-            url = route.create_url(route_url)
-            try:
-                response = await client.request(
-                    route.method,
-                    url,
-                    json=json,
-                    headers=headers,
-                    params=params,
-                    data=data,
-                )
-            except Exception as exc:
-                # FIXME: когда-нибудь надо cделать адекватную
-                #  обработку исключений.
-                raise Exception() from exc
+        if self._bulkhead is not None:
+            async with self._bulkhead.hold(remaining_timeout()):
+                return await self._send(route, route_url, params, data, json, headers)
 
-            return response
+        return await self._send(route, route_url, params, data, json, headers)
+
+    async def _send(
+        self,
+        route: CompiledRoute,
+        route_url: str,
+        params: typing.Optional[typing.Mapping[str, str]],
+        data: typing.Optional[typing.Any],
+        json: typing.Optional[typing.Any],
+        headers: typing.Optional[typing.Mapping[str, str]],
+    ) -> httpx.Response:
+        url = route.create_url(route_url)
+        # Таймаут не больше времени, оставшегося до дедлайна транзакции.
+        timeout = remaining_timeout(REQUEST_TIMEOUT)
+        try:
+            response = await self._get_client().request(
+                route.method,
+                url,
+                json=json,
+                headers=headers,
+                params=params,
+                data=data,
+                timeout=timeout,
+            )
+        except Exception as exc:
+            # FIXME: когда-нибудь надо cделать адекватную
+            #  обработку исключений.
+            raise Exception() from exc
+
+        return response
 
     async def request_player_api_uuid(self, player_nickname: str) -> str:
         profile_route = PLAYER_PROFILE.compile(player_nickname=player_nickname)
@@ -150,17 +215,7 @@ class HttpxCristalixService(AsyncHttpService):
         stats_response = await self._request(
             stats_route,
             PLAYER_STATS_URL,
-            headers={
-                "authority": "testapistatistics.cristalix.gg",
-                "accept": "*/*",
-                "accept-language": "ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7",
-                "content-type": "application/json",
-                "origin": "https://statistics.cristalix.gg",
-                "sec-fetch-dest": "empty",
-                "sec-fetch-mode": "cors",
-                "sec-fetch-site": "same-site",
-                "user-agent": fake_useragent.UserAgent().random,
-            },
+            headers=_build_stats_headers(),
             data=json.dumps({
                 "operationName": "getProfileCategoriesStatistics",
                 "variables": {"uuid": player_api_id},
@@ -208,11 +263,56 @@ class HttpxCristalixService(AsyncHttpService):
             },
         ))
         payload = stats_response.json()
-        return self._build_player_stats(payload)
+        return self._build_player_stats(payload["data"]["feedAllCategoriesStatistics"])
+
+    async def request_players_stats(
+        self, player_api_ids: typing.Mapping[str, str],
+    ) -> typing.Mapping[str, typing.Union[PlayerStats, Exception]]:
+        nicknames = list(player_api_ids)
+        batches = [
+            nicknames[start:start + STATS_BATCH_SIZE]
+            for start in range(0, len(nicknames), STATS_BATCH_SIZE)
+        ]
+        results: dict[str, typing.Union[PlayerStats, Exception]] = {}
+        for batch_results in await asyncio.gather(
+            *(self._request_stats_batch(batch, player_api_ids) for batch in batches)
+        ):
+            results.update(batch_results)
+
+        return results
+
+    async def _request_stats_batch(
+        self, nicknames: typing.Sequence[str], player_api_ids: typing.Mapping[str, str],
+    ) -> typing.Mapping[str, typing.Union[PlayerStats, Exception]]:
+        aliases = {f"p{index}": nickname for index, nickname in enumerate(nicknames)}
+        try:
+            stats_response = await self._request(
+                PLAYER_STATS.compile(),
+                PLAYER_STATS_URL,
+                headers=_build_stats_headers(),
+                data=json.dumps({
+                    "operationName": "getProfilesCategoriesStatistics",
+                    "variables": {alias: player_api_ids[nickname] for alias, nickname in aliases.items()},
+                    "query": _build_bulk_stats_query(list(aliases)),
+                }),
+            )
+            data = stats_response.json()["data"]
+        except Exception as exc:
+            return dict.fromkeys(nicknames, exc)
+
+        results: dict[str, typing.Union[PlayerStats, Exception]] = {}
+        for alias, nickname in aliases.items():
+            try:
+                results[nickname] = self._build_player_stats(data[alias])
+            except Exception as exc:
+                error = ScrappingError(f"Can't build stats of player with nickname {nickname!r}")
+                error.__cause__ = exc
+                results[nickname] = error
+
+        return results
 
-    def _build_player_stats(self, payload: typing.Mapping[str, typing.Any]) -> PlayerStats:
+    def _build_player_stats(self, categories: typing.Sequence[typing.Mapping[str, typing.Any]]) -> PlayerStats:
         # FIXME: щиткод + SRP
-        categories = payload["data"]["feedAllCategoriesStatistics"]
         processed_categories = {}
         for category in categories:
             if (name := category["category"]) in self._allowed_categories:
@@ -13,7 +13,11 @@ class MongoPlayerModel(typing.TypedDict):
 
 
 class PlayerMapper(DataMapper[Player, MongoPlayerModel]):
-    def model_to_entity(self, instance: MongoPlayerModel) -> Player:
+    # Поля, которые реально читает маппер. Репозиторий запрашивает только их,
+    # так что стоимость декодирования не растёт вместе с документом.
+    fields: typing.ClassVar[typing.Sequence[str]] = ("_id", "api_uuid")
+
+    def model_to_entity(self, instance: typing.Mapping[str, typing.Any]) -> Player:
         entity = Player(
             id=PlayerId(instance["_id"]),
             api_uuid=instance["api_uuid"],
@@ -26,3 +30,19 @@ class PlayerMapper(DataMapper[Player, MongoPlayerModel]):
             api_uuid=entity.api_uuid,
         )
         return model
+
+
+SqlitePlayerModel: typing.TypeAlias = tuple[str, str]
+
+
+class SqlitePlayerMapper(DataMapper[Player, SqlitePlayerModel]):
+    def model_to_entity(self, instance: SqlitePlayerModel) -> Player:
+        player_id, api_uuid = instance
+        entity = Player(
+            id=PlayerId(player_id),
+            api_uuid=api_uuid,
+        )
+        return entity
+
+    def entity_to_model(self, entity: Player) -> SqlitePlayerModel:
+        return str(entity.id), entity.api_uuid
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import typing
+
+import pymongo
+
+from src.modules.csm.application.models.player_read_model import PlayerReadModel
+from src.modules.csm.domain.csc import CscStatistic
+from src.modules.csm.domain.events import EventsStatistic
+from src.modules.csm.domain.player_stats import PlayerStats
+from src.modules.csm.domain.player_stats_history import PlayerStatsRecorded
+from src.seedwork.infrastructure.mongo import MongoProjection
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.infrastructure.event_store import RecordedEvent
+
+
+class PlayerReadModelProjection(MongoProjection):
+    """Последняя записанная статистика игроков, `_id` документа - никнейм."""
+
+    __slots__: typing.Sequence[str] = ()
+
+    name = "csm_players"
+    event_types = (PlayerStatsRecorded,)
+
+    def project(self, record: RecordedEvent) -> typing.Iterable[typing.Any]:
+        event = typing.cast(PlayerStatsRecorded, record.event)
+        document = {
+            "_id": event.nickname,
+            "api_uuid": event.api_uuid,
+            "csc_stats": event.csc_stats,
+            "events_stats": event.events_stats,
+            "recorded_at": event.recorded_at,
+            "version": record.version,
+        }
+        # Документ заменяется, только если он старее события, поэтому
+        # повторное применение пачки ничего не меняет.
+        yield pymongo.UpdateOne(
+            {"_id": event.nickname},
+            [{"$replaceWith": {"$cond": [
+                {"$gte": [{"$ifNull": ["$version", 0]}, record.version]},
+                "$$ROOT",
+                {"$literal": document},
+            ]}}],
+            upsert=True,
+        )
+
+    @staticmethod
+    def to_read_model(document: typing.Mapping[str, typing.Any]) -> PlayerReadModel:
+        return PlayerReadModel(
+            nickname=document["_id"],
+            api_uuid=document["api_uuid"],
+            stats=PlayerStats(
+                csc_stats=CscStatistic(**document["csc_stats"]),
+                events_stats=EventsStatistic(**document["events_stats"]),
+            ),
+        )
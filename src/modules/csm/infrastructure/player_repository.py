@@ -1,38 +1,72 @@
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import time
 import typing
 
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
 from motor.motor_asyncio import AsyncIOMotorCollection
 
 from src.modules.csm.domain.player_repository import PlayerRepository
 from src.modules.csm.domain.player import Player
 from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.infrastructure.player_mapper import MongoPlayerModel
 from src.modules.csm.infrastructure.player_mapper import PlayerMapper
+from src.modules.csm.infrastructure.player_mapper import SqlitePlayerMapper
 
 if typing.TYPE_CHECKING:
     from src.seedwork.infrastructure.mapper import DataMapper
+    from src.seedwork.infrastructure.sqlite import SqliteDatabase
+
+SQLITE_PLAYER_SCHEMA: typing.Sequence[str] = (
+    "CREATE TABLE IF NOT EXISTS players (id TEXT PRIMARY KEY, api_uuid TEXT NOT NULL)",
+)
+
+_SELECT_ALL_PLAYERS = "SELECT id, api_uuid FROM players"
+_SELECT_PLAYER = "SELECT id, api_uuid FROM players WHERE id = ?"
+_INSERT_PLAYER = "INSERT INTO players (id, api_uuid) VALUES (?, ?)"
+_UPDATE_PLAYER = "UPDATE players SET api_uuid = ? WHERE id = ?"
+_DELETE_PLAYER = "DELETE FROM players WHERE id = ?"
+_SQLITE_IN_BATCH_SIZE = 500
 
 
 class MongoPlayerRepository(PlayerRepository):
-    __slots__: typing.Sequence[str] = ("_collection", "_mapper",)
+    __slots__: typing.Sequence[str] = ("_collection", "_mapper", "_projection",)
 
-    mapper_class: typing.ClassVar[type[DataMapper[Player, typing.Any]]] = PlayerMapper
+    mapper_class: typing.ClassVar[type[PlayerMapper]] = PlayerMapper
+
+    def __init__(self, collection: AsyncIOMotorCollection, raw_documents: bool = False) -> None:
+        if raw_documents:
+            # RawBSONDocument декодирует поля лишь при обращении к ним.
+            collection = collection.with_options(
+                codec_options=CodecOptions(document_class=RawBSONDocument),
+            )
 
-    def __init__(self, collection: AsyncIOMotorCollection) -> None:
         self._collection = collection
         self._mapper = self.mapper_class()
+        self._projection = dict.fromkeys(self.mapper_class.fields, 1)
 
     async def get_all(self) -> typing.Sequence[Player]:
-        documents = self._collection.find({})
-        players = [self._mapper.model_to_entity(doc) for doc in documents]
+        documents = await self._collection.find({}, self._projection).to_list(None)
+        players = self._mapper.models_to_entities(documents)
         return players
 
     async def get_by_id(self, entity_id: PlayerId) -> typing.Optional[Player]:
-        document = await self._collection.find_one({"_id": entity_id})
+        document = await self._collection.find_one({"_id": entity_id}, self._projection)
         if document is not None:
             player = self._mapper.model_to_entity(document)
             return player
 
+        return None
+
+    async def get_by_ids(self, entity_ids: typing.Iterable[PlayerId]) -> typing.Mapping[PlayerId, Player]:
+        cursor = self._collection.find({"_id": {"$in": list(entity_ids)}}, self._projection)
+        players = self._mapper.models_to_entities(await cursor.to_list(None))
+        return {player.id: player for player in players}
+
     async def insert(self, entity: Player) -> None:
         model = self._mapper.entity_to_model(entity)
         await self._collection.insert_one(model)
@@ -40,7 +74,177 @@ class MongoPlayerRepository(PlayerRepository):
     async def save(self, entity: Player) -> None:
         model = dict(self._mapper.entity_to_model(entity))
         _id = model.pop("_id")
-        await self._collection.update_one({"_id": _id}, model)
+        await self._collection.update_one({"_id": _id}, {"$set": model})
 
     async def delete_by_id(self, entity_id: PlayerId) -> None:
         await self._collection.delete_one({"_id": entity_id})
+
+
+class SqlitePlayerRepository(PlayerRepository):
+    __slots__: typing.Sequence[str] = ("_database", "_mapper",)
+
+    mapper_class: typing.ClassVar[type[DataMapper[Player, typing.Any]]] = SqlitePlayerMapper
+
+    def __init__(self, database: SqliteDatabase) -> None:
+        self._database = database
+        self._mapper = self.mapper_class()
+
+    async def get_all(self) -> typing.Sequence[Player]:
+        rows = await self._database.fetch_all(_SELECT_ALL_PLAYERS)
+        players = self._mapper.models_to_entities(rows)
+        return players
+
+    async def get_by_id(self, entity_id: PlayerId) -> typing.Optional[Player]:
+        row = await self._database.fetch_one(_SELECT_PLAYER, (entity_id,))
+        if row is not None:
+            player = self._mapper.model_to_entity(row)
+            return player
+
+        return None
+
+    async def get_by_ids(self, entity_ids: typing.Iterable[PlayerId]) -> typing.Mapping[PlayerId, Player]:
+        entity_ids = list(entity_ids)
+        players: dict[PlayerId, Player] = {}
+        # Режем на пачки, чтобы не упереться в лимит параметров sqlite.
+        for start in range(0, len(entity_ids), _SQLITE_IN_BATCH_SIZE):
+            batch = entity_ids[start:start + _SQLITE_IN_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(batch))
+            rows = await self._database.fetch_all(
+                f"{_SELECT_ALL_PLAYERS} WHERE id IN ({placeholders})", batch,
+            )
+            players.update((player.id, player) for player in self._mapper.models_to_entities(rows))
+
+        return players
+
+    async def insert(self, entity: Player) -> None:
+        await self._database.execute(_INSERT_PLAYER, self._mapper.entity_to_model(entity))
+
+    async def save(self, entity: Player) -> None:
+        player_id, api_uuid = self._mapper.entity_to_model(entity)
+        updated = await self._database.execute(_UPDATE_PLAYER, (api_uuid, player_id))
+        if not updated:
+            raise KeyError(f"Player {player_id!r} is not stored")
+
+    async def delete_by_id(self, entity_id: PlayerId) -> None:
+        await self._database.execute(_DELETE_PLAYER, (entity_id,))
+
+
+class InMemoryPlayerRepository(PlayerRepository):
+    __slots__: typing.Sequence[str] = (
+        "_models",
+        "_ids_by_api_uuid",
+        "_mapper",
+        "_snapshot_path",
+        "_snapshot_interval",
+        "_last_snapshot",
+        "_snapshot_task",
+        "_dirty",
+    )
+
+    mapper_class: typing.ClassVar[type[DataMapper[Player, typing.Any]]] = PlayerMapper
+
+    def __init__(
+        self, snapshot_path: typing.Optional[str] = None, snapshot_interval: float = 60.0,
+    ) -> None:
+        # Храним модели, а не сами агрегаты, чтобы изменения полученного
+        # агрегата не просачивались в хранилище без `save`.
+        self._models: dict[PlayerId, MongoPlayerModel] = {}
+        self._ids_by_api_uuid: dict[str, PlayerId] = {}
+        self._mapper = self.mapper_class()
+        self._snapshot_path = snapshot_path
+        self._snapshot_interval = snapshot_interval
+        self._last_snapshot = time.monotonic()
+        self._snapshot_task: typing.Optional[asyncio.Task[None]] = None
+        self._dirty = False
+
+        if snapshot_path is not None and os.path.exists(snapshot_path):
+            with open(snapshot_path, encoding="utf-8") as snapshot_file:
+                for model in json.load(snapshot_file):
+                    self._index(model)
+
+    def _index(self, model: MongoPlayerModel) -> None:
+        player_id = PlayerId(model["_id"])
+        previous = self._models.get(player_id)
+        if previous is not None:
+            self._unindex_api_uuid(player_id, previous)
+
+        self._models[player_id] = model
+        self._ids_by_api_uuid[model["api_uuid"]] = player_id
+
+    def _unindex(self, player_id: PlayerId) -> None:
+        model = self._models.pop(player_id, None)
+        if model is not None:
+            self._unindex_api_uuid(player_id, model)
+
+    def _unindex_api_uuid(self, player_id: PlayerId, model: MongoPlayerModel) -> None:
+        # Тот же api_uuid мог быть уже переиндексирован на другого игрока.
+        if self._ids_by_api_uuid.get(model["api_uuid"]) == player_id:
+            del self._ids_by_api_uuid[model["api_uuid"]]
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if (
+            self._snapshot_path is not None
+            and time.monotonic() - self._last_snapshot >= self._snapshot_interval
+            and (self._snapshot_task is None or self._snapshot_task.done())
+        ):
+            self._snapshot_task = asyncio.get_running_loop().create_task(self.snapshot())
+
+    async def get_all(self) -> typing.Sequence[Player]:
+        return self._mapper.models_to_entities(self._models.values())
+
+    async def get_by_id(self, entity_id: PlayerId) -> typing.Optional[Player]:
+        model = self._models.get(entity_id)
+        if model is not None:
+            return self._mapper.model_to_entity(model)
+
+        return None
+
+    async def get_by_ids(self, entity_ids: typing.Iterable[PlayerId]) -> typing.Mapping[PlayerId, Player]:
+        return {
+            entity_id: self._mapper.model_to_entity(model)
+            for entity_id in entity_ids
+            if (model := self._models.get(entity_id)) is not None
+        }
+
+    async def get_by_api_uuid(self, api_uuid: str) -> typing.Optional[Player]:
+        player_id = self._ids_by_api_uuid.get(api_uuid)
+        if player_id is not None:
+            return await self.get_by_id(player_id)
+
+        return None
+
+    async def insert(self, entity: Player) -> None:
+        if entity.id in self._models:
+            raise KeyError(f"Player {entity.id!r} is already stored")
+
+        self._index(self._mapper.entity_to_model(entity))
+        self._mark_dirty()
+
+    async def save(self, entity: Player) -> None:
+        if entity.id not in self._models:
+            raise KeyError(f"Player {entity.id!r} is not stored")
+
+        self._index(self._mapper.entity_to_model(entity))
+        self._mark_dirty()
+
+    async def delete_by_id(self, entity_id: PlayerId) -> None:
+        self._unindex(entity_id)
+        self._mark_dirty()
+
+    async def snapshot(self) -> None:
+        if self._snapshot_path is None or not self._dirty:
+            return
+
+        self._dirty = False
+        self._last_snapshot = time.monotonic()
+        models = list(self._models.values())
+        await asyncio.to_thread(_write_snapshot, self._snapshot_path, models)
+
+
+def _write_snapshot(path: str, models: typing.Sequence[MongoPlayerModel]) -> None:
+    # Пишем во временный файл и подменяем, чтобы не оставить битый снапшот.
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as snapshot_file:
+        json.dump(models, snapshot_file, ensure_ascii=False)
+    os.replace(temp_path, path)
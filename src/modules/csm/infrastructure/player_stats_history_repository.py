@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import typing
+
+from src.modules.csm.domain.player_stats_history import PlayerStatsHistory
+from src.modules.csm.domain.player_stats_history_repository import PlayerStatsHistoryRepository
+from src.seedwork.infrastructure.event_store import EventSourcedRepository
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.infrastructure.event_store import EventStore
+    from src.seedwork.infrastructure.event_store import SnapshotStore
+
+
+class EventSourcedPlayerStatsHistoryRepository(PlayerStatsHistoryRepository):
+    __slots__: typing.Sequence[str] = ("_repository",)
+
+    def __init__(
+        self,
+        event_store: EventStore[PlayerStatsHistory],
+        snapshot_store: typing.Optional[SnapshotStore] = None,
+    ) -> None:
+        self._repository = EventSourcedRepository(event_store, PlayerStatsHistory, snapshot_store)
+
+    async def get(self, nickname: str) -> PlayerStatsHistory:
+        history = await self._repository.get_by_id(PlayerStatsHistory.stream_id(nickname))
+        return history if history is not None else PlayerStatsHistory()
+
+    async def save(self, nickname: str, history: PlayerStatsHistory) -> None:
+        await self._repository.save(PlayerStatsHistory.stream_id(nickname), history)
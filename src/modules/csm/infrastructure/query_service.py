@@ -1,57 +1,163 @@
 from __future__ import annotations
 
+import asyncio
+import time
 import typing
 
 from src.modules.csm.domain.player_id import PlayerId
 from src.modules.csm.domain.player import Player
 from src.modules.csm.application.services.query_service import PlayerQueryService
 from src.modules.csm.application.models.player_read_model import PlayerReadModel
+from src.modules.csm.application.commands.record_player_stats import PLAYER_STATS_REFRESH_INTERVAL
+from src.modules.csm.infrastructure.player_projection import PlayerReadModelProjection
 
 if typing.TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
     from src.modules.csm.domain.player_repository import PlayerRepository
     from src.modules.csm.application.services.http_service import AsyncHttpService
+    from src.modules.csm.application.services.rating_service import PlayerRatingService
+
+
+def _discard_tasks(tasks: typing.Iterable[asyncio.Future[typing.Any]]) -> None:
+    for task in tasks:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            # Помечаем исключение проигравшей задачи как обработанное.
+            task.exception()
+
 
+class PlayerQueryServiceImpl(PlayerQueryService):
+    """Сервис статистики игроков.
 
-class MongoPlayerQueryService(PlayerQueryService):
-    __slots__: typing.Sequence[str] = ("_repository", "_http_service",)
+    Если передана коллекция `PlayerReadModelProjection`, статистика,
+    записанная не раньше `PLAYER_STATS_REFRESH_INTERVAL` секунд назад,
+    читается из неё, а не запрашивается у сервера.
+    """
 
-    def __init__(self, repository: PlayerRepository, http_service: AsyncHttpService) -> None:
+    __slots__: typing.Sequence[str] = ("_repository", "_http_service", "_rating_service", "_read_models",)
+
+    def __init__(
+        self,
+        repository: PlayerRepository,
+        http_service: AsyncHttpService,
+        rating_service: PlayerRatingService,
+        read_models: typing.Optional[AsyncIOMotorCollection] = None,
+    ) -> None:
         self._repository = repository
         self._http_service = http_service
+        self._rating_service = rating_service
+        self._read_models = read_models
 
-    def _aggregate_from_read_model(self, read_model: PlayerReadModel) -> Player:
-        player = Player(
-            id=PlayerId(read_model.nickname),
-            api_uuid=read_model.api_uuid,
-        )
-        return player
+    async def _get_recorded_player(self, nickname: str) -> typing.Optional[PlayerReadModel]:
+        if self._read_models is None:
+            return None
+
+        document = await self._read_models.find_one({
+            "_id": nickname, "recorded_at": {"$gt": time.time() - PLAYER_STATS_REFRESH_INTERVAL},
+        })
+        return None if document is None else PlayerReadModelProjection.to_read_model(document)
+
+    async def _resolve_api_uuid(
+        self,
+        stored_task: asyncio.Future[typing.Optional[Player]],
+        scraped_task: asyncio.Future[str],
+    ) -> str:
+        # Первый известный uuid выигрывает: либо сохранённый в бд,
+        # либо полученный со страницы профиля.
+        pending: set[asyncio.Future[typing.Any]] = {stored_task, scraped_task}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            if stored_task in done and (player := stored_task.result()) is not None:
+                return player.api_uuid
+
+            if scraped_task in done and scraped_task.exception() is None:
+                return scraped_task.result()
+
+        # Игрока нет в бд, а скрапинг упал - пробрасываем ошибку скрапинга.
+        return scraped_task.result()
 
     async def get_player(self, nickname: str) -> PlayerReadModel:
-        player = await self._repository.get_by_id(PlayerId(nickname))
-        if player is None:
-            player_api_uuid = await self._http_service.request_player_api_uuid(nickname)
-            player_stats = await self._http_service.request_player_stats(
-                nickname, player_api_id=player_api_uuid,
-            )
-            player_read_model = PlayerReadModel(
-                nickname=nickname,
-                api_uuid=player_api_uuid,
-                stats=player_stats,
-            )
+        # Read model читается конкурентно с поиском uuid: промах не
+        # добавляет к ответу ещё один последовательный запрос в бд.
+        recorded_task = asyncio.ensure_future(self._get_recorded_player(nickname))
+        stored_task = asyncio.ensure_future(self._repository.get_by_id(PlayerId(nickname)))
+        scraped_task = asyncio.ensure_future(self._http_service.request_player_api_uuid(nickname))
+        resolve_task = asyncio.ensure_future(self._resolve_api_uuid(stored_task, scraped_task))
+        tasks: list[asyncio.Future[typing.Any]] = [recorded_task, stored_task, scraped_task, resolve_task]
+        try:
+            await asyncio.wait((recorded_task, resolve_task), return_when=asyncio.FIRST_COMPLETED)
+            if recorded_task.done() and (recorded := recorded_task.result()) is not None:
+                return recorded
 
-            await self._repository.insert(
-                self._aggregate_from_read_model(player_read_model)
+            player_api_uuid = await resolve_task
+            stats_task = asyncio.ensure_future(
+                self._http_service.request_player_stats(nickname, player_api_id=player_api_uuid)
             )
-            return player_read_model
+            tasks.append(stats_task)
+            if (recorded := await recorded_task) is not None:
+                return recorded
 
-        player_stats = await self._http_service.request_player_stats(
-            nickname, player_api_id=player.api_uuid,
-        )
-        player.set_stats(player_stats)
+            player = await stored_task
+            if player is not None:
+                scraped_task.cancel()
+                player_api_uuid = player.api_uuid
 
-        player_read_model = PlayerReadModel(
+            player_stats = await stats_task
+        finally:
+            _discard_tasks(tasks)
+
+        self._rating_service.observe(player_stats)
+        # Новых игроков сохраняет фоновая команда `RecordPlayerStats`.
+        return PlayerReadModel(
             nickname=nickname,
-            api_uuid=player.api_uuid,
-            stats=player.stats,
+            api_uuid=player_api_uuid,
+            stats=player_stats,
         )
-        return player_read_model
+
+    async def get_players(
+        self, nicknames: typing.Sequence[str], concurrency: int,
+    ) -> typing.Mapping[str, typing.Union[PlayerReadModel, Exception]]:
+        stored_players = await self._repository.get_by_ids(PlayerId(nickname) for nickname in nicknames)
+        player_api_uuids = {
+            nickname: player.api_uuid
+            for nickname in nicknames
+            if (player := stored_players.get(PlayerId(nickname))) is not None
+        }
+        misses = [nickname for nickname in nicknames if nickname not in player_api_uuids]
+
+        # Профили без сохранённого uuid приходится скрапить по одному,
+        # поэтому ограничиваем число одновременных запросов.
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def scrape(nickname: str) -> str:
+            async with semaphore:
+                return await self._http_service.request_player_api_uuid(nickname)
+
+        results: dict[str, typing.Union[PlayerReadModel, Exception]] = {}
+        scraped = await asyncio.gather(*(scrape(nickname) for nickname in misses), return_exceptions=True)
+        for nickname, api_uuid in zip(misses, scraped):
+            if isinstance(api_uuid, Exception):
+                results[nickname] = api_uuid
+            elif isinstance(api_uuid, BaseException):
+                raise api_uuid
+            else:
+                player_api_uuids[nickname] = api_uuid
+
+        players_stats = await self._http_service.request_players_stats(player_api_uuids)
+        for nickname, api_uuid in player_api_uuids.items():
+            player_stats = players_stats[nickname]
+            if isinstance(player_stats, Exception):
+                results[nickname] = player_stats
+                continue
+
+            self._rating_service.observe(player_stats)
+            player_read_model = PlayerReadModel(
+                nickname=nickname,
+                api_uuid=api_uuid,
+                stats=player_stats,
+            )
+            results[nickname] = player_read_model
+
+        return {nickname: results[nickname] for nickname in nicknames}
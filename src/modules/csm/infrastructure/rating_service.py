@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import json
+import logging
+import time
+import typing
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from src.seedwork.quantile_sketch import TDigest
+from src.modules.csm.application.services.rating_service import PlayerRatingService
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.infrastructure.sqlite import SqliteDatabase
+    from src.modules.csm.domain.player_stats import PlayerStats
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+RATING_METRICS: typing.Mapping[str, typing.Callable[[PlayerStats], int]] = {
+    "csc_rating": lambda stats: stats.csc_stats.rating,
+    "csc_wins": lambda stats: stats.csc_stats.wins,
+    "csc_games_played": lambda stats: stats.csc_stats.games_played,
+    "csc_player_kills": lambda stats: stats.csc_stats.player_kills,
+    "events_wins": lambda stats: stats.events_stats.wins,
+    "events_kills": lambda stats: stats.events_stats.kills,
+}
+
+SQLITE_RATING_SCHEMA: typing.Sequence[str] = (
+    "CREATE TABLE IF NOT EXISTS rating_sketches (metric TEXT PRIMARY KEY, sketch TEXT NOT NULL)",
+)
+
+_SELECT_SKETCHES = "SELECT metric, sketch FROM rating_sketches"
+_UPSERT_SKETCH = (
+    "INSERT INTO rating_sketches (metric, sketch) VALUES (?, ?) "
+    "ON CONFLICT (metric) DO UPDATE SET sketch = excluded.sketch"
+)
+
+
+class SketchPlayerRatingService(PlayerRatingService, abc.ABC):
+    __slots__: typing.Sequence[str] = (
+        "_sketches",
+        "_flush_interval",
+        "_last_flush",
+        "_flush_task",
+        "_dirty",
+    )
+
+    def __init__(self, flush_interval: float = 60.0) -> None:
+        self._sketches = {metric: TDigest() for metric in RATING_METRICS}
+        self._flush_interval = flush_interval
+        self._last_flush = time.monotonic()
+        self._flush_task: typing.Optional[asyncio.Task[None]] = None
+        self._dirty = False
+
+    @abc.abstractmethod
+    async def _read_sketches(self) -> typing.Mapping[str, typing.Mapping[str, typing.Any]]:
+        ...
+
+    @abc.abstractmethod
+    async def _write_sketches(self, sketches: typing.Mapping[str, typing.Mapping[str, typing.Any]]) -> None:
+        ...
+
+    def observe(self, stats: PlayerStats) -> None:
+        for metric, getter in RATING_METRICS.items():
+            self._sketches[metric].update(getter(stats))
+
+        self._dirty = True
+        if (
+            time.monotonic() - self._last_flush >= self._flush_interval
+            and (self._flush_task is None or self._flush_task.done())
+        ):
+            self._flush_task = asyncio.get_running_loop().create_task(self._flush_in_background())
+
+    def top_percent(self, stats: PlayerStats) -> typing.Mapping[str, float]:
+        percents = {}
+        for metric, getter in RATING_METRICS.items():
+            sketch = self._sketches[metric]
+            if sketch.count:
+                percents[metric] = round((1 - sketch.cdf(getter(stats))) * 100, 1)
+
+        return percents
+
+    async def load(self) -> None:
+        # Значения, учтённые до загрузки, не теряются: скетчи просто сливаются.
+        for metric, raw_sketch in (await self._read_sketches()).items():
+            if metric not in self._sketches:
+                continue
+
+            stored = TDigest.from_dict(raw_sketch)
+            stored.merge(self._sketches[metric])
+            self._sketches[metric] = stored
+
+    async def flush(self) -> None:
+        if not self._dirty:
+            return
+
+        sketches = {metric: sketch.as_dict() for metric, sketch in self._sketches.items()}
+        # Флаг снимаем до записи, чтобы не потерять наблюдения, пришедшие
+        # во время неё, и возвращаем, если запись не удалась.
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        try:
+            await self._write_sketches(sketches)
+        except BaseException:
+            self._dirty = True
+            raise
+
+    async def _flush_in_background(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            _LOGGER.exception("Failed to flush rating sketches, will retry")
+
+
+class MongoPlayerRatingService(SketchPlayerRatingService):
+    __slots__: typing.Sequence[str] = ("_collection",)
+
+    def __init__(self, collection: AsyncIOMotorCollection, flush_interval: float = 60.0) -> None:
+        super().__init__(flush_interval)
+        self._collection = collection
+
+    async def _read_sketches(self) -> typing.Mapping[str, typing.Mapping[str, typing.Any]]:
+        documents = self._collection.find({"_id": {"$in": list(RATING_METRICS)}})
+        return {document["_id"]: document["sketch"] async for document in documents}
+
+    async def _write_sketches(self, sketches: typing.Mapping[str, typing.Mapping[str, typing.Any]]) -> None:
+        for metric, sketch in sketches.items():
+            await self._collection.replace_one({"_id": metric}, {"sketch": sketch}, upsert=True)
+
+
+class SqlitePlayerRatingService(SketchPlayerRatingService):
+    __slots__: typing.Sequence[str] = ("_database",)
+
+    def __init__(self, database: SqliteDatabase, flush_interval: float = 60.0) -> None:
+        super().__init__(flush_interval)
+        self._database = database
+
+    async def _read_sketches(self) -> typing.Mapping[str, typing.Mapping[str, typing.Any]]:
+        rows = await self._database.fetch_all(_SELECT_SKETCHES)
+        return {metric: json.loads(sketch) for metric, sketch in rows}
+
+    async def _write_sketches(self, sketches: typing.Mapping[str, typing.Mapping[str, typing.Any]]) -> None:
+        await asyncio.gather(*(
+            self._database.execute(_UPSERT_SKETCH, (metric, json.dumps(sketch)))
+            for metric, sketch in sketches.items()
+        ))
+
+
+class InMemoryPlayerRatingService(SketchPlayerRatingService):
+    __slots__: typing.Sequence[str] = ("_stored",)
+
+    def __init__(self, flush_interval: float = 60.0) -> None:
+        super().__init__(flush_interval)
+        self._stored: dict[str, typing.Mapping[str, typing.Any]] = {}
+
+    async def _read_sketches(self) -> typing.Mapping[str, typing.Mapping[str, typing.Any]]:
+        return self._stored
+
+    async def _write_sketches(self, sketches: typing.Mapping[str, typing.Mapping[str, typing.Any]]) -> None:
+        self._stored = dict(sketches)
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import hashlib
+import typing
+
+from src.modules.csm.application.services.http_service import AsyncHttpService
+from src.modules.csm.domain.csc import CscStatistic
+from src.modules.csm.domain.events import EventsStatistic
+from src.modules.csm.domain.player_stats import PlayerStats
+
+
+class StubCristalixService(AsyncHttpService):
+    # Детерминированная замена HttpxCristalixService для бенчмарков и
+    # локальных запусков: отвечает без сети, одинаково для одного ника.
+    __slots__: typing.Sequence[str] = ()
+
+    async def request_player_api_uuid(self, player_nickname: str) -> str:
+        return hashlib.md5(player_nickname.lower().encode()).hexdigest()
+
+    async def request_player_stats(
+        self, player_nickname: str, player_api_id: typing.Optional[str] = None,
+    ) -> PlayerStats:
+        if player_api_id is None:
+            player_api_id = await self.request_player_api_uuid(player_nickname)
+
+        seed = int(player_api_id[:8], 16)
+        return PlayerStats(
+            csc_stats=CscStatistic(
+                wins=seed % 500 + 1,
+                waves=seed % 3000,
+                player_kills=seed % 2000,
+                time_played=seed % 360_000,
+                mob_kills=seed % 10_000,
+                games_played=seed % 1000 + 2,
+                rating=seed % 2500,
+                duel_losses=seed % 100 + 1,
+                duel_wins=seed % 150,
+                losses=seed % 400 + 1,
+                deaths=seed % 1500 + 1,
+            ),
+            events_stats=EventsStatistic(
+                wins=seed % 50,
+                kills=seed % 700,
+                games=seed % 200 + 51,
+                deaths=seed % 600 + 1,
+            ),
+        )
@@ -15,7 +15,7 @@ class Route:
     method: str
     path_template: str
 
-    def compile(self, **kwargs):
+    def compile(self, **kwargs: typing.Any) -> CompiledRoute:
         return CompiledRoute(
             route=self,
             compiled_path=self.path_template.format_map(kwargs),
@@ -28,7 +28,7 @@ class CompiledRoute:
     compiled_path: str
 
     @property
-    def method(self):
+    def method(self) -> str:
         return self.route.method
 
     def create_url(self, base_url: str) -> str:
@@ -0,0 +1,136 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Контроль допуска поисковых запросов при перегрузке."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = (
+    "AdmissionLimit",
+    "AdmissionRejectedError",
+    "AdmissionController",
+)
+
+import dataclasses
+import typing
+
+from src.seedwork.bulkhead import Bulkhead
+from src.seedwork.bulkhead import BulkheadFullError
+from src.seedwork.deadline import remaining_timeout
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_handler import QueryResult
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.application.module import TransactionContext
+    from src.seedwork.application.middleware import CallNext
+
+
+class AdmissionRejectedError(Exception):
+    """Запрос отклонён, т.к. не может быть выполнен вовремя."""
+
+
+@dataclasses.dataclass(frozen=True)
+class AdmissionLimit:
+    """Ограничения для одного типа поисковых запросов."""
+
+    max_concurrency: int
+    """Максимальное количество одновременно выполняющихся запросов."""
+
+    max_queue: int
+    """Максимальное количество запросов, ожидающих выполнения."""
+
+
+class AdmissionController:
+    """Мидлварь, ограничивающая конкурентность поисковых запросов по типам.
+
+    Запрос отклоняется сразу, если ожидание в очереди вместе со средним
+    временем выполнения не укладывается в дедлайн, либо если очередь
+    заполнена. Отклонённый запрос (а также запрос, упёршийся в bulkhead
+    одной из зависимостей) возвращает `QueryResult.failure` с
+    `AdmissionRejectedError`, а не исключение.
+
+    Parameters
+    ----------
+    deadline : Optional[float]
+        Время в секундах, за которое запрос должен быть выполнен. Если
+        у транзакции есть более ранний дедлайн, используется он. None -
+        время ожидания ограничивает только дедлайн транзакции.
+    default_limit : Optional[AdmissionLimit]
+        Ограничения для типов запросов, не указанных в `limits`.
+        None - такие запросы не ограничиваются.
+    limits : Optional[Mapping[type[Query], AdmissionLimit]]
+        Ограничения для конкретных типов запросов.
+    """
+
+    __slots__: typing.Sequence[str] = ("_deadline", "_default_limit", "_limits", "_bulkheads", "_rejected")
+
+    def __init__(
+        self,
+        deadline: typing.Optional[float],
+        default_limit: typing.Optional[AdmissionLimit] = None,
+        limits: typing.Optional[typing.Mapping[type[Query], AdmissionLimit]] = None,
+    ) -> None:
+        self._deadline = deadline
+        self._default_limit = default_limit
+        self._limits = dict(limits or {})
+        self._bulkheads: dict[type[Query], typing.Optional[Bulkhead]] = {}
+        self._rejected = 0
+
+    @property
+    def rejected(self) -> int:
+        """Количество отклонённых запросов."""
+        return self._rejected
+
+    def get_bulkhead(self, query_cls: type[Query]) -> typing.Optional[Bulkhead]:
+        """Возвращает bulkhead указанного типа запросов."""
+        try:
+            return self._bulkheads[query_cls]
+        except KeyError:
+            pass
+
+        limit = self._limits.get(query_cls, self._default_limit)
+        bulkhead = None
+        if limit is not None:
+            bulkhead = Bulkhead(limit.max_concurrency, limit.max_queue)
+
+        self._bulkheads[query_cls] = bulkhead
+        return bulkhead
+
+    async def __call__(
+        self,
+        ctx: TransactionContext,
+        task: typing.Any,
+        handler: typing.Callable[..., typing.Any],
+        call_next: CallNext,
+    ) -> typing.Any:
+        if not isinstance(task, Query):
+            return await call_next()
+
+        bulkhead = self.get_bulkhead(type(task))
+        try:
+            if bulkhead is None:
+                return await call_next()
+
+            # Оставляем в дедлайне время на само выполнение запроса.
+            budget = remaining_timeout(self._deadline)
+            max_wait = None if budget is None else max(budget - bulkhead.average_hold, 0.0)
+            async with bulkhead.hold(max_wait):
+                return await call_next()
+
+        except BulkheadFullError as exc:
+            self._rejected += 1
+            rejected = AdmissionRejectedError("Бот перегружен")
+            rejected.__cause__ = exc
+            return QueryResult.failure(
+                "Слишком много запросов, попробуйте повторить через несколько секунд.",
+                exception=rejected,
+            )
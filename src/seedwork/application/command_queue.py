@@ -0,0 +1,320 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Фоновое выполнение команд пулом воркеров."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = (
+    "QueuedCommand",
+    "CommandStore",
+    "CommandQueueFullError",
+    "CommandWorkerPool",
+)
+
+import abc
+import asyncio
+import collections
+import dataclasses
+import logging
+import random
+import typing
+import uuid
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.application.command import Command
+    from src.seedwork.application.module import Application
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+
+class CommandQueueFullError(RuntimeError):
+    """Возбуждается в случае, если очередь команд заполнена."""
+
+
+@dataclasses.dataclass
+class QueuedCommand:
+    """Команда, ожидающая фонового выполнения."""
+
+    command: Command
+    """Команда, которую нужно выполнить."""
+
+    idempotency_key: str
+    """Ключ, по которому отбрасываются повторные постановки команды."""
+
+    attempts: int = dataclasses.field(default=0)
+    """Количество неудачных попыток выполнения."""
+
+
+class CommandStore(abc.ABC):
+    """Хранилище, обеспечивающее доставку команд хотя бы один раз.
+
+    Команда сохраняется до постановки в очередь и отмечается выполненной
+    только после успешного выполнения, поэтому после перезапуска
+    невыполненные команды будут выполнены повторно.
+    """
+
+    __slots__: typing.Sequence[str] = ()
+
+    @abc.abstractmethod
+    async def add(self, queued: QueuedCommand) -> bool:
+        """Сохраняет команду. Вернёт False, если команда с таким ключом
+        идемпотентности уже сохранялась.
+        """
+
+    @abc.abstractmethod
+    async def pending(self) -> typing.Sequence[QueuedCommand]:
+        """Возвращает все невыполненные команды."""
+
+    @abc.abstractmethod
+    async def complete(self, idempotency_key: str) -> None:
+        """Отмечает команду выполненной."""
+
+    @abc.abstractmethod
+    async def reschedule(self, idempotency_key: str, attempts: int) -> None:
+        """Сохраняет количество неудачных попыток выполнения команды."""
+
+    @abc.abstractmethod
+    async def fail(self, idempotency_key: str, error: str) -> None:
+        """Отмечает команду окончательно не выполненной."""
+
+
+class CommandWorkerPool:
+    """Пул воркеров, выполняющих команды приложения в фоне.
+
+    Команды выполняются через `Application.execute_command`. Исключение
+    при выполнении приводит к повторной попытке с экспоненциальной
+    задержкой, а результат с ошибками считается окончательным: повтор
+    не изменит бизнес-ошибку.
+
+    Parameters
+    ----------
+    application : Application
+        Приложение, команды которого будут выполняться.
+    workers : int
+        Количество воркеров.
+    max_queue : int
+        Максимальное количество команд в очереди в памяти.
+    store : Optional[CommandStore]
+        Хранилище для доставки хотя бы один раз. Без него команды,
+        не выполненные до остановки, теряются.
+    max_attempts : int
+        Максимальное количество попыток выполнения команды.
+    base_delay : float
+        Задержка перед первой повторной попыткой в секундах.
+    max_delay : float
+        Максимальная задержка между попытками в секундах.
+    recent_keys : int
+        Сколько последних ключей идемпотентности помнить в памяти.
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_application",
+        "_workers",
+        "_store",
+        "_max_attempts",
+        "_base_delay",
+        "_max_delay",
+        "_queue",
+        "_worker_tasks",
+        "_retry_tasks",
+        "_recent_keys",
+        "_recent_keys_limit",
+        "_metrics",
+    )
+
+    def __init__(
+        self,
+        application: Application,
+        workers: int = 4,
+        max_queue: int = 1024,
+        store: typing.Optional[CommandStore] = None,
+        max_attempts: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        recent_keys: int = 10_000,
+    ) -> None:
+        if workers <= 0:
+            raise ValueError("Worker count must be positive")
+
+        self._application = application
+        self._workers = workers
+        self._store = store
+        self._max_attempts = max_attempts
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+        self._queue: asyncio.Queue[QueuedCommand] = asyncio.Queue(max_queue)
+        self._worker_tasks: list[asyncio.Task[None]] = []
+        self._retry_tasks: set[asyncio.Task[None]] = set()
+        self._recent_keys: collections.OrderedDict[str, None] = collections.OrderedDict()
+        self._recent_keys_limit = recent_keys
+        self._metrics: collections.Counter[str] = collections.Counter()
+
+    @property
+    def running(self) -> bool:
+        """Вернёт True, если воркеры запущены."""
+        return bool(self._worker_tasks)
+
+    async def start(self) -> None:
+        """Запускает воркеры и ставит в очередь невыполненные команды
+        из хранилища.
+        """
+        if self.running:
+            return
+
+        # Воркеры запускаются первыми: невыполненных команд может быть
+        # больше, чем помещается в очередь.
+        self._worker_tasks = [
+            asyncio.create_task(self._work(), name=f"command-worker-{index}")
+            for index in range(self._workers)
+        ]
+        if self._store is not None:
+            for queued in await self._store.pending():
+                self._remember(queued.idempotency_key)
+                await self._queue.put(queued)
+
+    async def stop(self, drain_timeout: typing.Optional[float] = None) -> None:
+        """Останавливает воркеры.
+
+        Parameters
+        ----------
+        drain_timeout : Optional[float]
+            Сколько секунд ждать выполнения уже поставленных команд.
+            None - не ждать. Команды, ожидающие повторной попытки, не
+            дожидаются: с хранилищем они будут выполнены после запуска.
+        """
+        if drain_timeout is not None and self.running:
+            try:
+                await asyncio.wait_for(self._queue.join(), drain_timeout)
+            except asyncio.TimeoutError:
+                _LOGGER.warning("Command queue was not drained, %d left", self._queue.qsize())
+
+        tasks = [*self._worker_tasks, *self._retry_tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._retry_tasks.clear()
+
+    async def enqueue(self, command: Command, idempotency_key: typing.Optional[str] = None) -> bool:
+        """Ставит команду в очередь на фоновое выполнение.
+
+        Parameters
+        ----------
+        command : Command
+            Команда, которую нужно выполнить.
+        idempotency_key : Optional[str]
+            Ключ идемпотентности. Повторная постановка команды с тем же
+            ключом игнорируется. Если не указан, генерируется случайный.
+
+        Raises
+        ------
+        CommandQueueFullError
+            Возбуждается в случае, если очередь заполнена.
+
+        Returns
+        -------
+        bool
+            False, если команда с таким ключом уже ставилась в очередь.
+        """
+        if idempotency_key is None:
+            idempotency_key = uuid.uuid4().hex
+        elif idempotency_key in self._recent_keys:
+            self._metrics["duplicates"] += 1
+            return False
+
+        if self._queue.full():
+            self._metrics["rejected"] += 1
+            raise CommandQueueFullError(f"Command queue is full ({self._queue.maxsize} commands)")
+
+        queued = QueuedCommand(command, idempotency_key)
+        if self._store is not None and not await self._store.add(queued):
+            self._remember(idempotency_key)
+            self._metrics["duplicates"] += 1
+            return False
+
+        self._remember(idempotency_key)
+        # Место могло закончиться, пока команда сохранялась; она уже в
+        # хранилище, поэтому ждём места, а не теряем её.
+        await self._queue.put(queued)
+        self._metrics["enqueued"] += 1
+        return True
+
+    def as_dict(self) -> dict[str, int]:
+        """Экспортирует метрики пула."""
+        return {
+            "enqueued": self._metrics["enqueued"],
+            "duplicates": self._metrics["duplicates"],
+            "rejected": self._metrics["rejected"],
+            "completed": self._metrics["completed"],
+            "completed_with_errors": self._metrics["completed_with_errors"],
+            "retried": self._metrics["retried"],
+            "failed": self._metrics["failed"],
+            "queued": self._queue.qsize(),
+            "retrying": len(self._retry_tasks),
+        }
+
+    def _remember(self, idempotency_key: str) -> None:
+        self._recent_keys[idempotency_key] = None
+        self._recent_keys.move_to_end(idempotency_key)
+        if len(self._recent_keys) > self._recent_keys_limit:
+            self._recent_keys.popitem(last=False)
+
+    async def _work(self) -> None:
+        while True:
+            queued = await self._queue.get()
+            try:
+                await self._execute(queued)
+            except Exception:
+                # Ошибка хранилища не должна останавливать воркер.
+                _LOGGER.exception("Failed to process background command %r", queued.command)
+            finally:
+                self._queue.task_done()
+
+    async def _execute(self, queued: QueuedCommand) -> None:
+        try:
+            result = await self._application.execute_command(queued.command)
+        except Exception as exc:
+            await self._retry(queued, exc)
+            return
+
+        if result.has_errors():
+            self._metrics["completed_with_errors"] += 1
+            _LOGGER.warning("Background command %r completed with errors: %s", queued.command, result.errors)
+        else:
+            self._metrics["completed"] += 1
+
+        if self._store is not None:
+            await self._store.complete(queued.idempotency_key)
+
+    async def _retry(self, queued: QueuedCommand, exc: Exception) -> None:
+        queued.attempts += 1
+        if queued.attempts >= self._max_attempts:
+            self._metrics["failed"] += 1
+            _LOGGER.error("Background command %r failed", queued.command, exc_info=exc)
+            if self._store is not None:
+                await self._store.fail(queued.idempotency_key, repr(exc))
+            return
+
+        self._metrics["retried"] += 1
+        if self._store is not None:
+            await self._store.reschedule(queued.idempotency_key, queued.attempts)
+
+        # Джиттер, чтобы повторы упавших вместе команд не совпадали.
+        delay = min(self._max_delay, self._base_delay * 2 ** (queued.attempts - 1))
+        task = asyncio.create_task(self._requeue_later(queued, random.uniform(delay / 2, delay)))
+        self._retry_tasks.add(task)
+        task.add_done_callback(self._retry_tasks.discard)
+
+    async def _requeue_later(self, queued: QueuedCommand, delay: float) -> None:
+        await asyncio.sleep(delay)
+        await self._queue.put(queued)
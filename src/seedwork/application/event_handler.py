@@ -36,10 +36,11 @@ if typing.TYPE_CHECKING:
 EventHandlerType: typing.TypeAlias = typing.Callable[..., typing.Awaitable["EventResult"]]
 
 
-@dataclasses.dataclass(frozen=True)
 class EventId(EntityId):
     """Айди определённого события."""
 
+    __slots__: typing.Sequence[str] = ()
+
 
 @dataclasses.dataclass
 class EventResult:
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import abc
+import dataclasses
+import enum
 import inspect
 import typing
 
@@ -9,6 +11,113 @@ from src.seedwork import metaprogramming
 _KeyT = typing.TypeVar("_KeyT")
 _ValueT = typing.TypeVar("_ValueT")
 
+_MISSING: typing.Final[typing.Any] = object()
+
+
+@dataclasses.dataclass(frozen=True)
+class InjectionPlan:
+    """Заранее вычисленные параметры обработчика, которые нужно внедрить.
+
+    Позволяет не разбирать сигнатуру обработчика при каждом вызове.
+    """
+
+    handler: typing.Callable[..., typing.Any]
+    """Обработчик, для которого составлен план."""
+
+    parameters: tuple[tuple[str, typing.Any], ...]
+    """Пары из названия параметра и его типа (без первого аргумента)."""
+
+    @classmethod
+    def from_callable(cls, callable_: typing.Callable[..., typing.Any]) -> InjectionPlan:
+        """Составляет план внедрения по аннотациям вызываемого обьекта.
+
+        Parameters
+        ----------
+        callable_ : Callable[..., Any]
+            Обработчик, первый аргумент которого (команда, запрос или
+            событие) не внедряется.
+        """
+        type_hints = metaprogramming.get_type_hints(callable_, pop_first=True)
+        return cls(handler=callable_, parameters=tuple(type_hints.items()))
+
+
+class Lifetime(enum.Enum):
+    """Время жизни зависимости."""
+
+    SINGLETON = enum.auto()
+    """Один инстанс на всё приложение."""
+
+    SCOPED = enum.auto()
+    """Один инстанс на транзакционный контекст, освобождается при выходе из него."""
+
+    TRANSIENT = enum.auto()
+    """Новый инстанс при каждом получении."""
+
+
+class DependencyScope:
+    """Зависимости, живущие в рамках одного транзакционного контекста.
+
+    Parameters
+    ----------
+    finalizers : Sequence[Callable[[], None]]
+        Колбэки, которые будут вызваны при освобождении скоупа.
+    """
+
+    __slots__: typing.Sequence[str] = ("_instances", "_finalizers")
+
+    def __init__(self, finalizers: typing.Sequence[typing.Callable[[], None]] = ()) -> None:
+        self._instances: dict[typing.Any, typing.Any] = {}
+        self._finalizers = finalizers
+
+    def get(self, identifier: typing.Any, default: typing.Any = None) -> typing.Any:
+        """Возвращает уже созданную в скоупе зависимость."""
+        return self._instances.get(identifier, default)
+
+    def add(self, identifier: typing.Any, instance: typing.Any) -> None:
+        """Добавляет созданную зависимость в скоуп."""
+        self._instances[identifier] = instance
+
+    def dispose(self) -> list[typing.Awaitable[typing.Any]]:
+        """Освобождает зависимости скоупа в порядке, обратном созданию.
+
+        У зависимостей вызывается метод `close`, если он есть.
+
+        Returns
+        -------
+        list[Awaitable[Any]]
+            Результаты асинхронных `close`, которые нужно дождаться.
+        """
+        pending = []
+        for instance in reversed(list(self._instances.values())):
+            close = getattr(instance, "close", None)
+            if callable(close):
+                result = close()
+                if inspect.isawaitable(result):
+                    pending.append(result)
+
+        self._instances.clear()
+        for finalizer in self._finalizers:
+            finalizer()
+
+        return pending
+
+
+class DependencyResolutionError(LookupError):
+    """Возбуждается в случае, если зависимости обработчиков не могут
+    быть получены.
+
+    Parameters
+    ----------
+    problems : Sequence[str]
+        Описание каждой из неразрешённых зависимостей.
+    """
+
+    __slots__: typing.Sequence[str] = ("problems",)
+
+    def __init__(self, problems: typing.Sequence[str]) -> None:
+        self.problems = problems
+        super().__init__("Unresolvable dependencies:\n" + "\n".join(problems))
+
 
 class DependencyProvider(abc.ABC, typing.Generic[_KeyT, _ValueT]):
     """Интерфейс для менеджмента зависимостями."""
@@ -50,17 +159,29 @@ class DependencyProvider(abc.ABC, typing.Generic[_KeyT, _ValueT]):
         """
         ...
 
-    def _resolve_arguments(
-        self, callable_parameters: typing.Mapping[str, typing.Any],
-    ) -> typing.MutableMapping[str, typing.Any]:
-        kwargs = {}
-        for param_name, param_type in callable_parameters.items():
-            if param_type is inspect.Parameter.empty:
-                raise KeyError(f"No type hints found for param {param_type!r}.")
+    def has_dependency(self, identifier: _KeyT) -> bool:
+        """Проверяет, может ли зависимость быть получена по ключу.
+
+        Реализация по умолчанию пробует получить зависимость, менеджеры
+        зависимостей могут переопределить её без создания инстанса.
+        """
+        try:
+            self.get_dependency(identifier)
+        except KeyError:
+            return False
+
+        return True
 
-            kwargs[param_name] = self.get_dependency(param_type)  # KeyError
+    def get_lifetime(self, identifier: _KeyT) -> Lifetime:
+        """Возвращает время жизни зависимости, получаемой по ключу.
 
-        return kwargs
+        По умолчанию все зависимости считаются `Lifetime.TRANSIENT`.
+        """
+        return Lifetime.TRANSIENT
+
+    def create_scope(self) -> DependencyScope:
+        """Создаёт скоуп для зависимостей с временем жизни `Lifetime.SCOPED`."""
+        return DependencyScope()
 
     def dependencies_from_callable(
         self, callable_: typing.Callable[..., typing.Any], **overrides: typing.Any,
@@ -80,8 +201,71 @@ class DependencyProvider(abc.ABC, typing.Generic[_KeyT, _ValueT]):
         Mapping[str, Any]
             Полученные зависимости вызываемого обьекта.
         """
-        handler_type_hints = metaprogramming.get_type_hints(callable_, pop_first=True)
-        dependencies = self._resolve_arguments(handler_type_hints)
-        dependencies.update(**overrides)
+        return self.dependencies_from_plan(InjectionPlan.from_callable(callable_), **overrides)
+
+    def dependencies_from_plan(
+        self,
+        plan: InjectionPlan,
+        scope: typing.Optional[DependencyScope] = None,
+        **overrides: typing.Any,
+    ) -> typing.Mapping[str, typing.Any]:
+        """Получает зависимости обработчика по заранее составленному плану.
+
+        Parameters
+        ----------
+        plan : InjectionPlan
+            План внедрения зависимостей обработчика.
+        scope : Optional[DependencyScope]
+            Скоуп транзакционного контекста. Если указан, зависимости
+            с временем жизни `Lifetime.SCOPED` берутся из него.
+        overrides : Any
+            Переопределение старых/определение новых зависимостей для
+            получения зависимостей обработчика.
+
+        Returns
+        -------
+        Mapping[str, Any]
+            Полученные зависимости обработчика.
+        """
+        dependencies = {}
+        for param_name, param_type in plan.parameters:
+            if param_name in overrides:
+                continue
+            if param_type is inspect.Parameter.empty:
+                raise KeyError(f"No type hints found for param {param_name!r}.")
+
+            if scope is not None and self.get_lifetime(param_type) is Lifetime.SCOPED:
+                instance = scope.get(param_type, _MISSING)
+                if instance is _MISSING:
+                    instance = self.get_dependency(param_type)  # KeyError
+                    scope.add(param_type, instance)
+                dependencies[param_name] = instance
+            else:
+                dependencies[param_name] = self.get_dependency(param_type)  # KeyError
+
+        dependencies.update(overrides)
         return dependencies
 
+    def validate_plan(
+        self, plan: InjectionPlan, provided: typing.Collection[str] = (),
+    ) -> list[str]:
+        """Возвращает описание зависимостей плана, которые не могут быть получены.
+
+        Parameters
+        ----------
+        plan : InjectionPlan
+            План внедрения зависимостей обработчика.
+        provided : Collection[str]
+            Названия параметров, которые будут переданы через переопределения.
+        """
+        problems = []
+        for param_name, param_type in plan.parameters:
+            if param_name in provided:
+                continue
+            if param_type is inspect.Parameter.empty:
+                problems.append(f"{plan.handler!r}: param {param_name!r} has no type hint")
+            elif not self.has_dependency(param_type):
+                problems.append(f"{plan.handler!r}: no dependency for param {param_name!r} of type {param_type!r}")
+
+        return problems
+
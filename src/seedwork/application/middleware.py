@@ -0,0 +1,179 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Мидлвари, оборачивающие выполнение обработчиков транзакций."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = (
+    "CallNext",
+    "MiddlewareType",
+    "LatencyHistogram",
+    "TimingMiddleware",
+)
+
+import bisect
+import time
+import typing
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.application.module import TransactionContext
+
+CallNext: typing.TypeAlias = typing.Callable[[], typing.Awaitable[typing.Any]]
+"""Вызывает следующую мидлварь цепочки (или сам обработчик)."""
+
+MiddlewareType: typing.TypeAlias = typing.Callable[
+    ["TransactionContext", typing.Any, typing.Callable[..., typing.Any], CallNext],
+    typing.Awaitable[typing.Any],
+]
+"""Мидлварь получает контекст, запрос/команду/событие, обработчик и
+функцию для продолжения цепочки, возвращает результат обработчика.
+"""
+
+DEFAULT_LATENCY_BUCKETS: typing.Final[tuple[float, ...]] = tuple(
+    0.0005 * 2 ** power for power in range(17)
+)
+"""Верхние границы корзин в секундах: от 0.5 мс до ~33 с."""
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными корзинами.
+
+    Parameters
+    ----------
+    buckets : Sequence[float]
+        Отсортированные верхние границы корзин в секундах. Значения
+        больше последней границы попадают в дополнительную корзину.
+    """
+
+    __slots__: typing.Sequence[str] = ("_buckets", "_counts", "_count", "_total", "_errors")
+
+    def __init__(self, buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        self._counts = [0] * (len(self._buckets) + 1)
+        self._count = 0
+        self._total = 0.0
+        self._errors = 0
+
+    @property
+    def count(self) -> int:
+        """Количество учтённых вызовов."""
+        return self._count
+
+    @property
+    def errors(self) -> int:
+        """Количество вызовов, завершившихся ошибкой."""
+        return self._errors
+
+    @property
+    def mean(self) -> float:
+        """Средняя задержка в секундах."""
+        return self._total / self._count if self._count else 0.0
+
+    def observe(self, seconds: float, failed: bool = False) -> None:
+        """Учитывает вызов, длившийся указанное количество секунд."""
+        self._counts[bisect.bisect_left(self._buckets, seconds)] += 1
+        self._count += 1
+        self._total += seconds
+        if failed:
+            self._errors += 1
+
+    def quantile(self, q: float) -> float:
+        """Возвращает верхнюю границу корзины, в которую попадает квантиль.
+
+        Для вызовов дольше последней границы возвращается `math.inf`.
+        """
+        if not 0 <= q <= 1:
+            raise ValueError("Quantile must be in range [0, 1]")
+        if not self._count:
+            return 0.0
+
+        rank = q * self._count
+        seen = 0
+        for index, bucket_count in enumerate(self._counts):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return self._buckets[index] if index < len(self._buckets) else float("inf")
+
+        return float("inf")
+
+    def as_dict(self) -> dict[str, typing.Any]:
+        """Сериализует гистограмму в словарь из примитивных типов."""
+        return {
+            "count": self._count,
+            "errors": self._errors,
+            "mean": self.mean,
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": dict(zip((*self._buckets, float("inf")), self._counts)),
+        }
+
+
+class TimingMiddleware:
+    """Мидлварь, собирающая гистограммы задержек и ошибок по обработчикам.
+
+    Ошибкой считается как исключение из обработчика, так и результат,
+    содержащий ошибки.
+
+    Parameters
+    ----------
+    buckets : Sequence[float]
+        Верхние границы корзин гистограмм в секундах.
+    """
+
+    __slots__: typing.Sequence[str] = ("_buckets", "_histograms")
+
+    def __init__(self, buckets: typing.Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        self._buckets = tuple(buckets)
+        self._histograms: dict[str, LatencyHistogram] = {}
+
+    async def __call__(
+        self,
+        ctx: TransactionContext,
+        task: typing.Any,
+        handler: typing.Callable[..., typing.Any],
+        call_next: CallNext,
+    ) -> typing.Any:
+        histogram = self.get_histogram(handler)
+        started_at = time.perf_counter()
+        try:
+            result = await call_next()
+        except BaseException:
+            histogram.observe(time.perf_counter() - started_at, failed=True)
+            raise
+
+        has_errors = getattr(result, "has_errors", None)
+        histogram.observe(
+            time.perf_counter() - started_at,
+            failed=has_errors is not None and has_errors(),
+        )
+        return result
+
+    def get_histogram(self, handler: typing.Callable[..., typing.Any]) -> LatencyHistogram:
+        """Возвращает гистограмму указанного обработчика."""
+        name = f"{handler.__module__}.{handler.__qualname__}"
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = LatencyHistogram(self._buckets)
+
+        return histogram
+
+    def as_dict(self) -> dict[str, dict[str, typing.Any]]:
+        """Экспортирует гистограммы всех обработчиков, самые медленные
+        (по p99) идут первыми.
+        """
+        return {
+            name: histogram.as_dict()
+            for name, histogram in sorted(
+                self._histograms.items(), key=lambda item: item[1].quantile(0.99), reverse=True,
+            )
+        }
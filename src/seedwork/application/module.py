@@ -19,23 +19,38 @@ __all__: typing.Sequence[str] = (
     "TransactionContext",
 )
 
+import asyncio
+import contextlib
+import functools
 import importlib
+import logging
 import typing
 import types
 import collections
 
 from src.seedwork import metaprogramming
 from src.seedwork import util
+from src.seedwork.deadline import Deadline
+from src.seedwork.deadline import DeadlineExceededError
+from src.seedwork.deadline import deadline_scope
 from src.seedwork.domain.event import Event
+from src.seedwork.domain.repository import EventRepository
 from src.seedwork.application.event import IntegrationEvent
 from src.seedwork.application.event_handler import EventResult
 from src.seedwork.application.event_handler import EventResultSet
 from src.seedwork.application.query_handler import QueryResult
 from src.seedwork.application.command_handler import CommandResult
 from src.seedwork.application.ioc import DependencyProvider
+from src.seedwork.application.ioc import DependencyResolutionError
+from src.seedwork.application.ioc import InjectionPlan
+from src.seedwork.application.ioc import Lifetime
+from src.seedwork.application.middleware import MiddlewareType
+from src.seedwork.application.query_cache import QueryCache
 
 if typing.TYPE_CHECKING:
     from src.seedwork.application.command import Command
+    from src.seedwork.application.command_queue import CommandWorkerPool
+    from src.seedwork.application.outbox import OutboxRelay
     from src.seedwork.application.query import Query
     from src.seedwork.application.event_handler import EventHandlerType
     from src.seedwork.application.query_handler import QueryHandlerType
@@ -45,7 +60,22 @@ if typing.TYPE_CHECKING:
     _EventHandlerT = typing.TypeVar("_EventHandlerT", bound=EventHandlerType)
     _CommandHandlerT = typing.TypeVar("_CommandHandlerT", bound=CommandHandlerType)
 
+    EventDispatch: typing.TypeAlias = tuple[tuple[EventHandlerType, ...], tuple[EventHandlerType, ...]]
+
 _CallableT = typing.TypeVar("_CallableT", bound=typing.Callable[..., typing.Any])
+_MiddlewareT = typing.TypeVar("_MiddlewareT", bound=MiddlewareType)
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+# Асинхронные освобождения скоупов, запущенные из синхронного выхода.
+# Ссылки держатся до завершения, иначе задачу может собрать сборщик мусора.
+_pending_disposals: set[asyncio.Future[typing.Any]] = set()
+
+
+def _finish_disposal(future: asyncio.Future[typing.Any]) -> None:
+    _pending_disposals.discard(future)
+    if not future.cancelled() and (exc := future.exception()) is not None:
+        _LOGGER.error("Failed to dispose a scoped dependency", exc_info=exc)
 
 
 class TransactionContext:
@@ -58,28 +88,37 @@ class TransactionContext:
     overrides : Any
         Переопределение старых/определение новых зависимостей для
         получения зависимостей для обработчиков транзакций.
+        Переопределение `deadline` (Deadline) не передаётся обработчикам,
+        а ограничивает время выполнения транзакции: обработчики, не
+        успевшие к дедлайну, отменяются, а вызовы внешних систем берут
+        таймауты из оставшегося времени (см. `remaining_timeout`).
     """
 
     __slots__: typing.Sequence[str] = (
         "_task",
+        "_deadline",
         "_overrides",
         "_application",
         "_next_commands",
         "_integration_events",
         "_dependency_provider",
+        "_scope",
     )
 
     def __init__(self, application: Application, **overrides: typing.Any) -> None:
         self._application = application
+        self._deadline: typing.Optional[Deadline] = overrides.pop("deadline", None)
         self._overrides = overrides
         self._dependency_provider = application.dependency_provider
-        self._task = None
+        self._scope = self._dependency_provider.create_scope()
+        self._task: typing.Union[Command, Query, tuple[Command, ...], tuple[Query, ...], None] = None
         self._next_commands: list[Command] = []
         self._integration_events: list[IntegrationEvent] = []
 
     @typing.no_type_check
     def __enter__(self) -> typing.Self:
-        self._application._on_enter_transaction_context(self)
+        for hook in self._application._enter_hooks:
+            hook(self)
         return self
 
     @typing.overload
@@ -102,9 +141,30 @@ class TransactionContext:
         exc_val: typing.Optional[BaseException],
         exc_tb: typing.Optional[types.TracebackType],
     ) -> None:
-        self._application._on_exit_transaction_context(self, exc_type, exc_val, exc_tb)
+        for hook in self._application._exit_hooks:
+            hook(self, exc_type, exc_val, exc_tb)
+        for pending in self._scope.dispose():
+            # Синхронный выход не может дождаться асинхронного освобождения.
+            future = asyncio.ensure_future(pending)
+            _pending_disposals.add(future)
+            future.add_done_callback(_finish_disposal)
+
+    async def __aenter__(self) -> typing.Self:
+        self.__enter__()
+        return self
 
-    async def execute_query(self, query: Query) -> QueryResult:
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[type[BaseException]],
+        exc_val: typing.Optional[BaseException],
+        exc_tb: typing.Optional[types.TracebackType],
+    ) -> None:
+        for hook in self._application._exit_hooks:
+            hook(self, exc_type, exc_val, exc_tb)
+        if pending := self._scope.dispose():
+            await asyncio.gather(*pending)
+
+    async def execute_query(self, query: Query) -> QueryResult[typing.Any]:
         """Получает обработчик для данного запроса и выполняет его.
 
         Parameters
@@ -133,10 +193,71 @@ class TransactionContext:
         self._task = query
 
         handler_func = self._application.get_query_handler(query)
-        dependencies = self._dependency_provider.dependencies_from_callable(
-            handler_func, **self._overrides,
+        dependencies = self._dependency_provider.dependencies_from_plan(
+            self._application.get_injection_plan(handler_func), self._scope, **self._overrides,
         )
-        result = await handler_func(query, **dependencies)
+        return await self._run_query(query, handler_func, dependencies)
+
+    async def gather_queries(self, queries: typing.Iterable[Query]) -> list[QueryResult[typing.Any]]:
+        """Выполняет несколько поисковых запросов конкурентно.
+
+        Запросы разделяют зависимости контекста: зависимости каждого
+        обработчика получаются один раз на все его запросы, а скоуп
+        транзакции общий. Может вызываться и из обработчика, уже
+        выполняющегося в этом контексте.
+
+        Parameters
+        ----------
+        queries : Iterable[Query]
+            Поисковые запросы, которые нужно выполнить.
+
+        Returns
+        -------
+        list[QueryResult]
+            Результаты в порядке переданных запросов.
+
+        Raises
+        ------
+        AssertionError
+            В случае, если один из результатов не является QueryResult.
+        """
+        queries = list(queries)
+        if self._task is None:
+            self._task = tuple(queries)
+
+        handler_dependencies: dict[QueryHandlerType, typing.Mapping[str, typing.Any]] = {}
+        calls = []
+        for query in queries:
+            handler_func = self._application.get_query_handler(query)
+            if handler_func not in handler_dependencies:
+                handler_dependencies[handler_func] = self._dependency_provider.dependencies_from_plan(
+                    self._application.get_injection_plan(handler_func), self._scope, **self._overrides,
+                )
+            calls.append((query, handler_func, handler_dependencies[handler_func]))
+
+        if len(calls) == 1:
+            return [await self._run_query(*calls[0])]
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [task_group.create_task(self._run_query(*call)) for call in calls]
+        except BaseExceptionGroup as group:
+            if len(group.exceptions) == 1:
+                raise group.exceptions[0] from None
+            raise
+
+        return [task.result() for task in tasks]
+
+    async def _run_query(
+        self,
+        query: Query,
+        handler_func: QueryHandlerType,
+        dependencies: typing.Mapping[str, typing.Any],
+    ) -> QueryResult[typing.Any]:
+        try:
+            result = await self._call_handler(query, handler_func, dependencies)
+        except DeadlineExceededError as exc:
+            return QueryResult.failure("Запрос не успел выполниться вовремя.", exception=exc)
 
         assert isinstance(
             result, QueryResult
@@ -172,31 +293,169 @@ class TransactionContext:
         self._task = command
 
         handler_func = self._application.get_command_handler(command)
-        dependencies = self._dependency_provider.dependencies_from_callable(
-            handler_func, **self._overrides,
+        dependencies = self._dependency_provider.dependencies_from_plan(
+            self._application.get_injection_plan(handler_func), self._scope, **self._overrides,
         )
 
-        command_result = await handler_func(command, **dependencies) or CommandResult.success()
+        try:
+            command_result = await self._call_handler(command, handler_func, dependencies) or CommandResult.success()
+        except DeadlineExceededError as exc:
+            return CommandResult.failure("Команда не успела выполниться вовремя.", exception=exc)
+        finally:
+            self._invalidate_query_caches(command)
         assert isinstance(
             command_result, CommandResult
         ), f"Got {command_result} instead of CommandResult from {handler_func}"
         command_result = util.collect_domain_events(command_result, dependencies)
 
-        self._next_commands = []
-        self._integration_events = []
-        event_queue = command_result.events.copy()
-        while len(event_queue) > 0:
-            event = event_queue.pop(0)
-            if isinstance(event, IntegrationEvent):
-                self.collect_integration_event(event)
-
-            elif isinstance(event, Event):
-                event_results = await self.handle_domain_event(event)
-                self._next_commands.extend(event_results.commands)
-                event_queue.extend(event_results.events)
+        try:
+            await self._drain_events(command_result.events)
+        except DeadlineExceededError as exc:
+            return CommandResult.failure("Команда не успела выполниться вовремя.", exception=exc)
 
         return CommandResult.success(payload=command_result.payload)
 
+    async def execute_many(
+        self, commands: typing.Iterable[Command], concurrency: int = 16,
+    ) -> list[CommandResult]:
+        """Выполняет пачку независимых команд в одном контексте.
+
+        Зависимости каждого обработчика получаются один раз на все его
+        команды, обработчики выполняются конкурентно, а доменные события
+        всех команд обрабатываются одной общей очередью после них.
+        Исключение в обработчике не прерывает пачку, а превращается в
+        `CommandResult.failure` соответствующей команды, события упавшей
+        команды отбрасываются.
+
+        Репозитории событий общие для команд пачки, поэтому команды,
+        которые их используют, выполняются по одной: так события из
+        репозиториев собираются сразу после каждой команды и относятся
+        именно к ней. Остальные команды выполняются конкурентно.
+
+        Parameters
+        ----------
+        commands : Iterable[Command]
+            Команды, которые нужно выполнить.
+        concurrency : int
+            Максимальное количество одновременно выполняющихся обработчиков.
+
+        Returns
+        -------
+        list[CommandResult]
+            Результаты в порядке переданных команд.
+
+        Raises
+        ------
+        RuntimeError
+            Возбуждается в случае, если в данном контексте уже
+            выполняется другая задача.
+        AssertionError
+            В случае, если один из результатов не является CommandResult.
+        """
+        if concurrency <= 0:
+            raise ValueError("Concurrency limit must be positive")
+        if self._task is not None:
+            raise RuntimeError(
+                "Cannot execute commands while another task is being executed"
+            )
+
+        commands = list(commands)
+        self._task = tuple(commands)
+
+        handler_dependencies: dict[CommandHandlerType, typing.Mapping[str, typing.Any]] = {}
+        records_events: dict[CommandHandlerType, bool] = {}
+        calls = []
+        for command in commands:
+            handler_func = self._application.get_command_handler(command)
+            if handler_func not in handler_dependencies:
+                dependencies = self._dependency_provider.dependencies_from_plan(
+                    self._application.get_injection_plan(handler_func), self._scope, **self._overrides,
+                )
+                handler_dependencies[handler_func] = dependencies
+                records_events[handler_func] = any(
+                    isinstance(dependency, EventRepository) for dependency in dependencies.values()
+                )
+            calls.append((command, handler_func, handler_dependencies[handler_func]))
+
+        results: list[typing.Optional[CommandResult]] = [None] * len(calls)
+        pending = iter(enumerate(calls))
+        events_lock = asyncio.Lock()
+
+        async def worker() -> None:
+            # Воркеры разбирают общий итератор, поэтому задач не больше
+            # `concurrency`, сколько бы команд ни было в пачке.
+            for index, (command, handler_func, dependencies) in pending:
+                records = records_events[handler_func]
+                async with events_lock if records else contextlib.nullcontext():
+                    try:
+                        result = await self._call_handler(command, handler_func, dependencies)
+                    except Exception as exc:
+                        if records:
+                            # Изменения упавшей команды не должны порождать событий.
+                            util.collect_domain_events(CommandResult.success(), dependencies)
+                        results[index] = CommandResult.failure(str(exc) or type(exc).__name__, exception=exc)
+                        continue
+                    finally:
+                        self._invalidate_query_caches(command)
+
+                    result = result or CommandResult.success()
+                    assert isinstance(
+                        result, CommandResult
+                    ), f"Got {result} instead of CommandResult from {handler_func}"
+                    results[index] = util.collect_domain_events(result, dependencies) if records else result
+
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                for _ in range(min(concurrency, len(calls))):
+                    task_group.create_task(worker())
+        except BaseExceptionGroup as group:
+            if len(group.exceptions) == 1:
+                raise group.exceptions[0] from None
+            raise
+
+        # Воркеры завершились без ошибок, значит, результат есть у каждой команды.
+        command_results = typing.cast(list[CommandResult], results)
+        events = [event for result in command_results for event in result.events]
+        try:
+            await self._drain_events(events)
+        except DeadlineExceededError as exc:
+            failure = CommandResult.failure("Команды не успели выполниться вовремя.", exception=exc)
+            return [failure if result.is_success() else result for result in command_results]
+
+        return [
+            CommandResult.success(payload=result.payload) if result.is_success() else result
+            for result in command_results
+        ]
+
+    async def _drain_events(self, events: typing.Iterable[Event]) -> None:
+        self._next_commands = []
+        self._integration_events = []
+        event_queue = collections.deque(events)
+        while event_queue:
+            event = event_queue.popleft()
+            try:
+                if isinstance(event, IntegrationEvent):
+                    self.collect_integration_event(event)
+
+                elif isinstance(event, Event):
+                    event_results = await self.handle_domain_event(event)
+                    self._next_commands.extend(event_results.commands)
+                    event_queue.extend(event_results.events)
+            finally:
+                # Один раз на событие, сколько бы обработчиков у него ни было.
+                self._invalidate_query_caches(event)
+
+        # Интеграционные события сохраняются до возврата результата
+        # команды, а доставляются релеем вне пути выполнения команды.
+        # Запись идёт после изменений обработчиков и не в их транзакции,
+        # см. `OutboxRelay`.
+        if self._integration_events and self._application.outbox is not None:
+            await self._application.outbox.save(self._integration_events)
+
+    def _invalidate_query_caches(self, task: typing.Any) -> None:
+        for cache in self._application._query_caches:
+            cache.invalidate_by(task)
+
     async def handle_domain_event(self, event: Event) -> EventResultSet:
         """Получает все обработчики для данного события и выполняет их.
 
@@ -215,30 +474,102 @@ class TransactionContext:
         AssertionError
             В случае, если полученный результат не является EventResultSet.
         """
-        event_results = []
-        print(self._application.get_event_handlers(event))
-        print(self._application._event_handlers)
-        for handler_func in self._application.get_event_handlers(event):
-            dependencies = self._dependency_provider.dependencies_from_callable(
-                handler_func, **self._overrides,
+        ordered_handlers, concurrent_handlers = self._application.get_event_dispatch(event)
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(
+                "Dispatching %s to %d ordered and %d concurrent handlers",
+                type(event).__name__, len(ordered_handlers), len(concurrent_handlers),
             )
-            event_result = await handler_func(event, **dependencies) or EventResult.success()
-            assert isinstance(
-                event_result, EventResult
-            ), f"Got {event_result} instead of EventResult from {handler_func}"
-
-            event_result = util.collect_domain_events(event_result, dependencies)
-            event_results.append(event_result)
 
+        if not concurrent_handlers:
+            return EventResultSet(await self._run_event_handlers(event, ordered_handlers))
+        if not ordered_handlers and len(concurrent_handlers) == 1:
+            return EventResultSet([await self._run_event_handler(event, concurrent_handlers[0])])
+
+        # Упорядоченные обработчики выполняются цепочкой в одной задаче,
+        # остальные - каждый в своей, поэтому время обработки события
+        # определяется самым медленным из них, а не их суммой.
+        try:
+            async with asyncio.TaskGroup() as task_group:
+                tasks = [
+                    task_group.create_task(self._run_event_handler(event, handler_func))
+                    for handler_func in concurrent_handlers
+                ]
+                if ordered_handlers:
+                    ordered_task = task_group.create_task(
+                        self._run_event_handlers(event, ordered_handlers)
+                    )
+        except BaseExceptionGroup as group:
+            # Сохраняем прежнее поведение: наружу выходит исключение обработчика.
+            if len(group.exceptions) == 1:
+                raise group.exceptions[0] from None
+            raise
+
+        event_results = [task.result() for task in tasks]
+        if ordered_handlers:
+            event_results.extend(ordered_task.result())
         return EventResultSet(event_results)
 
+    async def _call_handler(
+        self,
+        task: typing.Any,
+        handler_func: typing.Callable[..., typing.Awaitable[typing.Any]],
+        dependencies: typing.Mapping[str, typing.Any],
+    ) -> typing.Any:
+        call_next = functools.partial(handler_func, task, **dependencies)
+        # Первая добавленная мидлварь оказывается самой внешней.
+        for middleware in reversed(self._application._middlewares):
+            call_next = functools.partial(middleware, self, task, handler_func, call_next)
+
+        with deadline_scope(self._deadline) as deadline:
+            if deadline is None:
+                return await call_next()
+
+            try:
+                async with asyncio.timeout(deadline.remaining()):
+                    return await call_next()
+            except TimeoutError as exc:
+                if isinstance(exc, DeadlineExceededError) or not deadline.expired():
+                    raise
+                raise DeadlineExceededError(
+                    f"{handler_func.__qualname__} did not finish before the deadline"
+                ) from exc
+
+    async def _run_event_handlers(
+        self, event: Event, handlers: typing.Sequence[EventHandlerType],
+    ) -> list[EventResult]:
+        return [await self._run_event_handler(event, handler_func) for handler_func in handlers]
+
+    async def _run_event_handler(self, event: Event, handler_func: EventHandlerType) -> EventResult:
+        dependencies = self._dependency_provider.dependencies_from_plan(
+            self._application.get_injection_plan(handler_func), self._scope, **self._overrides,
+        )
+        event_result = await self._call_handler(event, handler_func, dependencies) or EventResult.success()
+        assert isinstance(
+            event_result, EventResult
+        ), f"Got {event_result} instead of EventResult from {handler_func}"
+
+        return util.collect_domain_events(event_result, dependencies)
+
     def collect_integration_event(self, event: IntegrationEvent) -> None:
         """Добавляет интеграционный ивент в текущий контекст."""
         self._integration_events.append(event)
 
+    @property
+    def deadline(self) -> typing.Optional[Deadline]:
+        """Дедлайн транзакции, если он был указан."""
+        return self._deadline
+
     def get_service(self, service_cls: typing.Any) -> typing.Any:
         """Получает сервис из текущего менеджера зависимостей."""
-        return self._dependency_provider.get_dependency(service_cls)
+        if self._dependency_provider.get_lifetime(service_cls) is not Lifetime.SCOPED:
+            return self._dependency_provider.get_dependency(service_cls)
+
+        service = self._scope.get(service_cls)
+        if service is None:
+            service = self._dependency_provider.get_dependency(service_cls)
+            self._scope.add(service_cls, service)
+        return service
 
 
 class ApplicationModule:
@@ -258,7 +589,10 @@ class ApplicationModule:
         "_version",
         "_command_handlers",
         "_event_handlers",
+        "_ordered_event_handlers",
         "_query_handlers",
+        "_injection_plans",
+        "_applications",
     )
 
     def __init__(self, name: str, version: float) -> None:
@@ -266,7 +600,10 @@ class ApplicationModule:
         self._version = version
         self._command_handlers: dict[type[Command], CommandHandlerType] = {}
         self._event_handlers: dict[type[Event], list[EventHandlerType]] = collections.defaultdict(list)
+        self._ordered_event_handlers: typing.Set[EventHandlerType] = set()
         self._query_handlers: dict[type[Query], QueryHandlerType] = {}
+        self._injection_plans: dict[typing.Callable[..., typing.Any], InjectionPlan] = {}
+        self._applications: list[Application] = []
 
     @property
     def name(self) -> str:
@@ -281,6 +618,13 @@ class ApplicationModule:
     def import_from(self, path: str) -> None:
         importlib.import_module(path)
 
+    def _handlers_changed(self) -> None:
+        """Сбрасывает таблицы диспетчеризации приложений, в которые
+        включён данный модуль.
+        """
+        for application in self._applications:
+            application._invalidate_dispatch()
+
     def register_query_handler(
         self,
         handler: QueryHandlerType,
@@ -299,6 +643,8 @@ class ApplicationModule:
         if (query := query_cls) is None:
             query = metaprogramming.get_type_hints(handler, first=True)
         self._query_handlers[query] = handler
+        self._injection_plans[handler] = InjectionPlan.from_callable(handler)
+        self._handlers_changed()
 
     def register_command_handler(
         self,
@@ -318,11 +664,14 @@ class ApplicationModule:
         if (command := command_cls) is None:
             command = metaprogramming.get_type_hints(handler, first=True)
         self._command_handlers[command] = handler
+        self._injection_plans[handler] = InjectionPlan.from_callable(handler)
+        self._handlers_changed()
 
     def register_event_handler(
         self,
         handler: EventHandlerType,
         event_cls: typing.Optional[type[Event]] = None,
+        ordered: bool = False,
     ) -> None:
         """Регистрирует обработчик для указанного события.
 
@@ -333,10 +682,18 @@ class ApplicationModule:
         event_cls : Optional[type[Event]]
             Тип события, обработчик для которого нужно
             зарегистрировать.
+        ordered : bool
+            Если True, обработчик не будет выполняться конкурентно с
+            другими упорядоченными обработчиками события и будет вызван
+            строго в порядке регистрации.
         """
         if (event := event_cls) is None:
             event = metaprogramming.get_type_hints(handler, first=True)
         self._event_handlers[event].append(handler)
+        if ordered:
+            self._ordered_event_handlers.add(handler)
+        self._injection_plans[handler] = InjectionPlan.from_callable(handler)
+        self._handlers_changed()
 
     def query_handler(
         self, query_cls: typing.Optional[type[Query]] = None,
@@ -362,7 +719,7 @@ class ApplicationModule:
         return decorator
 
     def event_handler(
-        self, event_cls: typing.Optional[type[Event]] = None,
+        self, event_cls: typing.Optional[type[Event]] = None, ordered: bool = False,
     ) -> typing.Callable[[_EventHandlerT], _EventHandlerT]:
         """Позволяет регистрировать обработчик для указанного события,
         используя синтаксис декоратора.
@@ -372,6 +729,9 @@ class ApplicationModule:
         event_cls : Optional[type[Event]]
             Тип события, обработчик для которого нужно
             зарегистрировать.
+        ordered : bool
+            Выполнять ли обработчик строго по порядку, см.
+            `register_event_handler`.
 
         Returns
         -------
@@ -379,7 +739,7 @@ class ApplicationModule:
             Декоратор обработчика для указанного события.
         """
         def decorator(handler: _EventHandlerT) -> _EventHandlerT:
-            self.register_event_handler(handler, event_cls)
+            self.register_event_handler(handler, event_cls, ordered)
             return handler
 
         return decorator
@@ -422,8 +782,22 @@ class Application(ApplicationModule):
     __slots__: typing.Sequence[str] = (
         "_modules",
         "_dependency_provider",
-        "_on_exit_transaction_context",
-        "_on_enter_transaction_context",
+        "_enter_hooks",
+        "_exit_hooks",
+        "_middlewares",
+        "_query_caches",
+        "_command_workers",
+        "_outbox",
+        "_dispatch_compiled",
+        "_query_registry",
+        "_command_registry",
+        "_event_registry",
+        "_ordered_registry",
+        "_plan_registry",
+        "_query_dispatch",
+        "_command_dispatch",
+        "_event_dispatch",
+        "_event_partitions",
     )
 
     def __init__(
@@ -434,9 +808,28 @@ class Application(ApplicationModule):
     ) -> None:
         super().__init__(name, version)
         self._dependency_provider = dependency_provider
-        self._on_enter_transaction_context = lambda ctx: None
-        self._on_exit_transaction_context = lambda ctx, exc_type, exc_val, exc_tb: None
+        self._enter_hooks: list[typing.Callable[..., typing.Any]] = []
+        self._exit_hooks: list[typing.Callable[..., typing.Any]] = []
+        self._middlewares: list[MiddlewareType] = []
+        self._query_caches: list[QueryCache] = []
+        self._command_workers: typing.Optional[CommandWorkerPool] = None
+        self._outbox: typing.Optional[OutboxRelay] = None
         self._modules: typing.Set[ApplicationModule] = {self}
+        self._applications.append(self)
+
+        # Объединённые обработчики всех модулей, собираются лениво при
+        # первом обращении после регистрации обработчика или модуля.
+        self._dispatch_compiled = False
+        self._query_registry: dict[type[Query], QueryHandlerType] = {}
+        self._command_registry: dict[type[Command], CommandHandlerType] = {}
+        self._event_registry: dict[type[Event], tuple[EventHandlerType, ...]] = {}
+        self._ordered_registry: typing.FrozenSet[EventHandlerType] = frozenset()
+        self._plan_registry: dict[typing.Callable[..., typing.Any], InjectionPlan] = {}
+        # Кеш обработчиков по конкретному типу с учётом MRO.
+        self._query_dispatch: dict[type[Query], QueryHandlerType] = {}
+        self._command_dispatch: dict[type[Command], CommandHandlerType] = {}
+        self._event_dispatch: dict[type[Event], tuple[EventHandlerType, ...]] = {}
+        self._event_partitions: dict[type[Event], EventDispatch] = {}
 
     @property
     def dependency_provider(self) -> DependencyProvider[typing.Any, typing.Any]:
@@ -463,6 +856,37 @@ class Application(ApplicationModule):
             )
         self._dependency_provider = instance
 
+    @property
+    def command_workers(self) -> typing.Optional[CommandWorkerPool]:
+        """Пул воркеров для фонового выполнения команд, если он настроен."""
+        return self._command_workers
+
+    def configure_command_workers(self, pool: CommandWorkerPool) -> None:
+        """Устанавливает пул воркеров для `enqueue_command`.
+
+        Parameters
+        ----------
+        pool : CommandWorkerPool
+            Пул воркеров, выполняющий команды этого приложения.
+        """
+        self._command_workers = pool
+
+    @property
+    def outbox(self) -> typing.Optional[OutboxRelay]:
+        """Релей интеграционных событий, если он настроен."""
+        return self._outbox
+
+    def configure_outbox(self, relay: OutboxRelay) -> None:
+        """Устанавливает релей, в outbox которого сохраняются
+        интеграционные события выполненных команд.
+
+        Parameters
+        ----------
+        relay : OutboxRelay
+            Релей, доставляющий интеграционные события потребителям.
+        """
+        self._outbox = relay
+
     def include_module(self, module: ApplicationModule) -> None:
         """Добавляет новый модуль в приложение.
 
@@ -482,33 +906,158 @@ class Application(ApplicationModule):
                 "Can only include ApplicationModule instances"
             )
         self._modules.add(module)
+        if self not in module._applications:
+            module._applications.append(self)
+        self._invalidate_dispatch()
+
+    def _invalidate_dispatch(self) -> None:
+        """Помечает таблицы диспетчеризации устаревшими."""
+        self._dispatch_compiled = False
+        self._query_dispatch.clear()
+        self._command_dispatch.clear()
+        self._event_dispatch.clear()
+        self._event_partitions.clear()
+
+    def _compile_dispatch(self) -> None:
+        """Собирает обработчики всех модулей в единые реестры."""
+        query_registry: dict[type[Query], QueryHandlerType] = {}
+        command_registry: dict[type[Command], CommandHandlerType] = {}
+        event_registry: dict[type[Event], list[EventHandlerType]] = collections.defaultdict(list)
+        ordered_registry: typing.Set[EventHandlerType] = set()
+        plan_registry: dict[typing.Callable[..., typing.Any], InjectionPlan] = {}
+        for app_module in self._modules:
+            plan_registry.update(app_module._injection_plans)
+            ordered_registry.update(app_module._ordered_event_handlers)
+            for query_cls, query_handler in app_module._query_handlers.items():
+                query_registry.setdefault(query_cls, query_handler)
+            for command_cls, command_handler in app_module._command_handlers.items():
+                command_registry.setdefault(command_cls, command_handler)
+            for event_cls, event_handlers in app_module._event_handlers.items():
+                event_registry[event_cls].extend(event_handlers)
+
+        self._query_registry = query_registry
+        self._command_registry = command_registry
+        self._event_registry = {
+            event_cls: tuple(event_handlers) for event_cls, event_handlers in event_registry.items()
+        }
+        self._ordered_registry = frozenset(ordered_registry)
+        self._plan_registry = plan_registry
+        self._dispatch_compiled = True
+
+    def get_injection_plan(self, handler: typing.Callable[..., typing.Any]) -> InjectionPlan:
+        """Возвращает план внедрения зависимостей для обработчика.
+
+        Планы зарегистрированных обработчиков составляются один раз при
+        регистрации, для прочих - при первом обращении.
+
+        Parameters
+        ----------
+        handler : Callable[..., Any]
+            Обработчик, план внедрения которого нужно получить.
+        """
+        plan = self._plan_registry.get(handler)
+        if plan is None and not self._dispatch_compiled:
+            self._compile_dispatch()
+            plan = self._plan_registry.get(handler)
+
+        if plan is None:
+            plan = self._plan_registry[handler] = InjectionPlan.from_callable(handler)
+
+        return plan
+
+    def validate_dependencies(self, *provided: str) -> None:
+        """Проверяет, что зависимости всех обработчиков могут быть получены.
+
+        Предназначен для вызова при старте приложения, чтобы ошибки
+        конфигурации всплывали сразу, а не при первой транзакции.
+
+        Parameters
+        ----------
+        *provided : str
+            Названия параметров, которые передаются через переопределения
+            транзакционного контекста и не должны проверяться.
+
+        Raises
+        ------
+        DependencyResolutionError
+            Возбуждается в случае, если какие-то зависимости не могут
+            быть получены. Содержит описание каждой из них.
+        """
+        if not self._dispatch_compiled:
+            self._compile_dispatch()
+
+        problems = []
+        for plan in self._plan_registry.values():
+            problems.extend(self._dependency_provider.validate_plan(plan, provided))
+
+        if problems:
+            raise DependencyResolutionError(problems)
+
+    @staticmethod
+    def _resolve_handler(
+        registry: typing.Mapping[type[typing.Any], _CallableT], cls: type[typing.Any],
+    ) -> typing.Optional[_CallableT]:
+        # Обработчик базового класса подходит и для его наследников,
+        # приоритет у самого конкретного типа.
+        for base in cls.__mro__:
+            handler = registry.get(base)
+            if handler is not None:
+                return handler
+
+        return None
 
     def on_enter_transaction_context(self, callable_: _CallableT) -> _CallableT:
         """Добавляет хук, который будет триггериться каждый раз при
         инициализации транзакционного контекста.
 
+        Хуков может быть несколько, они вызываются в порядке добавления.
+
         Parameters
         ----------
         callable_ : _CallableT
             Хук, который будет триггериться каждый раз при инициализации
             транзакционного контекста.
         """
-        self._on_enter_transaction_context = callable_
+        self._enter_hooks.append(callable_)
         return callable_
 
     def on_exit_transaction_context(self, callable_: _CallableT) -> _CallableT:
         """Добавляет хук, который будет триггериться каждый раз при
         завершении транзакционного контекста.
 
+        Хуков может быть несколько, они вызываются в порядке добавления.
+
         Parameters
         ----------
         callable_ : _CallableT
             Хук, который будет триггериться каждый раз при завершении
             транзакционного контекста.
         """
-        self._on_exit_transaction_context = callable_
+        self._exit_hooks.append(callable_)
         return callable_
 
+    @property
+    def middlewares(self) -> typing.Sequence[MiddlewareType]:
+        """Мидлвари приложения в порядке добавления."""
+        return tuple(self._middlewares)
+
+    def add_middleware(self, middleware: _MiddlewareT) -> _MiddlewareT:
+        """Добавляет мидлварь, оборачивающую выполнение обработчиков
+        запросов, команд и событий.
+
+        Мидлвари образуют цепочку: первая добавленная вызывается первой
+        и получает результат последней. Может использоваться как декоратор.
+
+        Parameters
+        ----------
+        middleware : MiddlewareType
+            Мидлварь, которую нужно добавить.
+        """
+        self._middlewares.append(middleware)
+        if isinstance(middleware, QueryCache):
+            self._query_caches.append(middleware)
+        return middleware
+
     def get_query_handler(self, query: Query) -> QueryHandlerType:
         """Возвращает обработчик указанного поискового запроса.
 
@@ -530,12 +1079,18 @@ class Application(ApplicationModule):
             Обработчик для указанного поискового запроса.
         """
         query_cls = type(query)
-        for app_module in self._modules:
-            handler_func = app_module._query_handlers.get(query_cls)
-            if handler_func is not None:
-                return handler_func
+        handler_func = self._query_dispatch.get(query_cls)
+        if handler_func is None:
+            if not self._dispatch_compiled:
+                self._compile_dispatch()
 
-        raise KeyError(f"No query handler found for command {query_cls}")
+            handler_func = self._resolve_handler(self._query_registry, query_cls)
+            if handler_func is None:
+                raise KeyError(f"No query handler found for query {query_cls}")
+
+            self._query_dispatch[query_cls] = handler_func
+
+        return handler_func
 
     def get_command_handler(self, command: Command) -> CommandHandlerType:
         """Возвращает обработчик указанной команды.
@@ -558,15 +1113,24 @@ class Application(ApplicationModule):
             Обработчик для указанной команды.
         """
         command_cls = type(command)
-        for app_module in self._modules:
-            handler_func = app_module._command_handlers.get(command_cls)
-            if handler_func is not None:
-                return handler_func
+        handler_func = self._command_dispatch.get(command_cls)
+        if handler_func is None:
+            if not self._dispatch_compiled:
+                self._compile_dispatch()
 
-        raise KeyError(f"No command handler found for command {command_cls}")
+            handler_func = self._resolve_handler(self._command_registry, command_cls)
+            if handler_func is None:
+                raise KeyError(f"No command handler found for command {command_cls}")
 
-    def get_event_handlers(self, event: Event) -> list[EventHandlerType]:
-        """Возвращает обработчик указанной команды.
+            self._command_dispatch[command_cls] = handler_func
+
+        return handler_func
+
+    def get_event_handlers(self, event: Event) -> typing.Sequence[EventHandlerType]:
+        """Возвращает обработчики указанного события.
+
+        Обработчики, зарегистрированные для базовых классов события,
+        также будут включены (после обработчиков более конкретных типов).
 
         Parameters
         ----------
@@ -576,18 +1140,52 @@ class Application(ApplicationModule):
 
         Returns
         -------
-        list[EventHandlerType]
-            Список обработчиков для указанного события.
+        Sequence[EventHandlerType]
+            Обработчики для указанного события.
         """
         event_cls = type(event)
-        event_handlers = []
-        for app_module in self._modules:
-            event_handlers.extend(
-                app_module._event_handlers.get(event_cls, [])
-            )
+        event_handlers = self._event_dispatch.get(event_cls)
+        if event_handlers is None:
+            if not self._dispatch_compiled:
+                self._compile_dispatch()
+
+            collected: list[EventHandlerType] = []
+            for base in event_cls.__mro__:
+                for handler_func in self._event_registry.get(base, ()):
+                    if handler_func not in collected:
+                        collected.append(handler_func)
+
+            event_handlers = self._event_dispatch[event_cls] = tuple(collected)
 
         return event_handlers
 
+    def get_event_dispatch(self, event: Event) -> EventDispatch:
+        """Возвращает обработчики указанного события, разделённые на
+        упорядоченные и конкурентные.
+
+        Parameters
+        ----------
+        event : Event
+            Тип события, обработчики для которого
+            необходимо получить.
+
+        Returns
+        -------
+        EventDispatch
+            Упорядоченные обработчики (в порядке вызова) и обработчики,
+            которые можно выполнять конкурентно.
+        """
+        event_cls = type(event)
+        partition = self._event_partitions.get(event_cls)
+        if partition is None:
+            event_handlers = self.get_event_handlers(event)
+            partition = self._event_partitions[event_cls] = (
+                tuple(h for h in event_handlers if h in self._ordered_registry),
+                tuple(h for h in event_handlers if h not in self._ordered_registry),
+            )
+
+        return partition
+
     def transaction_context(self, **dependencies: typing.Any) -> TransactionContext:
         """Создаёт транзакционный контекст для текущего приложения.
 
@@ -621,9 +1219,36 @@ class Application(ApplicationModule):
         CommandResult
             Результат выполнения указанной команды.
         """
-        with self.transaction_context(**dependencies) as ctx:
+        async with self.transaction_context(**dependencies) as ctx:
             return await ctx.execute_command(command)
 
+    async def enqueue_command(self, command: Command, idempotency_key: typing.Optional[str] = None) -> bool:
+        """Ставит команду в очередь на фоновое выполнение.
+
+        Parameters
+        ----------
+        command : Command
+            Команда, которую нужно выполнить.
+        idempotency_key : Optional[str]
+            Ключ идемпотентности, см. `CommandWorkerPool.enqueue`.
+
+        Raises
+        ------
+        RuntimeError
+            Возбуждается в случае, если пул воркеров не настроен.
+        CommandQueueFullError
+            Возбуждается в случае, если очередь заполнена.
+
+        Returns
+        -------
+        bool
+            False, если команда с таким ключом уже ставилась в очередь.
+        """
+        if self._command_workers is None:
+            raise RuntimeError("Command workers are not configured")
+
+        return await self._command_workers.enqueue(command, idempotency_key)
+
     async def execute_query(self, query: Query, **dependencies: typing.Any) -> QueryResult[typing.Any]:
         """Выполняет указанный поисковый запрос.
 
@@ -640,5 +1265,51 @@ class Application(ApplicationModule):
         QueryResult[Any]
             Результат выполнения указанного поискового запроса.
         """
-        with self.transaction_context(**dependencies) as ctx:
+        async with self.transaction_context(**dependencies) as ctx:
             return await ctx.execute_query(query)
+
+    async def execute_many(
+        self, commands: typing.Iterable[Command], concurrency: int = 16, **dependencies: typing.Any,
+    ) -> list[CommandResult]:
+        """Выполняет пачку независимых команд в одном транзакционном
+        контексте, см. `TransactionContext.execute_many`.
+
+        Parameters
+        ----------
+        commands : Iterable[Command]
+            Команды, которые нужно выполнить.
+        concurrency : int
+            Максимальное количество одновременно выполняющихся обработчиков.
+        dependencies : Any
+            Зависимости, которые будут использованы для выполнения
+            указанных команд.
+
+        Returns
+        -------
+        list[CommandResult]
+            Результаты в порядке переданных команд.
+        """
+        async with self.transaction_context(**dependencies) as ctx:
+            return await ctx.execute_many(commands, concurrency)
+
+    async def gather_queries(
+        self, queries: typing.Iterable[Query], **dependencies: typing.Any,
+    ) -> list[QueryResult[typing.Any]]:
+        """Выполняет несколько поисковых запросов конкурентно в одном
+        транзакционном контексте.
+
+        Parameters
+        ----------
+        queries : Iterable[Query]
+            Поисковые запросы, которые нужно выполнить.
+        dependencies : Any
+            Зависимости, которые будут использованы для выполнения
+            указанных поисковых запросов.
+
+        Returns
+        -------
+        list[QueryResult[Any]]
+            Результаты в порядке переданных запросов.
+        """
+        async with self.transaction_context(**dependencies) as ctx:
+            return await ctx.gather_queries(queries)
@@ -0,0 +1,361 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Transactional outbox для доставки интеграционных событий."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = (
+    "OutboxMessage",
+    "Outbox",
+    "InMemoryOutbox",
+    "OutboxRelay",
+    "IntegrationEventConsumer",
+)
+
+import abc
+import asyncio
+import dataclasses
+import logging
+import typing
+import uuid
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.application.event import IntegrationEvent
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+IntegrationEventConsumer: typing.TypeAlias = typing.Callable[
+    [typing.Sequence["IntegrationEvent"]], typing.Awaitable[None]
+]
+"""Потребитель получает пачку событий подписанного типа."""
+
+
+@dataclasses.dataclass(frozen=True)
+class OutboxMessage:
+    """Интеграционное событие, сохранённое в outbox."""
+
+    message_id: str
+    """Уникальный айди сообщения."""
+
+    event: IntegrationEvent
+    """Событие, которое нужно доставить."""
+
+    delivered: typing.FrozenSet[str] = frozenset()
+    """Имена потребителей, которым событие уже доставлено."""
+
+    attempts: int = 0
+    """Количество неудачных попыток доставки."""
+
+
+class Outbox(abc.ABC):
+    """Хранилище интеграционных событий, ожидающих доставки."""
+
+    __slots__: typing.Sequence[str] = ()
+
+    @abc.abstractmethod
+    async def save(self, events: typing.Sequence[IntegrationEvent]) -> None:
+        """Сохраняет события для последующей доставки."""
+
+    @abc.abstractmethod
+    async def fetch_batch(self, limit: int) -> typing.Sequence[OutboxMessage]:
+        """Возвращает до `limit` самых старых недоставленных сообщений."""
+
+    @abc.abstractmethod
+    async def mark_delivered(self, message_ids: typing.Sequence[str], consumer: str) -> None:
+        """Отмечает сообщения доставленными одному потребителю."""
+
+    @abc.abstractmethod
+    async def mark_published(self, message_ids: typing.Sequence[str]) -> None:
+        """Отмечает сообщения доставленными всем потребителям."""
+
+    @abc.abstractmethod
+    async def record_failure(self, message_ids: typing.Sequence[str]) -> None:
+        """Увеличивает счётчик неудачных попыток доставки сообщений."""
+
+    @abc.abstractmethod
+    async def dead_letter(self, message_ids: typing.Sequence[str]) -> None:
+        """Исключает сообщения из доставки, оставляя их для разбора."""
+
+
+class InMemoryOutbox(Outbox):
+    """Outbox в памяти процесса. Недоставленные события теряются при
+    перезапуске.
+    """
+
+    __slots__: typing.Sequence[str] = ("_messages", "_dead_letters")
+
+    def __init__(self) -> None:
+        # dict сохраняет порядок вставки, поэтому старые сообщения первые.
+        self._messages: dict[str, OutboxMessage] = {}
+        self._dead_letters: dict[str, OutboxMessage] = {}
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    @property
+    def dead_letters(self) -> typing.Sequence[OutboxMessage]:
+        """Сообщения, исключённые из доставки."""
+        return list(self._dead_letters.values())
+
+    async def save(self, events: typing.Sequence[IntegrationEvent]) -> None:
+        for event in events:
+            message = OutboxMessage(uuid.uuid4().hex, event)
+            self._messages[message.message_id] = message
+
+    async def fetch_batch(self, limit: int) -> typing.Sequence[OutboxMessage]:
+        batch: list[OutboxMessage] = []
+        for message in self._messages.values():
+            if len(batch) >= limit:
+                break
+            batch.append(message)
+        return batch
+
+    async def mark_delivered(self, message_ids: typing.Sequence[str], consumer: str) -> None:
+        for message_id in message_ids:
+            if (message := self._messages.get(message_id)) is not None:
+                self._messages[message_id] = dataclasses.replace(
+                    message, delivered=message.delivered | {consumer},
+                )
+
+    async def mark_published(self, message_ids: typing.Sequence[str]) -> None:
+        for message_id in message_ids:
+            self._messages.pop(message_id, None)
+
+    async def record_failure(self, message_ids: typing.Sequence[str]) -> None:
+        for message_id in message_ids:
+            if (message := self._messages.get(message_id)) is not None:
+                self._messages[message_id] = dataclasses.replace(message, attempts=message.attempts + 1)
+
+    async def dead_letter(self, message_ids: typing.Sequence[str]) -> None:
+        for message_id in message_ids:
+            if (message := self._messages.pop(message_id, None)) is not None:
+                self._dead_letters[message_id] = message
+
+
+class OutboxRelay:
+    """Доставляет события из outbox потребителям пачками.
+
+    Релей просыпается раз в `flush_interval` секунд, либо раньше, если
+    накопилась полная пачка. Доставка отслеживается для каждого
+    потребителя отдельно: упавший потребитель получит сообщения повторно
+    (доставка хотя бы один раз), а отработавшие - нет. Сообщения, доставка
+    которых уже не удавалась, передаются потребителю по одному, чтобы
+    одно ядовитое сообщение не валило всю пачку. После `max_attempts`
+    неудачных попыток сообщение исключается из доставки (dead letter).
+
+    Запись в outbox не транзакционна относительно изменений обработчиков:
+    `Application` сохраняет события отдельной записью уже после того, как
+    обработчики команды и событий записали свои изменения, а репозитории
+    не используют общую сессию Mongo. Если процесс упадёт между этими
+    записями, изменения останутся, а их интеграционные события будут
+    потеряны. Потребители, которым это важно, должны уметь сверяться с
+    состоянием источника.
+
+    Parameters
+    ----------
+    outbox : Outbox
+        Хранилище событий.
+    batch_size : int
+        Максимальное количество событий в пачке.
+    flush_interval : float
+        Максимальное время в секундах между сохранением события и
+        попыткой его доставки.
+    max_attempts : int
+        Количество неудачных попыток, после которого сообщение
+        исключается из доставки.
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_outbox",
+        "_batch_size",
+        "_flush_interval",
+        "_consumers",
+        "_wakeup",
+        "_pending",
+        "_task",
+        "_published",
+        "_max_attempts",
+        "_dead_lettered",
+    )
+
+    def __init__(
+        self, outbox: Outbox, batch_size: int = 100, flush_interval: float = 1.0, max_attempts: int = 5,
+    ) -> None:
+        if batch_size <= 0:
+            raise ValueError("Batch size must be positive")
+        if max_attempts <= 0:
+            raise ValueError("Max attempts must be positive")
+
+        self._outbox = outbox
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_attempts = max_attempts
+        self._consumers: dict[type[IntegrationEvent], dict[str, IntegrationEventConsumer]] = {}
+        self._wakeup = asyncio.Event()
+        self._pending = 0
+        self._task: typing.Optional[asyncio.Task[None]] = None
+        self._published = 0
+        self._dead_lettered = 0
+
+    @property
+    def outbox(self) -> Outbox:
+        """Хранилище событий релея."""
+        return self._outbox
+
+    @property
+    def published(self) -> int:
+        """Количество доставленных событий."""
+        return self._published
+
+    @property
+    def dead_lettered(self) -> int:
+        """Количество событий, исключённых из доставки."""
+        return self._dead_lettered
+
+    def subscribe(
+        self,
+        event_cls: type[IntegrationEvent],
+        consumer: IntegrationEventConsumer,
+        name: typing.Optional[str] = None,
+    ) -> None:
+        """Подписывает потребителя на события указанного типа (и его
+        наследников).
+
+        Parameters
+        ----------
+        event_cls : type[IntegrationEvent]
+            Тип событий.
+        consumer : IntegrationEventConsumer
+            Потребитель.
+        name : Optional[str]
+            Имя, под которым в outbox отмечается доставка потребителю.
+            Должно быть стабильным между перезапусками, по умолчанию -
+            `__qualname__` потребителя.
+        """
+        if name is None:
+            name = getattr(consumer, "__qualname__", repr(consumer))
+
+        consumers = self._consumers.setdefault(event_cls, {})
+        if name in consumers:
+            raise ValueError(f"Consumer {name!r} is already subscribed to {event_cls.__qualname__}")
+        consumers[name] = consumer
+
+    async def save(self, events: typing.Sequence[IntegrationEvent]) -> None:
+        """Сохраняет события в outbox и будит релей, если набралась пачка."""
+        if not events:
+            return
+
+        await self._outbox.save(events)
+        self._pending += len(events)
+        if self._pending >= self._batch_size:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        """Запускает фоновую доставку."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую доставку и доставляет оставшиеся события."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+        try:
+            await self.flush()
+        except Exception:
+            _LOGGER.exception("Failed to publish outbox events on stop")
+
+    async def flush(self) -> int:
+        """Доставляет все накопленные события.
+
+        Returns
+        -------
+        int
+            Количество доставленных событий.
+        """
+        published = 0
+        while True:
+            batch_published, failed = await self._publish_batch()
+            published += batch_published
+            # Повторная доставка - не раньше следующего пробуждения.
+            if not batch_published or failed:
+                return published
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception:
+                _LOGGER.exception("Failed to publish outbox batch, will retry")
+
+    async def _publish_batch(self) -> tuple[int, bool]:
+        messages = await self._outbox.fetch_batch(self._batch_size)
+        if not messages:
+            self._pending = 0
+            return 0, False
+
+        deliveries: list[tuple[str, IntegrationEventConsumer, list[OutboxMessage]]] = []
+        batches: dict[str, tuple[IntegrationEventConsumer, list[OutboxMessage]]] = {}
+        for message in messages:
+            # Потребитель, подписанный и на базовый тип, получает событие один раз.
+            skipped = set(message.delivered)
+            for base in type(message.event).__mro__:
+                for name, consumer in self._consumers.get(base, {}).items():
+                    if name in skipped:
+                        continue
+                    skipped.add(name)
+                    if message.attempts:
+                        deliveries.append((name, consumer, [message]))
+                    else:
+                        batches.setdefault(name, (consumer, []))[1].append(message)
+
+        deliveries.extend((name, consumer, batch) for name, (consumer, batch) in batches.items())
+        results = await asyncio.gather(
+            *(consumer([message.event for message in batch]) for _, consumer, batch in deliveries),
+            return_exceptions=True,
+        )
+
+        failed: set[str] = set()
+        for (name, _, batch), result in zip(deliveries, results):
+            message_ids = [message.message_id for message in batch]
+            if isinstance(result, Exception):
+                _LOGGER.error("Consumer %s failed to handle %d events", name, len(batch), exc_info=result)
+                failed.update(message_ids)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                await self._outbox.mark_delivered(message_ids, name)
+
+        published = [message.message_id for message in messages if message.message_id not in failed]
+        retried = [message for message in messages if message.message_id in failed]
+        dead = [message.message_id for message in retried if message.attempts + 1 >= self._max_attempts]
+        if published:
+            await self._outbox.mark_published(published)
+        if retried:
+            await self._outbox.record_failure([message.message_id for message in retried])
+        if dead:
+            _LOGGER.warning("Dead-lettering %d outbox messages after %d attempts", len(dead), self._max_attempts)
+            await self._outbox.dead_letter(dead)
+
+        self._pending = max(self._pending - len(published) - len(dead), 0)
+        self._published += len(published)
+        self._dead_lettered += len(dead)
+        return len(published) + len(dead), bool(failed)
@@ -0,0 +1,207 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Кеширование результатов поисковых запросов."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = (
+    "CachePolicy",
+    "QueryCache",
+    "cached_query",
+)
+
+import collections
+import dataclasses
+import time
+import typing
+
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_handler import QueryResult
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.application.module import TransactionContext
+    from src.seedwork.application.middleware import CallNext
+
+_HandlerT = typing.TypeVar("_HandlerT", bound=typing.Callable[..., typing.Any])
+
+_POLICY_ATTRIBUTE: typing.Final[str] = "__query_cache_policy__"
+
+
+@dataclasses.dataclass(frozen=True)
+class CachePolicy:
+    """Параметры кеширования результатов обработчика запроса."""
+
+    ttl: float
+    """Время жизни результата в секундах."""
+
+    invalidated_by: tuple[type, ...] = ()
+    """Типы команд и событий (с учётом наследования), выполнение которых
+    сбрасывает все закешированные результаты обработчика. Событие
+    сбрасывает кеш один раз, даже если у него нет обработчиков.
+    """
+
+
+def cached_query(
+    ttl: float, invalidated_by: typing.Iterable[type] = (),
+) -> typing.Callable[[_HandlerT], _HandlerT]:
+    """Помечает обработчик запроса как кешируемый.
+
+    Декоратор должен применяться до регистрации обработчика. Результаты
+    кешируются по значению запроса, поэтому запрос должен быть хешируемым.
+
+    Parameters
+    ----------
+    ttl : float
+        Время жизни результата в секундах.
+    invalidated_by : Iterable[type]
+        Типы команд и событий, сбрасывающие кеш обработчика.
+    """
+    if ttl <= 0:
+        raise ValueError("Cache TTL must be positive")
+
+    policy = CachePolicy(ttl=ttl, invalidated_by=tuple(invalidated_by))
+
+    def decorator(handler: _HandlerT) -> _HandlerT:
+        setattr(handler, _POLICY_ATTRIBUTE, policy)
+        return handler
+
+    return decorator
+
+
+class QueryCache:
+    """Мидлварь, кеширующая успешные результаты помеченных через
+    `cached_query` обработчиков.
+
+    Каждому обработчику соответствует поколение: сброс кеша увеличивает
+    его, а записи прошлых поколений считаются устаревшими и вытесняются
+    по LRU. Результат запроса, во время выполнения которого кеш был
+    сброшен, не сохраняется.
+
+    Кеш сбрасывает транзакция приложения, в которое добавлена мидлварь:
+    после выполнения каждой команды и обработки каждого события.
+
+    Parameters
+    ----------
+    max_size : int
+        Максимальное количество закешированных результатов.
+    clock : Callable[[], float]
+        Источник монотонного времени в секундах.
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_max_size",
+        "_clock",
+        "_entries",
+        "_generations",
+        "_invalidated_handlers",
+        "_hits",
+        "_misses",
+    )
+
+    def __init__(
+        self, max_size: int = 1024, clock: typing.Callable[[], float] = time.monotonic,
+    ) -> None:
+        if max_size <= 0:
+            raise ValueError("Cache size must be positive")
+
+        self._max_size = max_size
+        self._clock = clock
+        # query -> (поколение обработчика, момент истечения, результат)
+        self._entries: collections.OrderedDict[Query, tuple[int, float, QueryResult[typing.Any]]] = (
+            collections.OrderedDict()
+        )
+        self._generations: dict[typing.Callable[..., typing.Any], int] = {}
+        # тип команды/события -> обработчики, кеш которых он сбрасывает
+        self._invalidated_handlers: dict[type, list[typing.Callable[..., typing.Any]]] = {}
+        self._hits = 0
+        self._misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hits(self) -> int:
+        """Количество запросов, результат которых взят из кеша."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Количество кешируемых запросов, которые пришлось выполнить."""
+        return self._misses
+
+    async def __call__(
+        self,
+        ctx: TransactionContext,
+        task: typing.Any,
+        handler: typing.Callable[..., typing.Any],
+        call_next: CallNext,
+    ) -> typing.Any:
+        if not isinstance(task, Query):
+            return await call_next()
+
+        policy: typing.Optional[CachePolicy] = getattr(handler, _POLICY_ATTRIBUTE, None)
+        if policy is None:
+            return await call_next()
+
+        generation = self._generations.get(handler)
+        if generation is None:
+            generation = self._track(handler, policy)
+
+        entry = self._entries.get(task)
+        if entry is not None:
+            entry_generation, expires_at, result = entry
+            if entry_generation == generation and expires_at > self._clock():
+                self._entries.move_to_end(task)
+                self._hits += 1
+                return result
+            del self._entries[task]
+
+        self._misses += 1
+        result = await call_next()
+        if (
+            isinstance(result, QueryResult)
+            and result.is_success()
+            and self._generations[handler] == generation
+        ):
+            self._entries[task] = (generation, self._clock() + policy.ttl, result)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+
+        return result
+
+    def _track(self, handler: typing.Callable[..., typing.Any], policy: CachePolicy) -> int:
+        self._generations[handler] = 0
+        for invalidating_cls in policy.invalidated_by:
+            self._invalidated_handlers.setdefault(invalidating_cls, []).append(handler)
+
+        return 0
+
+    def invalidate(self, handler: typing.Callable[..., typing.Any]) -> None:
+        """Сбрасывает все закешированные результаты обработчика."""
+        if handler in self._generations:
+            self._generations[handler] += 1
+
+    def invalidate_by(self, task: typing.Any) -> None:
+        """Сбрасывает кеш обработчиков, зависящих от указанной команды
+        или события.
+        """
+        if not self._invalidated_handlers:
+            return
+
+        for base in type(task).__mro__:
+            for handler in self._invalidated_handlers.get(base, ()):
+                self.invalidate(handler)
+
+    def clear(self) -> None:
+        """Удаляет все закешированные результаты."""
+        self._entries.clear()
@@ -0,0 +1,180 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Ограничение конкурентности с ограниченной очередью ожидания."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = ("Bulkhead", "BulkheadFullError")
+
+import asyncio
+import time
+import types
+import typing
+
+
+class BulkheadFullError(Exception):
+    """Возбуждается в случае, если ресурс перегружен и ожидание
+    освобождения займёт больше допустимого.
+    """
+
+
+class Bulkhead:
+    """Ограничивает количество одновременных обращений к ресурсу.
+
+    Ожидающие сверх лимита становятся в очередь ограниченного размера.
+    Время ожидания оценивается по скользящему среднему времени
+    удержания, что позволяет отклонять заведомо не успевающие вызовы
+    сразу, не занимая место в очереди.
+
+    Parameters
+    ----------
+    max_concurrency : int
+        Максимальное количество одновременных обращений.
+    max_queue : Optional[int]
+        Максимальное количество ожидающих. None - без ограничения.
+    max_wait : Optional[float]
+        Максимальное время ожидания в секундах по умолчанию.
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_max_concurrency",
+        "_max_queue",
+        "_max_wait",
+        "_semaphore",
+        "_in_flight",
+        "_queued",
+        "_average_hold",
+    )
+
+    _SMOOTHING: typing.Final[float] = 0.2
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_queue: typing.Optional[int] = None,
+        max_wait: typing.Optional[float] = None,
+    ) -> None:
+        if max_concurrency <= 0:
+            raise ValueError("Concurrency limit must be positive")
+
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._max_wait = max_wait
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._queued = 0
+        self._average_hold = 0.0
+
+    @property
+    def in_flight(self) -> int:
+        """Количество обращений, выполняющихся в данный момент."""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """Количество ожидающих в очереди."""
+        return self._queued
+
+    @property
+    def average_hold(self) -> float:
+        """Скользящее среднее времени удержания в секундах."""
+        return self._average_hold
+
+    def estimated_wait(self) -> float:
+        """Оценивает, сколько секунд придётся ждать новому обращению."""
+        if self._in_flight < self._max_concurrency:
+            return 0.0
+
+        return (self._queued + 1) / self._max_concurrency * self._average_hold
+
+    async def acquire(self, max_wait: typing.Optional[float] = None) -> None:
+        """Занимает место, дожидаясь его освобождения при необходимости.
+
+        Parameters
+        ----------
+        max_wait : Optional[float]
+            Максимальное время ожидания в секундах. Если не указано,
+            используется значение из конструктора.
+
+        Raises
+        ------
+        BulkheadFullError
+            Возбуждается в случае, если очередь заполнена, либо ожидание
+            займёт (или заняло) больше `max_wait`.
+        """
+        if max_wait is None:
+            max_wait = self._max_wait
+
+        # Свободное место занимается сразу, только если его не ждёт
+        # никто из очереди: иначе вызов встал бы за ожидающими без учёта
+        # `max_queue` и `max_wait`.
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+            self._in_flight += 1
+            return
+
+        if self._max_queue is not None and self._queued >= self._max_queue:
+            raise BulkheadFullError(f"Wait queue is full ({self._queued} waiting)")
+        if max_wait is not None and self.estimated_wait() > max_wait:
+            raise BulkheadFullError(f"Estimated wait exceeds {max_wait:.3f}s")
+
+        self._queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), max_wait)
+        except asyncio.TimeoutError:
+            raise BulkheadFullError(f"Waited more than {max_wait:.3f}s") from None
+        finally:
+            self._queued -= 1
+
+        self._in_flight += 1
+
+    def release(self, held_for: typing.Optional[float] = None) -> None:
+        """Освобождает место.
+
+        Parameters
+        ----------
+        held_for : Optional[float]
+            Сколько секунд место было занято, учитывается в оценке
+            времени ожидания.
+        """
+        self._in_flight -= 1
+        self._semaphore.release()
+        if held_for is not None:
+            self._average_hold += (held_for - self._average_hold) * self._SMOOTHING
+
+    def hold(self, max_wait: typing.Optional[float] = None) -> _BulkheadHold:
+        """Возвращает асинхронный контекстный менеджер, занимающий место
+        на время своего выполнения.
+        """
+        return _BulkheadHold(self, max_wait)
+
+
+class _BulkheadHold:
+    __slots__: typing.Sequence[str] = ("_bulkhead", "_max_wait", "_acquired_at")
+
+    def __init__(self, bulkhead: Bulkhead, max_wait: typing.Optional[float]) -> None:
+        self._bulkhead = bulkhead
+        self._max_wait = max_wait
+        self._acquired_at = 0.0
+
+    async def __aenter__(self) -> None:
+        await self._bulkhead.acquire(self._max_wait)
+        self._acquired_at = time.perf_counter()
+
+    async def __aexit__(
+        self,
+        exc_type: typing.Optional[type[BaseException]],
+        exc_val: typing.Optional[BaseException],
+        exc_tb: typing.Optional[types.TracebackType],
+    ) -> None:
+        self._bulkhead.release(time.perf_counter() - self._acquired_at)
@@ -0,0 +1,120 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Дедлайны, распространяемые от точки входа до вызовов внешних систем."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = (
+    "Deadline",
+    "DeadlineExceededError",
+    "current_deadline",
+    "deadline_scope",
+    "remaining_timeout",
+)
+
+import contextlib
+import contextvars
+import dataclasses
+import time
+import typing
+
+
+class DeadlineExceededError(TimeoutError):
+    """Возбуждается в случае, если работа не успела завершиться до дедлайна."""
+
+
+@dataclasses.dataclass(frozen=True)
+class Deadline:
+    """Момент времени, к которому работа должна быть завершена.
+
+    Время отсчитывается по `time.monotonic`, как и в event loop asyncio.
+    """
+
+    expires_at: float
+    """Значение `time.monotonic`, после которого дедлайн истёк."""
+
+    @classmethod
+    def after(cls, seconds: float) -> Deadline:
+        """Создаёт дедлайн через указанное количество секунд."""
+        return cls(time.monotonic() + seconds)
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось до дедлайна (не меньше нуля)."""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        """Вернёт True, если дедлайн уже наступил."""
+        return time.monotonic() >= self.expires_at
+
+
+_current_deadline: contextvars.ContextVar[typing.Optional[Deadline]] = contextvars.ContextVar(
+    "current_deadline", default=None,
+)
+
+
+def current_deadline() -> typing.Optional[Deadline]:
+    """Возвращает дедлайн текущей задачи, если он установлен."""
+    return _current_deadline.get()
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: typing.Optional[Deadline]) -> typing.Iterator[typing.Optional[Deadline]]:
+    """Устанавливает дедлайн для кода внутри блока.
+
+    Вложенный дедлайн не может быть позже внешнего: действует
+    наиболее ранний из них.
+
+    Parameters
+    ----------
+    deadline : Optional[Deadline]
+        Дедлайн, который нужно установить. None - оставить текущий.
+    """
+    outer = _current_deadline.get()
+    if deadline is None or (outer is not None and outer.expires_at <= deadline.expires_at):
+        yield outer
+        return
+
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def remaining_timeout(default: typing.Optional[float] = None) -> typing.Optional[float]:
+    """Возвращает таймаут для вызова внешней системы с учётом дедлайна.
+
+    Parameters
+    ----------
+    default : Optional[float]
+        Таймаут, который используется без дедлайна или если он меньше
+        оставшегося времени.
+
+    Raises
+    ------
+    DeadlineExceededError
+        Возбуждается в случае, если дедлайн уже наступил.
+
+    Returns
+    -------
+    Optional[float]
+        Таймаут в секундах, либо `default`, если дедлайн не установлен.
+    """
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    if deadline.expired():
+        raise DeadlineExceededError("Deadline exceeded before the call was made")
+
+    remaining = deadline.remaining()
+    return remaining if default is None else min(default, remaining)
@@ -17,6 +17,7 @@ __all__: typing.Sequence[str] = ("Aggregate", "EventSourcedAggregate")
 
 import abc
 import functools
+import inspect
 import typing
 
 from src.seedwork.domain.business_rule import BusinessRuleValidationMixin
@@ -25,6 +26,8 @@ from src.seedwork.domain.entity import Entity
 if typing.TYPE_CHECKING:
     from src.seedwork.domain.event import Event
 
+    _EventApplier: typing.TypeAlias = typing.Callable[["EventSourcedAggregate", Event], None]
+
 
 class Aggregate(Entity, BusinessRuleValidationMixin):
     """Основной класс для реализации агрегатов в контексте DDD."""
@@ -33,10 +36,23 @@ class Aggregate(Entity, BusinessRuleValidationMixin):
 
 
 class EventSourcedAggregate(Aggregate, abc.ABC):
-    """Основной класс для реализации подхода Event Sourcing в DDD агрегатах."""
+    """Основной класс для реализации подхода Event Sourcing в DDD агрегатах.
+
+    Чтобы агрегат можно было восстанавливать из снапшота, а не только
+    повтором всех событий, нужно установить `supports_snapshots` и
+    переопределить `snapshot_state` и `from_snapshot`. При несовместимом изменении состояния снапшота
+    нужно увеличить `__snapshot_schema__`: старые снапшоты будут
+    проигнорированы.
+    """
 
     __slots__: typing.Sequence[str] = ("_events", "_version",)
 
+    supports_snapshots: typing.ClassVar[bool] = False
+    """Сохраняются ли снапшоты агрегата."""
+
+    __snapshot_schema__: typing.ClassVar[int] = 1
+    """Версия схемы состояния, возвращаемого `snapshot_state`."""
+
     def __init__(self, version: int) -> None:
         self._events: list[Event] = []
         self._version = version
@@ -76,6 +92,65 @@ class EventSourcedAggregate(Aggregate, abc.ABC):
         self._clear_events()
         return events
 
+    @typing.final
+    def commit_events(self) -> typing.Sequence[Event]:
+        """Отмечает неприменённые события сохранёнными: версия агрегата
+        увеличивается на их количество, а очередь очищается.
+        """
+        events = self.collect_events()
+        self._version += len(events)
+        return events
+
+    @typing.final
+    def replay(self, events: typing.Iterable[Event]) -> None:
+        """Применяет уже сохранённые события, увеличивая версию агрегата.
+
+        В отличие от вызова `_aggregate` на каждое событие, обработчик
+        ищется в таблице класса агрегата по точному типу события, без
+        поиска по MRO и создания связанного метода.
+        """
+        table = _get_dispatch_table(type(self))
+        version = self._version
+        try:
+            for event in events:
+                event_cls = event.__class__
+                apply = table.get(event_cls)
+                if apply is None:
+                    apply = table[event_cls] = _resolve_applier(type(self), event_cls)
+                apply(self, event)
+                version += 1
+        finally:
+            # Версия соответствует последнему успешно применённому событию.
+            self._version = version
+
+    def snapshot_state(self) -> typing.Mapping[str, typing.Any]:
+        """Возвращает состояние агрегата для снапшота.
+
+        Raises
+        ------
+        NotImplementedError
+            Возбуждается в случае, если агрегат не поддерживает снапшоты.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support snapshots")
+
+    @classmethod
+    def from_snapshot(cls, state: typing.Mapping[str, typing.Any], version: int) -> typing.Self:
+        """Восстанавливает агрегат из состояния снапшота.
+
+        Parameters
+        ----------
+        state : Mapping[str, Any]
+            Состояние, полученное из `snapshot_state`.
+        version : int
+            Версия агрегата на момент снапшота.
+
+        Raises
+        ------
+        NotImplementedError
+            Возбуждается в случае, если агрегат не поддерживает снапшоты.
+        """
+        raise NotImplementedError(f"{cls.__name__} does not support snapshots")
+
     @typing.final
     def _record_that(self, event: Event) -> None:
         """Регистрирует событие и применяет его к текущему состоянию агрегата."""
@@ -85,7 +160,12 @@ class EventSourcedAggregate(Aggregate, abc.ABC):
     @typing.final
     def _reconstruct_from_event(self, event: Event) -> None:
         """Применяет событие к текущему состоянию агрегата."""
-        self._aggregate(event)
+        table = _get_dispatch_table(type(self))
+        event_cls = event.__class__
+        apply = table.get(event_cls)
+        if apply is None:
+            apply = table[event_cls] = _resolve_applier(type(self), event_cls)
+        apply(self, event)
 
     @functools.singledispatchmethod
     @abc.abstractmethod
@@ -96,3 +176,24 @@ class EventSourcedAggregate(Aggregate, abc.ABC):
         обработчики событий внутри агрегата.
         """
         raise ValueError(f"Unknown event {event!r}")
+
+
+_DISPATCH_TABLES: dict[type[EventSourcedAggregate], dict[type[Event], _EventApplier]] = {}
+"""Обработчики событий по точному типу события для каждого класса агрегата."""
+
+
+def _get_dispatch_table(aggregate_cls: type[EventSourcedAggregate]) -> dict[type[Event], _EventApplier]:
+    try:
+        return _DISPATCH_TABLES[aggregate_cls]
+    except KeyError:
+        return _DISPATCH_TABLES.setdefault(aggregate_cls, {})
+
+
+def _resolve_applier(aggregate_cls: type[EventSourcedAggregate], event_cls: type[Event]) -> _EventApplier:
+    method = inspect.getattr_static(aggregate_cls, "_aggregate")
+    if isinstance(method, functools.singledispatchmethod):
+        # Функции в реестре singledispatch не связаны с инстансом и
+        # принимают (self, event), поэтому их можно вызывать напрямую.
+        return typing.cast("_EventApplier", method.dispatcher.dispatch(event_cls))
+
+    return lambda aggregate, event: aggregate._aggregate(event)
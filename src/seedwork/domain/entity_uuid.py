@@ -22,52 +22,97 @@ import uuid
 from src.seedwork.domain.value_object import ValueObject
 
 
-@dataclasses.dataclass(frozen=True)
+_MAX_INTEGER: typing.Final[int] = 1 << 128
+
+
 class EntityId(ValueObject):
     """Основной класс для реализации идентификаторов
     сущностей/агрегатов в контексте DDD.
+
+    Хранит только 128-битное число. Строковое (в формате uuid) и hex
+    представления вычисляются при первом обращении и кешируются,
+    сравнение и хеширование используют только число.
+
+    Parameters
+    ----------
+    integer : int
+        Числовое представление айди.
+
+    Raises
+    ------
+    ValueError
+        Возбуждается в случае, если число не помещается в 128 бит.
     """
 
-    integer: int
-    """Числовое представление айди."""
+    __slots__: typing.Sequence[str] = ("_integer", "_string", "_hex")
+
+    _integer: int
+    _string: typing.Optional[str]
+    _hex: typing.Optional[str]
 
-    string: str
-    """Строковое представление айди."""
+    def __init__(self, integer: int, /) -> None:
+        if not 0 <= integer < _MAX_INTEGER:
+            raise ValueError(f"Entity id {integer} does not fit in 128 bits")
 
-    hex: str
-    """Айди в формате hex."""
+        object.__setattr__(self, "_integer", integer)
+        object.__setattr__(self, "_string", None)
+        object.__setattr__(self, "_hex", None)
 
     @classmethod
-    def next_id(cls) -> EntityId:
+    def next_id(cls) -> typing.Self:
         """Фабричный метод для создания случайного айди в формате uuid4."""
-        identifier = uuid.uuid4()
-        return cls(integer=identifier.int, string=str(identifier), hex=identifier.hex)
+        return cls(uuid.uuid4().int)
 
     @classmethod
-    def from_int(cls, integer: int, /) -> EntityId:
-        return EntityId(integer=integer, string=str(integer), hex=hex(integer))
+    def from_int(cls, integer: int, /) -> typing.Self:
+        return cls(integer)
 
     @classmethod
-    def from_str(cls, string: str, /) -> EntityId:
+    def from_str(cls, string: str, /) -> typing.Self:
+        """Создаёт айди из строки в формате uuid, либо из числа в
+        десятичной записи.
+        """
         if string.isdigit():
-            return cls.from_int(int(string))
+            return cls(int(string))
+
+        return cls(uuid.UUID(string).int)
+
+    @property
+    def integer(self) -> int:
+        """Числовое представление айди."""
+        return self._integer
+
+    @property
+    def string(self) -> str:
+        """Строковое представление айди в формате uuid."""
+        if self._string is None:
+            object.__setattr__(self, "_string", str(uuid.UUID(int=self._integer)))
+        return typing.cast(str, self._string)
+
+    @property
+    def hex(self) -> str:
+        """Айди в формате hex (32 символа, как `uuid.UUID.hex`)."""
+        if self._hex is None:
+            object.__setattr__(self, "_hex", f"{self._integer:032x}")
+        return typing.cast(str, self._hex)
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        raise dataclasses.FrozenInstanceError(f"cannot assign to field {name!r}")
+
+    def __delattr__(self, name: str) -> None:
+        raise dataclasses.FrozenInstanceError(f"cannot delete field {name!r}")
+
+    def __reduce__(self) -> tuple[typing.Any, ...]:
+        return type(self), (self._integer,)
 
-        obj = uuid.UUID(string)
-        return cls(
-            integer=obj.int,
-            string=string,
-            hex=obj.hex,
-        )
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.string!r})"
 
     def __hash__(self) -> int:
-        return self.integer
+        return hash(self._integer)
 
     def __eq__(self, other: typing.Any) -> bool:
         if not isinstance(other, EntityId):
             return NotImplemented
 
-        return (
-            self.integer == other.integer
-            and self.string == other.string
-            and self.hex == other.hex
-        )
+        return self._integer == other._integer
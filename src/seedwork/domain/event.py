@@ -27,8 +27,13 @@ class Event(ValueObject):
     """Основной класс для доменных событий в контексте DDD."""
 
     @classmethod
-    def from_dict(cls, mapping: dict[str, typing.Any]) -> Event:
-        pass
+    def from_dict(cls, mapping: dict[str, typing.Any]) -> typing.Self:
+        """Создаёт событие из словаря, полученного через `as_dict`."""
+        return cls(**mapping)
 
     def as_dict(self) -> dict[str, typing.Any]:
-        pass
+        """Возвращает поля события (без копирования вложенных значений).
+
+        Для хранения событий используйте `EventCodec`.
+        """
+        return {field.name: getattr(self, field.name) for field in dataclasses.fields(self)}
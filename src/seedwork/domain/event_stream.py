@@ -5,8 +5,12 @@ import dataclasses
 
 from src.seedwork.domain.event import Event
 
+if typing.TYPE_CHECKING:
+    from src.seedwork.domain.entity_uuid import EntityId
+
 
 @dataclasses.dataclass
 class EventStream:
     events: list[Event]
     version: int
+    aggregate_uuid: typing.Optional[EntityId] = None
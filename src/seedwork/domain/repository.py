@@ -21,6 +21,7 @@ __all__: typing.Sequence[str] = (
 )
 
 import abc
+import asyncio
 import typing
 
 from src.seedwork.domain.entity import Entity
@@ -63,6 +64,33 @@ class EventlessRepository(typing.Generic[EntityIdT, EntityT], abc.ABC):
         """
         ...
 
+    async def get_by_ids(
+        self, entity_ids: typing.Iterable[EntityIdT],
+    ) -> typing.Mapping[EntityIdT, EntityT]:
+        """Получает несколько обьектов сущностей/агрегатов по их айди.
+
+        Реализация по умолчанию конкурентно вызывает `get_by_id`,
+        конкретные хранилища могут переопределить её одним запросом.
+
+        Parameters
+        ----------
+        entity_ids : Iterable[EntityIdT]
+            Уникальные идентификаторы сущностей/агрегатов.
+
+        Returns
+        -------
+        Mapping[EntityIdT, EntityT]
+            Найденные сущности/агрегаты по их айди. Отсутствующие
+            в хранилище айди в результат не попадают.
+        """
+        entity_ids = list(entity_ids)
+        entities = await asyncio.gather(*(self.get_by_id(entity_id) for entity_id in entity_ids))
+        return {
+            entity_id: entity
+            for entity_id, entity in zip(entity_ids, entities)
+            if entity is not None
+        }
+
     @abc.abstractmethod
     async def insert(self, entity: EntityT) -> None:
         """Заносит обьект в хранилище.
@@ -22,3 +22,6 @@ import typing
 @dataclasses.dataclass(frozen=True)
 class ValueObject:
     """Основной класс для обьектов-значений в контексте DDD."""
+
+    # Без аннотации: аннотированный атрибут датакласс сочтёт полем.
+    __slots__ = ()
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import dataclasses
+import operator
+import types
+import typing
+
+import msgpack
+
+from src.seedwork.domain.entity_uuid import EntityId
+from src.seedwork.domain.event import Event
+
+_EventT = typing.TypeVar("_EventT", bound=type[Event])
+
+Upcaster: typing.TypeAlias = typing.Callable[[list[typing.Any]], list[typing.Any]]
+"""Переводит значения полей события из версии схемы N в N + 1."""
+
+
+class EventSchemaError(ValueError):
+    """Возбуждается в случае, если событие не может быть (де)сериализовано
+    по зарегистрированным схемам.
+    """
+
+
+def _identity(value: typing.Any) -> typing.Any:
+    return value
+
+
+def _encode_entity_id(value: typing.Optional[EntityId]) -> typing.Optional[str]:
+    return None if value is None else value.string
+
+
+def _decode_entity_id(value: typing.Optional[str]) -> typing.Optional[EntityId]:
+    return None if value is None else EntityId.from_str(value)
+
+
+def _decode_tuple(
+    value: typing.Optional[typing.Sequence[typing.Any]],
+) -> typing.Optional[tuple[typing.Any, ...]]:
+    return None if value is None else tuple(value)
+
+
+def _field_converters(
+    hint: typing.Any,
+) -> tuple[typing.Callable[..., typing.Any], typing.Callable[..., typing.Any]]:
+    # Optional[X] конвертируется так же, как X: конвертеры пропускают None.
+    if typing.get_origin(hint) in (typing.Union, types.UnionType):
+        arguments = [argument for argument in typing.get_args(hint) if argument is not type(None)]
+        if len(arguments) == 1:
+            hint = arguments[0]
+
+    if isinstance(hint, type) and issubclass(hint, EntityId):
+        return _encode_entity_id, _decode_entity_id
+    if hint is tuple or typing.get_origin(hint) is tuple:
+        return _identity, _decode_tuple
+
+    return _identity, _identity
+
+
+@dataclasses.dataclass(frozen=True)
+class EventSchema:
+    """Зарегистрированная версия схемы события со скомпилированными
+    кодировщиком и декодировщиком значений полей.
+    """
+
+    name: str
+    version: int
+    event_cls: type[Event]
+    field_names: tuple[str, ...]
+    encode_values: typing.Callable[[Event], list[typing.Any]]
+    decode_values: typing.Callable[[typing.Sequence[typing.Any]], Event]
+
+
+def _compile_schema(event_cls: type[Event], name: str, version: int) -> EventSchema:
+    hints = typing.get_type_hints(event_cls)
+    fields = [field for field in dataclasses.fields(event_cls) if field.init]
+    field_names = tuple(field.name for field in fields)
+    converters = [_field_converters(hints.get(field.name)) for field in fields]
+    encoders = [encode for encode, _ in converters]
+    decoders = [decode for _, decode in converters]
+
+    if not field_names:
+        def encode_values(event: Event) -> list[typing.Any]:
+            return []
+    elif all(encode is _identity for encode in encoders):
+        getter = operator.attrgetter(*field_names)
+        if len(field_names) == 1:
+            def encode_values(event: Event) -> list[typing.Any]:
+                return [getter(event)]
+        else:
+            def encode_values(event: Event) -> list[typing.Any]:
+                return list(getter(event))
+    else:
+        getters = [operator.attrgetter(field_name) for field_name in field_names]
+        pairs = list(zip(getters, encoders))
+
+        def encode_values(event: Event) -> list[typing.Any]:
+            return [encode(getter(event)) for getter, encode in pairs]
+
+    if all(decode is _identity for decode in decoders):
+        def decode_values(values: typing.Sequence[typing.Any]) -> Event:
+            return event_cls(**dict(zip(field_names, values, strict=True)))
+    else:
+        named_decoders = list(zip(field_names, decoders))
+
+        def decode_values(values: typing.Sequence[typing.Any]) -> Event:
+            return event_cls(**{
+                field_name: decode(value)
+                for (field_name, decode), value in zip(named_decoders, values, strict=True)
+            })
+
+    return EventSchema(name, version, event_cls, field_names, encode_values, decode_values)
+
+
+class EventRegistry:
+    """Реестр типов событий по стабильным именам.
+
+    Имя события не зависит от пути к классу, поэтому классы можно
+    переименовывать и переносить, не ломая сохранённые потоки.
+    """
+
+    __slots__: typing.Sequence[str] = ("_by_name", "_by_type", "_upcasters")
+
+    def __init__(self) -> None:
+        self._by_name: dict[str, EventSchema] = {}
+        self._by_type: dict[type[Event], EventSchema] = {}
+        self._upcasters: dict[tuple[str, int], Upcaster] = {}
+
+    def register(self, name: str, version: int = 1) -> typing.Callable[[_EventT], _EventT]:
+        """Декоратор, регистрирующий класс события.
+
+        Parameters
+        ----------
+        name : str
+            Стабильное имя события в хранилище.
+        version : int
+            Текущая версия схемы события. Увеличивается при изменении
+            полей, вместе с регистрацией `upcaster` для старой версии.
+        """
+        def decorator(event_cls: _EventT) -> _EventT:
+            self.add(event_cls, name, version)
+            return event_cls
+
+        return decorator
+
+    def add(self, event_cls: type[Event], name: str, version: int = 1) -> None:
+        """Регистрирует класс события. См. `register`."""
+        if name in self._by_name and self._by_name[name].event_cls is not event_cls:
+            raise EventSchemaError(f"Event name {name!r} is already registered")
+
+        schema = _compile_schema(event_cls, name, version)
+        self._by_name[name] = schema
+        self._by_type[event_cls] = schema
+
+    def upcaster(self, name: str, from_version: int) -> typing.Callable[[Upcaster], Upcaster]:
+        """Декоратор, регистрирующий перевод значений полей события
+        `name` из версии `from_version` в следующую.
+
+        Значения передаются списком в порядке полей датакласса той
+        версии, из которой выполняется перевод.
+        """
+        def decorator(upcaster: Upcaster) -> Upcaster:
+            self._upcasters[(name, from_version)] = upcaster
+            return upcaster
+
+        return decorator
+
+    def schema_for_type(self, event_cls: type[Event]) -> EventSchema:
+        try:
+            return self._by_type[event_cls]
+        except KeyError:
+            raise EventSchemaError(f"Event {event_cls.__qualname__} is not registered") from None
+
+    def schema_for_name(self, name: str) -> EventSchema:
+        try:
+            return self._by_name[name]
+        except KeyError:
+            raise EventSchemaError(f"Unknown event name {name!r}") from None
+
+    def upcast(self, name: str, version: int, values: list[typing.Any]) -> list[typing.Any]:
+        """Переводит значения полей из версии `version` в текущую."""
+        current = self.schema_for_name(name).version
+        if version > current:
+            raise EventSchemaError(f"Event {name!r} version {version} is newer than {current}")
+
+        while version < current:
+            try:
+                upcaster = self._upcasters[(name, version)]
+            except KeyError:
+                raise EventSchemaError(f"No upcaster for event {name!r} version {version}") from None
+            values = upcaster(values)
+            version += 1
+
+        return values
+
+
+class EncodedEvent:
+    """Закодированное событие, тело которого декодируется только при
+    обращении к `event`.
+
+    Имя и версия доступны сразу, поэтому события можно фильтровать по
+    типу, не разбирая их поля.
+    """
+
+    __slots__: typing.Sequence[str] = ("name", "version", "payload", "_codec", "_event")
+
+    def __init__(self, codec: EventCodec, name: str, version: int, payload: bytes) -> None:
+        self.name = name
+        self.version = version
+        self.payload = payload
+        self._codec = codec
+        self._event: typing.Optional[Event] = None
+
+    @property
+    def event(self) -> Event:
+        """Декодированное событие (декодируется один раз)."""
+        if self._event is None:
+            self._event = self._codec.decode_payload(self.name, self.version, self.payload)
+        return self._event
+
+    def __repr__(self) -> str:
+        return f"EncodedEvent(name={self.name!r}, version={self.version}, size={len(self.payload)})"
+
+
+class EventCodec:
+    """Компактный бинарный кодек событий на основе msgpack.
+
+    Событие кодируется как `[имя, версия, тело]`, где тело - отдельно
+    упакованный массив значений полей в порядке полей датакласса, без
+    имён полей. Кодировщики и декодировщики собираются один раз при
+    регистрации типа события.
+
+    Parameters
+    ----------
+    registry : EventRegistry
+        Реестр типов событий.
+    """
+
+    __slots__: typing.Sequence[str] = ("_registry", "_packer_options", "_unpacker_options")
+
+    def __init__(self, registry: EventRegistry) -> None:
+        self._registry = registry
+        # datetime с tzinfo упаковываются в стандартный Timestamp msgpack.
+        self._packer_options = {"datetime": True, "use_bin_type": True}
+        self._unpacker_options = {"timestamp": 3, "raw": False}
+
+    @property
+    def registry(self) -> EventRegistry:
+        return self._registry
+
+    def encode(self, event: Event) -> bytes:
+        schema = self._registry.schema_for_type(type(event))
+        payload = msgpack.packb(schema.encode_values(event), **self._packer_options)
+        return typing.cast(bytes, msgpack.packb([schema.name, schema.version, payload], use_bin_type=True))
+
+    def decode(self, data: bytes) -> Event:
+        return self.decode_lazy(data).event
+
+    def decode_lazy(self, data: bytes) -> EncodedEvent:
+        """Разбирает только заголовок события, см. `EncodedEvent`."""
+        try:
+            name, version, payload = msgpack.unpackb(data, raw=False)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise EventSchemaError("Malformed encoded event") from exc
+
+        return EncodedEvent(self, name, version, payload)
+
+    def decode_payload(self, name: str, version: int, payload: bytes) -> Event:
+        schema = self._registry.schema_for_name(name)
+        try:
+            values = msgpack.unpackb(payload, **self._unpacker_options)
+        except (ValueError, TypeError, msgpack.UnpackException) as exc:
+            raise EventSchemaError(f"Malformed payload of event {name!r}") from exc
+
+        if version != schema.version:
+            values = self._registry.upcast(name, version, values)
+
+        try:
+            return schema.decode_values(values)
+        except (TypeError, ValueError) as exc:
+            raise EventSchemaError(f"Payload does not match event {name!r} version {schema.version}") from exc
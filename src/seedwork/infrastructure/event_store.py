@@ -2,22 +2,61 @@ from __future__ import annotations
 
 import abc
 import dataclasses
+import logging
 
 import typing
 
-from src.seedwork.domain.aggregate import Aggregate
+from src.seedwork.domain.aggregate import EventSourcedAggregate
+from src.seedwork.domain.event_stream import EventStream
 
 if typing.TYPE_CHECKING:
     from src.seedwork.domain.entity_uuid import EntityId
-    from src.seedwork.domain.event_stream import EventStream
+    from src.seedwork.domain.event import Event
 
-AggregateT = typing.TypeVar("AggregateT", bound=Aggregate)
+AggregateT = typing.TypeVar("AggregateT", bound=EventSourcedAggregate)
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+
+_STREAM_BUCKETS: typing.Final[int] = 1 << 16
+"""Количество корзин, по которым хранилища раскладывают потоки."""
 
 
 class ConcurrentStreamWriteError(RuntimeError):
     pass
 
 
+def stream_bucket(aggregate_uuid: EntityId) -> int:
+    """Корзина потока. Хранилища сохраняют её вместе с коммитами, чтобы
+    фильтровать потоки партиции на своей стороне.
+    """
+    return aggregate_uuid.integer % _STREAM_BUCKETS
+
+
+def partition_of(aggregate_uuid: EntityId, partitions: int) -> int:
+    """Номер партиции потока при делении хранилища на `partitions` частей."""
+    return stream_bucket(aggregate_uuid) % partitions
+
+
+@dataclasses.dataclass(frozen=True)
+class RecordedEvent:
+    """Событие вместе с его местом в хранилище."""
+
+    position: int
+    """Позиция коммита в общем журнале хранилища. У событий одного
+    сохранения агрегата она общая.
+    """
+
+    aggregate_uuid: EntityId
+    """Айди потока (агрегата)."""
+
+    version: int
+    """Версия агрегата после применения события."""
+
+    event: Event
+    """Само событие."""
+
+
 class EventStore(typing.Generic[AggregateT], abc.ABC):
     __slots__ = ()
 
@@ -34,5 +73,288 @@ class EventStore(typing.Generic[AggregateT], abc.ABC):
         ...
 
     @abc.abstractmethod
-    async def append_to_stream(self, aggregate: AggregateT) -> None:
+    async def append_to_stream(self, aggregate_uuid: EntityId, aggregate: AggregateT) -> None:
+        """Дописывает все `uncommitted_events` агрегата в поток одной
+        записью и отмечает их сохранёнными.
+
+        Raises
+        ------
+        ConcurrentStreamWriteError
+            Возбуждается в случае, если версия потока уже не совпадает
+            с версией агрегата (поток дописал кто-то другой).
+        """
+
+    async def iter_stream(self, aggregate_uuid: EntityId, from_version: int = 0) -> typing.AsyncIterator[Event]:
+        """Отдаёт события потока с версией больше `from_version`, не
+        загружая весь поток в память (если хранилище это позволяет).
+        """
+        stream = await self.load_stream(aggregate_uuid)
+        for event in stream.events[from_version:]:
+            yield event
+
+    async def iter_all(
+        self,
+        batch_size: int = 1000,
+        partition: typing.Optional[int] = None,
+        partitions: int = 1,
+    ) -> typing.AsyncIterator[EventStream]:
+        """Отдаёт потоки по одному, читая хранилище пачками по
+        `batch_size` записей (если хранилище это позволяет).
+
+        Если указана `partition`, отдаются только потоки, для которых
+        `partition_of(aggregate_uuid, partitions) == partition`.
+        """
+        for stream in await self.load_all():
+            if partition is None or (
+                stream.aggregate_uuid is not None
+                and partition_of(stream.aggregate_uuid, partitions) == partition
+            ):
+                yield stream
+
+    async def read_all_from(self, position: int, limit: int) -> typing.Sequence[RecordedEvent]:
+        """Возвращает события коммитов с позицией больше `position` в
+        порядке позиций, не больше `limit` коммитов.
+
+        Позиции растут, но могут иметь пропуски: коммит может стать
+        видимым позже коммитов с большими позициями, а позиция записи,
+        не дошедшей до хранилища, остаётся пустой.
+
+        Raises
+        ------
+        NotImplementedError
+            Возбуждается в случае, если хранилище не ведёт общий журнал.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support global reads")
+
+    async def read_positions(self, positions: typing.Collection[int]) -> typing.Sequence[RecordedEvent]:
+        """Возвращает события коммитов с указанными позициями в порядке
+        позиций. Позиции без коммитов пропускаются.
+
+        Raises
+        ------
+        NotImplementedError
+            Возбуждается в случае, если хранилище не ведёт общий журнал.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support global reads")
+
+    async def last_position(self) -> int:
+        """Возвращает позицию последнего коммита, 0 - если коммитов нет."""
+        raise NotImplementedError(f"{type(self).__name__} does not support global reads")
+
+
+@dataclasses.dataclass
+class _StoredStream:
+    events: list[Event] = dataclasses.field(default_factory=list)
+
+
+class InMemoryEventStore(EventStore[AggregateT]):
+    """Хранилище событий в памяти процесса."""
+
+    __slots__ = ("_streams", "_log")
+
+    def __init__(self) -> None:
+        self._streams: dict[EntityId, _StoredStream] = {}
+        # Общий журнал коммитов, позиция коммита - его индекс + 1.
+        # Удаление потока не удаляет его коммиты из журнала.
+        self._log: list[list[RecordedEvent]] = []
+
+    async def load_all(self) -> typing.Sequence[EventStream]:
+        return [
+            EventStream(list(stream.events), len(stream.events), aggregate_uuid)
+            for aggregate_uuid, stream in self._streams.items()
+        ]
+
+    async def load_stream(self, aggregate_uuid: EntityId) -> EventStream:
+        stream = self._streams.get(aggregate_uuid, _StoredStream())
+        return EventStream(list(stream.events), len(stream.events), aggregate_uuid)
+
+    async def delete_stream(self, aggregate_uuid: EntityId) -> None:
+        self._streams.pop(aggregate_uuid, None)
+
+    async def append_to_stream(self, aggregate_uuid: EntityId, aggregate: AggregateT) -> None:
+        events = aggregate.uncommitted_events
+        if not events:
+            return
+
+        stream = self._streams.setdefault(aggregate_uuid, _StoredStream())
+        if len(stream.events) != aggregate.version:
+            raise ConcurrentStreamWriteError(
+                f"Stream {aggregate_uuid.string} is at version {len(stream.events)}, "
+                f"aggregate expected {aggregate.version}"
+            )
+
+        position = len(self._log) + 1
+        self._log.append([
+            RecordedEvent(position, aggregate_uuid, len(stream.events) + offset, event)
+            for offset, event in enumerate(events, 1)
+        ])
+        stream.events.extend(events)
+        aggregate.commit_events()
+
+    async def read_all_from(self, position: int, limit: int) -> typing.Sequence[RecordedEvent]:
+        return [record for commit in self._log[position:position + limit] for record in commit]
+
+    async def read_positions(self, positions: typing.Collection[int]) -> typing.Sequence[RecordedEvent]:
+        return [
+            record
+            for position in sorted(positions)
+            if 0 < position <= len(self._log)
+            for record in self._log[position - 1]
+        ]
+
+    async def last_position(self) -> int:
+        return len(self._log)
+
+
+@dataclasses.dataclass(frozen=True)
+class Snapshot:
+    """Состояние агрегата на определённой версии потока."""
+
+    version: int
+    """Версия агрегата (количество событий) на момент снапшота."""
+
+    schema: int
+    """Версия схемы состояния (`__snapshot_schema__` агрегата)."""
+
+    state: typing.Mapping[str, typing.Any]
+    """Состояние, полученное из `snapshot_state`."""
+
+
+class SnapshotStore(abc.ABC):
+    __slots__ = ()
+
+    @abc.abstractmethod
+    async def load_snapshot(self, aggregate_uuid: EntityId) -> typing.Optional[Snapshot]:
+        """Возвращает последний снапшот потока, если он есть."""
+
+    @abc.abstractmethod
+    async def save_snapshot(self, aggregate_uuid: EntityId, snapshot: Snapshot) -> None:
+        """Сохраняет снапшот, если он новее уже сохранённого."""
+
+    @abc.abstractmethod
+    async def delete_snapshot(self, aggregate_uuid: EntityId) -> None:
         ...
+
+
+class InMemorySnapshotStore(SnapshotStore):
+    __slots__ = ("_snapshots",)
+
+    def __init__(self) -> None:
+        self._snapshots: dict[EntityId, Snapshot] = {}
+
+    async def load_snapshot(self, aggregate_uuid: EntityId) -> typing.Optional[Snapshot]:
+        return self._snapshots.get(aggregate_uuid)
+
+    async def save_snapshot(self, aggregate_uuid: EntityId, snapshot: Snapshot) -> None:
+        current = self._snapshots.get(aggregate_uuid)
+        if current is None or current.version < snapshot.version:
+            self._snapshots[aggregate_uuid] = snapshot
+
+    async def delete_snapshot(self, aggregate_uuid: EntityId) -> None:
+        self._snapshots.pop(aggregate_uuid, None)
+
+
+class EventSourcedRepository(typing.Generic[AggregateT]):
+    """Загружает и сохраняет event sourced агрегаты, ограничивая
+    стоимость загрузки снапшотами.
+
+    Агрегат загружается из последнего снапшота, после чего применяются
+    только события после него. Если снапшота нет, его схема устарела
+    или из него не удалось восстановить агрегат, все события потока
+    применяются к `aggregate_cls(0)`.
+
+    Parameters
+    ----------
+    event_store : EventStore[AggregateT]
+        Хранилище событий.
+    aggregate_cls : type[AggregateT]
+        Класс агрегата, конструктор которого принимает версию.
+    snapshot_store : Optional[SnapshotStore]
+        Хранилище снапшотов. None - снапшоты не используются.
+    snapshot_every : int
+        Снапшот сохраняется каждый раз, когда версия агрегата пересекает
+        очередное кратное этому числу.
+    """
+
+    __slots__ = ("_event_store", "_aggregate_cls", "_snapshot_store", "_snapshot_every")
+
+    def __init__(
+        self,
+        event_store: EventStore[AggregateT],
+        aggregate_cls: type[AggregateT],
+        snapshot_store: typing.Optional[SnapshotStore] = None,
+        snapshot_every: int = 100,
+    ) -> None:
+        if snapshot_every <= 0:
+            raise ValueError("Snapshot interval must be positive")
+
+        self._event_store = event_store
+        self._aggregate_cls = aggregate_cls
+        self._snapshot_store = snapshot_store
+        self._snapshot_every = snapshot_every
+
+    async def get_by_id(self, aggregate_uuid: EntityId) -> typing.Optional[AggregateT]:
+        """Загружает агрегат. Вернёт None, если поток пуст."""
+        aggregate = await self._load_snapshot(aggregate_uuid)
+        if aggregate is None:
+            aggregate = self._aggregate_cls(0)
+
+        tail = self._event_store.iter_stream(aggregate_uuid, aggregate.version)
+        aggregate.replay([event async for event in tail])
+        if aggregate.version == 0:
+            return None
+
+        return aggregate
+
+    async def save(self, aggregate_uuid: EntityId, aggregate: AggregateT) -> None:
+        """Сохраняет новые события агрегата и, при необходимости, снапшот.
+
+        Raises
+        ------
+        ConcurrentStreamWriteError
+            Возбуждается в случае, если поток дописал кто-то другой.
+        """
+        previous_version = aggregate.version
+        await self._event_store.append_to_stream(aggregate_uuid, aggregate)
+
+        if (
+            self._snapshot_store is not None
+            and type(aggregate).supports_snapshots
+            and aggregate.version // self._snapshot_every > previous_version // self._snapshot_every
+        ):
+            await self._save_snapshot(aggregate_uuid, aggregate)
+
+    async def delete(self, aggregate_uuid: EntityId) -> None:
+        """Удаляет поток агрегата вместе со снапшотом."""
+        await self._event_store.delete_stream(aggregate_uuid)
+        if self._snapshot_store is not None:
+            await self._snapshot_store.delete_snapshot(aggregate_uuid)
+
+    async def _load_snapshot(self, aggregate_uuid: EntityId) -> typing.Optional[AggregateT]:
+        if self._snapshot_store is None or not self._aggregate_cls.supports_snapshots:
+            return None
+
+        snapshot = await self._snapshot_store.load_snapshot(aggregate_uuid)
+        if snapshot is None:
+            return None
+        if snapshot.schema != self._aggregate_cls.__snapshot_schema__:
+            _LOGGER.info(
+                "Ignoring snapshot of %s with schema %d (expected %d)",
+                aggregate_uuid.string, snapshot.schema, self._aggregate_cls.__snapshot_schema__,
+            )
+            return None
+
+        try:
+            return self._aggregate_cls.from_snapshot(snapshot.state, snapshot.version)
+        except (KeyError, TypeError, ValueError):
+            _LOGGER.warning("Incompatible snapshot of %s, replaying full stream", aggregate_uuid.string, exc_info=True)
+            return None
+
+    async def _save_snapshot(self, aggregate_uuid: EntityId, aggregate: AggregateT) -> None:
+        assert self._snapshot_store is not None
+        snapshot = Snapshot(aggregate.version, type(aggregate).__snapshot_schema__, aggregate.snapshot_state())
+        try:
+            await self._snapshot_store.save_snapshot(aggregate_uuid, snapshot)
+        except Exception:
+            # События уже сохранены, без снапшота загрузка лишь медленнее.
+            _LOGGER.exception("Failed to save snapshot of %s", aggregate_uuid.string)
@@ -5,50 +5,127 @@ import typing
 
 from dependency_injector.providers import Provider
 from dependency_injector.providers import Factory
-from dependency_injector.providers import Singleton
+from dependency_injector.providers import BaseSingleton
+from dependency_injector.providers import ContextLocalSingleton
 from dependency_injector.providers import Dependency
+from dependency_injector.providers import Selector
 from dependency_injector.containers import Container
 from dependency_injector.wiring import Provide
 from dependency_injector.wiring import inject
 from dependency_injector import providers
 
 from src.seedwork.application.ioc import DependencyProvider
+from src.seedwork.application.ioc import DependencyScope
+from src.seedwork.application.ioc import Lifetime
 
 Provide = Provide
 inject = inject
 
 
-def resolve_provider_by_type(container: Container, cls: type) -> typing.Optional[Provider]:
-    def inspect_provider(provider: Provider) -> bool:
-        if isinstance(provider, (Factory, Singleton)):
-            return inspect.isclass(provider.cls) and issubclass(provider.cls, cls)
-        elif isinstance(provider, Dependency):
-            return issubclass(provider.instance_of, cls)
+def _base_types(cls: type) -> typing.Set[type]:
+    # `object` есть у любого провайдера, по нему зависимость не ищут.
+    return set(cls.__mro__) - {object}
 
-        return False
 
-    matching_providers = inspect.getmembers(
-        container,
-        inspect_provider,
-    )
-    if matching_providers:
-        if len(matching_providers) > 1:
-            raise ValueError(
-                f"Cannot uniquely resolve {cls}. Found IDK matching resources."
-            )
-        return matching_providers[0][1]
+def provided_types(provider: Provider) -> typing.Set[type]:
+    """Возвращает все типы, инстансы которых может отдать провайдер,
+    кроме `object`.
+    """
+    if isinstance(provider, (Factory, BaseSingleton)):
+        return _base_types(provider.cls) if inspect.isclass(provider.cls) else set()
+    elif isinstance(provider, Dependency):
+        return _base_types(provider.instance_of)
+    elif isinstance(provider, providers.Object):
+        return _base_types(type(provider.provides))
+    elif isinstance(provider, Selector):
+        # Какая реализация будет выбрана, зависит от конфигурации, поэтому
+        # селектор гарантирует лишь общие для всех вариантов типы.
+        options = [provided_types(option) for option in provider.providers.values()]
+        return set.intersection(*options) if options else set()
+
+    return set()
+
+
+def provider_lifetime(provider: Provider) -> Lifetime:
+    """Возвращает время жизни инстансов, которые отдаёт провайдер."""
+    if isinstance(provider, ContextLocalSingleton):
+        return Lifetime.SCOPED
+    elif isinstance(provider, (BaseSingleton, providers.Object)):
+        return Lifetime.SINGLETON
+    elif isinstance(provider, Selector):
+        selected = provider.providers.get(provider.selector())
+        return provider_lifetime(selected) if selected is not None else Lifetime.TRANSIENT
 
-    return None
+    return Lifetime.TRANSIENT
 
 
-class IocProvider(DependencyProvider):
-    def __init__(self, container):
+def _scoped_providers(provider: Provider) -> typing.Iterator[ContextLocalSingleton]:
+    if isinstance(provider, ContextLocalSingleton):
+        yield provider
+    elif isinstance(provider, Selector):
+        for option in provider.providers.values():
+            yield from _scoped_providers(option)
+
+
+class IocProvider(DependencyProvider[typing.Any, typing.Any]):
+    def __init__(self, container: Container, *containers: Container) -> None:
         self.container = container
+        self._containers: list[Container] = []
+        self._providers_by_type: dict[type, list[Provider]] = {}
+        self._scoped_providers: list[ContextLocalSingleton] = []
+        for attached in (container, *containers):
+            self.attach_container(attached)
+
+    def _index_provider(self, provider: Provider) -> None:
+        for provided_type in provided_types(provider):
+            type_providers = self._providers_by_type.setdefault(provided_type, [])
+            if provider not in type_providers:
+                type_providers.append(provider)
+
+    def attach_container(self, container: Container) -> None:
+        """Добавляет контейнер, провайдеры которого будут проиндексированы по типам."""
+        self._containers.append(container)
+        for provider in container.providers.values():
+            self._index_provider(provider)
+            self._scoped_providers.extend(_scoped_providers(provider))
 
-    def register_dependency(self, identifier, dependency_instance):
-        setattr(self.container, identifier, providers.Object(dependency_instance))
+    def register_dependency(self, identifier: typing.Any, dependency_instance: typing.Any) -> None:
+        provider = providers.Object(dependency_instance)
+        if isinstance(identifier, type):
+            # Явная регистрация по типу перекрывает найденные ранее провайдеры.
+            self._providers_by_type[identifier] = [provider]
+            return
 
-    def get_dependency(self, identifier):
-        provider = resolve_provider_by_type(self.container, identifier)
-        instance = provider()
+        setattr(self.container, identifier, provider)
+        self._index_provider(provider)
+
+    def get_dependency(self, identifier: typing.Any) -> typing.Any:
+        type_providers = self._providers_by_type.get(identifier)
+        if not type_providers:
+            raise KeyError(f"No provider found for {identifier!r}")
+        if len(type_providers) > 1:
+            raise ValueError(
+                f"Cannot uniquely resolve {identifier}. Found {len(type_providers)} matching resources."
+            )
+
+        instance = type_providers[0]()
         return instance
+
+    def has_dependency(self, identifier: typing.Any) -> bool:
+        return len(self._providers_by_type.get(identifier, ())) == 1
+
+    def get_lifetime(self, identifier: typing.Any) -> Lifetime:
+        type_providers = self._providers_by_type.get(identifier)
+        if not type_providers or len(type_providers) > 1:
+            return Lifetime.TRANSIENT
+
+        return provider_lifetime(type_providers[0])
+
+    def create_scope(self) -> DependencyScope:
+        return DependencyScope(finalizers=(self._reset_scoped_providers,))
+
+    def _reset_scoped_providers(self) -> None:
+        # Инстансы ContextLocalSingleton хранятся в contextvars текущей задачи,
+        # поэтому сброс затрагивает только завершившийся контекст.
+        for provider in self._scoped_providers:
+            provider.reset()
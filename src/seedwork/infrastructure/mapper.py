@@ -15,3 +15,11 @@ class DataMapper(typing.Generic[MapperEntityT, MapperModelT], abc.ABC):
     @abc.abstractmethod
     def entity_to_model(self, entity: MapperEntityT) -> MapperModelT:
         ...
+
+    def models_to_entities(self, instances: typing.Iterable[MapperModelT]) -> list[MapperEntityT]:
+        model_to_entity = self.model_to_entity
+        return [model_to_entity(instance) for instance in instances]
+
+    def entities_to_models(self, entities: typing.Iterable[MapperEntityT]) -> list[MapperModelT]:
+        entity_to_model = self.entity_to_model
+        return [entity_to_model(entity) for entity in entities]
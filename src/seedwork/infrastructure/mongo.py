@@ -0,0 +1,487 @@
+from __future__ import annotations
+
+import abc
+import dataclasses
+import datetime
+import importlib
+import logging
+import typing
+
+import pymongo
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+from pymongo.errors import PyMongoError
+
+from src.seedwork.deadline import remaining_timeout
+from src.seedwork.application.command_queue import CommandStore
+from src.seedwork.application.command_queue import QueuedCommand
+from src.seedwork.application.outbox import Outbox
+from src.seedwork.application.outbox import OutboxMessage
+from src.seedwork.domain.aggregate import EventSourcedAggregate
+from src.seedwork.domain.entity_uuid import EntityId
+from src.seedwork.domain.event_stream import EventStream
+from src.seedwork.infrastructure.event_codec import EventCodec
+from src.seedwork.infrastructure.event_codec import EventSchemaError
+from src.seedwork.infrastructure.event_store import ConcurrentStreamWriteError
+from src.seedwork.infrastructure.event_store import EventStore
+from src.seedwork.infrastructure.event_store import RecordedEvent
+from src.seedwork.infrastructure.event_store import Snapshot
+from src.seedwork.infrastructure.event_store import SnapshotStore
+from src.seedwork.infrastructure.event_store import stream_bucket
+from src.seedwork.infrastructure.projection import CheckpointStore
+from src.seedwork.infrastructure.projection import Projection
+
+if typing.TYPE_CHECKING:
+    from motor.motor_asyncio import AsyncIOMotorCollection
+
+    from src.seedwork.application.command import Command
+    from src.seedwork.application.event import IntegrationEvent
+    from src.seedwork.domain.event import Event
+    from src.seedwork.application.module import TransactionContext
+    from src.seedwork.application.middleware import CallNext
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+_PENDING: typing.Final[str] = "pending"
+_DONE: typing.Final[str] = "done"
+_FAILED: typing.Final[str] = "failed"
+
+
+class MongoTimeoutMiddleware:
+    """Мидлварь, ограничивающая операции Motor/PyMongo в обработчике
+    временем, оставшимся до дедлайна транзакции.
+
+    Использует `pymongo.timeout`, поэтому таймаут применяется ко всем
+    операциям внутри обработчика без изменения репозиториев.
+    """
+
+    __slots__: typing.Sequence[str] = ()
+
+    async def __call__(
+        self,
+        ctx: TransactionContext,
+        task: typing.Any,
+        handler: typing.Callable[..., typing.Any],
+        call_next: CallNext,
+    ) -> typing.Any:
+        timeout = remaining_timeout()
+        if timeout is None:
+            return await call_next()
+
+        with pymongo.timeout(timeout):
+            return await call_next()
+
+
+def _type_path(cls: type) -> str:
+    return f"{cls.__module__}:{cls.__qualname__}"
+
+
+def _resolve_type(path: str) -> type:
+    module_name, _, qualname = path.partition(":")
+    resolved: typing.Any = importlib.import_module(module_name)
+    for attribute in qualname.split("."):
+        resolved = getattr(resolved, attribute)
+    return typing.cast(type, resolved)
+
+
+def _dump_event(event: Event) -> dict[str, typing.Any]:
+    return {"type": _type_path(type(event)), "fields": dataclasses.asdict(event)}
+
+
+def _load_event(document: typing.Mapping[str, typing.Any]) -> typing.Any:
+    event_cls = _resolve_type(document["type"])
+    return event_cls(**document["fields"])
+
+
+class MongoCommandStore(CommandStore):
+    """Хранилище фоновых команд в коллекции Mongo.
+
+    Ключ идемпотентности используется как `_id` документа, поэтому
+    повторная постановка отбрасывается уникальным индексом. Команды
+    сохраняются как поля датакласса, вложенные датаклассы не
+    восстанавливаются.
+    """
+
+    __slots__: typing.Sequence[str] = ("_collection",)
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self._collection = collection
+
+    async def add(self, queued: QueuedCommand) -> bool:
+        try:
+            await self._collection.insert_one({
+                "_id": queued.idempotency_key,
+                "type": _type_path(type(queued.command)),
+                "fields": dataclasses.asdict(queued.command),
+                "status": _PENDING,
+                "attempts": queued.attempts,
+                "created_at": datetime.datetime.now(datetime.timezone.utc),
+            })
+        except DuplicateKeyError:
+            return False
+
+        return True
+
+    async def pending(self) -> typing.Sequence[QueuedCommand]:
+        pending = []
+        async for document in self._collection.find({"status": _PENDING}).sort("created_at"):
+            command_cls: type[Command] = _resolve_type(document["type"])
+            pending.append(QueuedCommand(
+                command=command_cls(**document["fields"]),
+                idempotency_key=document["_id"],
+                attempts=document["attempts"],
+            ))
+
+        return pending
+
+    async def complete(self, idempotency_key: str) -> None:
+        await self._collection.update_one({"_id": idempotency_key}, {"$set": {"status": _DONE}})
+
+    async def reschedule(self, idempotency_key: str, attempts: int) -> None:
+        await self._collection.update_one({"_id": idempotency_key}, {"$set": {"attempts": attempts}})
+
+    async def fail(self, idempotency_key: str, error: str) -> None:
+        await self._collection.update_one(
+            {"_id": idempotency_key}, {"$set": {"status": _FAILED, "error": error}},
+        )
+
+
+class MongoOutbox(Outbox):
+    """Outbox интеграционных событий в коллекции Mongo.
+
+    События сохраняются как поля датакласса, так же как и фоновые
+    команды в `MongoCommandStore`. Доставленные события не удаляются,
+    а отмечаются полем `published`; доставка отдельным потребителям
+    хранится в поле `delivered`, исключённые из доставки сообщения
+    отмечаются полем `dead_lettered_at`.
+
+    `_id` сообщения - ObjectId, созданный драйвером при сохранении:
+    ObjectId одного процесса монотонно растут, поэтому сообщения
+    доставляются в порядке сохранения, в том числе внутри одного вызова
+    `save`.
+    """
+
+    __slots__: typing.Sequence[str] = ("_collection",)
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self._collection = collection
+
+    async def save(self, events: typing.Sequence[IntegrationEvent]) -> None:
+        created_at = datetime.datetime.now(datetime.timezone.utc)
+        await self._collection.insert_many([
+            {
+                "_id": ObjectId(),
+                **_dump_event(event),
+                "published": False,
+                "delivered": [],
+                "attempts": 0,
+                "created_at": created_at,
+            }
+            for event in events
+        ], ordered=True)
+
+    async def fetch_batch(self, limit: int) -> typing.Sequence[OutboxMessage]:
+        batch = []
+        cursor = self._collection.find(
+            {"published": False, "dead_lettered_at": None},
+        ).sort("_id", 1).limit(limit)
+        async for document in cursor:
+            batch.append(OutboxMessage(
+                str(document["_id"]),
+                _load_event(document),
+                frozenset(document.get("delivered", ())),
+                document.get("attempts", 0),
+            ))
+
+        return batch
+
+    async def mark_delivered(self, message_ids: typing.Sequence[str], consumer: str) -> None:
+        await self._collection.update_many(
+            {"_id": {"$in": [ObjectId(message_id) for message_id in message_ids]}},
+            {"$addToSet": {"delivered": consumer}},
+        )
+
+    async def mark_published(self, message_ids: typing.Sequence[str]) -> None:
+        await self._collection.update_many(
+            {"_id": {"$in": [ObjectId(message_id) for message_id in message_ids]}},
+            {"$set": {"published": True, "published_at": datetime.datetime.now(datetime.timezone.utc)}},
+        )
+
+    async def record_failure(self, message_ids: typing.Sequence[str]) -> None:
+        await self._collection.update_many(
+            {"_id": {"$in": [ObjectId(message_id) for message_id in message_ids]}},
+            {"$inc": {"attempts": 1}},
+        )
+
+    async def dead_letter(self, message_ids: typing.Sequence[str]) -> None:
+        await self._collection.update_many(
+            {"_id": {"$in": [ObjectId(message_id) for message_id in message_ids]}},
+            {"$set": {"dead_lettered_at": datetime.datetime.now(datetime.timezone.utc)}},
+        )
+
+
+class MongoEventStore(EventStore[EventSourcedAggregate]):
+    """Хранилище событий в коллекции Mongo.
+
+    Все события одного сохранения агрегата записываются одним
+    документом-коммитом `{stream_id, version, last_version, events}`, где
+    `version` - версия первого события коммита. Уникальный индекс по
+    `(stream_id, version)` обеспечивает оптимистичную блокировку:
+    конкурентный писатель с той же ожидаемой версией получит
+    `ConcurrentStreamWriteError`, а вставка одного документа атомарна.
+
+    Каждый коммит получает позицию в общем журнале из счётчика в
+    коллекции `<коллекция>_position` уже после вставки, поэтому
+    отклонённые записи позиций не расходуют. Коммит без позиции не виден
+    в журнале: пока позиция не записана, коммиты с большими позициями
+    могут быть прочитаны раньше (см. `ProjectionRunner`). Коммиты,
+    оставшиеся без позиции после падения процесса, получают её при
+    первом обращении к хранилищу.
+
+    Parameters
+    ----------
+    collection : AsyncIOMotorCollection
+        Коллекция коммитов.
+    codec : Optional[EventCodec]
+        Кодек событий. Если указан, события хранятся компактным бинарным
+        представлением под стабильными именами, иначе - полями датакласса
+        с путём к классу. Коммиты в формате полей читаются в любом случае,
+        поэтому кодек можно включить для уже существующих потоков.
+    """
+
+    __slots__: typing.Sequence[str] = ("_collection", "_codec", "_indexes_created")
+
+    def __init__(self, collection: AsyncIOMotorCollection, codec: typing.Optional[EventCodec] = None) -> None:
+        self._collection = collection
+        self._codec = codec
+        self._indexes_created = False
+
+    async def ensure_indexes(self) -> None:
+        """Создаёт индекс, на котором держится проверка версии, и
+        дописывает позиции коммитам, оставшимся без неё.
+        """
+        if not self._indexes_created:
+            await self._collection.create_index([("stream_id", 1), ("version", 1)], unique=True)
+            await self._collection.create_index(
+                "position", unique=True, partialFilterExpression={"position": {"$exists": True}},
+            )
+            self._indexes_created = True
+            await self._assign_missing_positions()
+
+    def _positions(self) -> AsyncIOMotorCollection:
+        return self._collection.database[f"{self._collection.name}_position"]
+
+    async def _next_position(self) -> int:
+        counter = await self._positions().find_one_and_update(
+            {"_id": self._collection.name},
+            {"$inc": {"position": 1}},
+            upsert=True,
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        return int(counter["position"])
+
+    async def _assign_position(self, commit_id: typing.Any) -> None:
+        # Если позицию уже записал другой процесс, выделенная останется
+        # пропуском журнала.
+        await self._collection.update_one(
+            {"_id": commit_id, "position": {"$exists": False}},
+            {"$set": {"position": await self._next_position()}},
+        )
+
+    async def _assign_missing_positions(self) -> None:
+        cursor = self._collection.find({"position": {"$exists": False}}, {"_id": 1}).sort("_id", 1)
+        async for commit in cursor:
+            await self._assign_position(commit["_id"])
+
+    async def append_to_stream(self, aggregate_uuid: EntityId, aggregate: EventSourcedAggregate) -> None:
+        events = aggregate.uncommitted_events
+        if not events:
+            return
+
+        await self.ensure_indexes()
+        try:
+            inserted = await self._collection.insert_one({
+                "stream_id": aggregate_uuid.string,
+                "bucket": stream_bucket(aggregate_uuid),
+                "version": aggregate.version + 1,
+                "last_version": aggregate.version + len(events),
+                "events": [self._dump(event) for event in events],
+                "created_at": datetime.datetime.now(datetime.timezone.utc),
+            })
+        except DuplicateKeyError as exc:
+            raise ConcurrentStreamWriteError(
+                f"Stream {aggregate_uuid.string} was modified after version {aggregate.version}"
+            ) from exc
+
+        aggregate.commit_events()
+        try:
+            await self._assign_position(inserted.inserted_id)
+        except PyMongoError:
+            # Коммит уже сохранён, позицию ему допишет `ensure_indexes`
+            # при следующем запуске.
+            _LOGGER.exception("Failed to assign event log position to stream %s commit", aggregate_uuid.string)
+
+    async def iter_stream(self, aggregate_uuid: EntityId, from_version: int = 0) -> typing.AsyncIterator[Event]:
+        cursor = self._collection.find(
+            {"stream_id": aggregate_uuid.string, "last_version": {"$gt": from_version}},
+            {"version": 1, "events": 1},
+        ).sort("version", 1)
+        async for commit in cursor:
+            # Коммит может начинаться раньше `from_version`.
+            skip = max(from_version - commit["version"] + 1, 0)
+            for document in commit["events"][skip:]:
+                yield self._load(document)
+
+    async def load_stream(self, aggregate_uuid: EntityId) -> EventStream:
+        events = [event async for event in self.iter_stream(aggregate_uuid)]
+        return EventStream(events, len(events), aggregate_uuid)
+
+    async def iter_all(
+        self,
+        batch_size: int = 1000,
+        partition: typing.Optional[int] = None,
+        partitions: int = 1,
+    ) -> typing.AsyncIterator[EventStream]:
+        query = {} if partition is None else {"bucket": {"$mod": [partitions, partition]}}
+        cursor = self._collection.find(query, {"stream_id": 1, "events": 1}).sort(
+            [("stream_id", 1), ("version", 1)],
+        ).batch_size(batch_size)
+
+        stream: typing.Optional[EventStream] = None
+        stream_id = None
+        async for commit in cursor:
+            if stream is None or stream_id != commit["stream_id"]:
+                if stream is not None:
+                    yield stream
+                stream_id = commit["stream_id"]
+                stream = EventStream([], 0, EntityId.from_str(stream_id))
+
+            stream.events.extend(self._load(document) for document in commit["events"])
+            stream.version = len(stream.events)
+
+        if stream is not None:
+            yield stream
+
+    async def load_all(self) -> typing.Sequence[EventStream]:
+        return [stream async for stream in self.iter_all()]
+
+    async def delete_stream(self, aggregate_uuid: EntityId) -> None:
+        await self._collection.delete_many({"stream_id": aggregate_uuid.string})
+
+    async def read_all_from(self, position: int, limit: int) -> typing.Sequence[RecordedEvent]:
+        await self.ensure_indexes()
+        cursor = self._collection.find(
+            {"position": {"$gt": position}}, {"stream_id": 1, "version": 1, "position": 1, "events": 1},
+        ).sort("position", 1).limit(limit)
+        return await self._records(cursor)
+
+    async def read_positions(self, positions: typing.Collection[int]) -> typing.Sequence[RecordedEvent]:
+        cursor = self._collection.find(
+            {"position": {"$in": list(positions)}}, {"stream_id": 1, "version": 1, "position": 1, "events": 1},
+        ).sort("position", 1)
+        return await self._records(cursor)
+
+    async def _records(self, cursor: typing.Any) -> typing.Sequence[RecordedEvent]:
+        records: list[RecordedEvent] = []
+        async for commit in cursor:
+            aggregate_uuid = EntityId.from_str(commit["stream_id"])
+            records.extend(
+                RecordedEvent(commit["position"], aggregate_uuid, commit["version"] + offset, self._load(document))
+                for offset, document in enumerate(commit["events"])
+            )
+
+        return records
+
+    async def last_position(self) -> int:
+        counter = await self._positions().find_one({"_id": self._collection.name})
+        return 0 if counter is None else int(counter["position"])
+
+    def _dump(self, event: Event) -> typing.Any:
+        if self._codec is None:
+            return _dump_event(event)
+        return self._codec.encode(event)
+
+    def _load(self, document: typing.Any) -> Event:
+        if isinstance(document, bytes):
+            if self._codec is None:
+                raise EventSchemaError("Stream contains encoded events, but no codec is configured")
+            return self._codec.decode(document)
+        return typing.cast("Event", _load_event(document))
+
+
+class MongoSnapshotStore(SnapshotStore):
+    """Хранилище снапшотов агрегатов в коллекции Mongo.
+
+    Хранится только последний снапшот потока, `_id` документа - айди
+    потока, как `stream_id` в `MongoEventStore`.
+    """
+
+    __slots__: typing.Sequence[str] = ("_collection",)
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self._collection = collection
+
+    async def load_snapshot(self, aggregate_uuid: EntityId) -> typing.Optional[Snapshot]:
+        document = await self._collection.find_one({"_id": aggregate_uuid.string})
+        if document is None:
+            return None
+
+        return Snapshot(document["version"], document["schema"], document["state"])
+
+    async def save_snapshot(self, aggregate_uuid: EntityId, snapshot: Snapshot) -> None:
+        try:
+            await self._collection.replace_one(
+                {"_id": aggregate_uuid.string, "version": {"$lt": snapshot.version}},
+                {"version": snapshot.version, "schema": snapshot.schema, "state": dict(snapshot.state)},
+                upsert=True,
+            )
+        except DuplicateKeyError:
+            # Уже сохранён снапшот не старее этого.
+            pass
+
+    async def delete_snapshot(self, aggregate_uuid: EntityId) -> None:
+        await self._collection.delete_one({"_id": aggregate_uuid.string})
+
+
+class MongoCheckpointStore(CheckpointStore):
+    """Чекпоинты проекций в коллекции Mongo, `_id` документа - имя проекции."""
+
+    __slots__: typing.Sequence[str] = ("_collection",)
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self._collection = collection
+
+    async def load(self, name: str) -> int:
+        document = await self._collection.find_one({"_id": name})
+        return 0 if document is None else int(document["position"])
+
+    async def save(self, name: str, position: int) -> None:
+        await self._collection.update_one({"_id": name}, {"$set": {"position": position}}, upsert=True)
+
+
+class MongoProjection(Projection):
+    """Проекция, read model которой хранится в коллекции Mongo.
+
+    Изменения всех событий пачки записываются одним `bulk_write`, а
+    запросы читают готовые документы коллекции.
+    """
+
+    __slots__: typing.Sequence[str] = ("_collection",)
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self._collection = collection
+
+    @abc.abstractmethod
+    def project(self, record: RecordedEvent) -> typing.Iterable[typing.Any]:
+        """Возвращает операции записи (`pymongo.UpdateOne` и т.п.) для
+        события. Фильтры операций должны учитывать версию события, чтобы
+        повторное применение ничего не меняло.
+        """
+
+    async def apply(self, records: typing.Sequence[RecordedEvent]) -> None:
+        operations = [operation for record in records for operation in self.project(record)]
+        if operations:
+            await self._collection.bulk_write(operations, ordered=True)
+
+    async def reset(self) -> None:
+        await self._collection.delete_many({})
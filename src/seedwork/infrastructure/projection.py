@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import abc
+import asyncio
+import concurrent.futures
+import logging
+import time
+import typing
+
+from src.seedwork.infrastructure.event_store import RecordedEvent
+
+if typing.TYPE_CHECKING:
+    from src.seedwork.domain.event import Event
+    from src.seedwork.infrastructure.event_store import EventStore
+
+    ProjectionSetup: typing.TypeAlias = typing.Callable[
+        [], typing.Awaitable[tuple[EventStore[typing.Any], "Projection"]]
+    ]
+    """Создаёт хранилище событий и проекцию в процессе пересборки.
+    Должна быть функцией уровня модуля, чтобы её можно было передать
+    в другой процесс.
+    """
+
+_LOGGER: typing.Final[logging.Logger] = logging.getLogger(__name__)
+
+
+class Projection(abc.ABC):
+    """Проекция, поддерживающая read model в актуальном состоянии по
+    событиям хранилища.
+
+    `apply` получает события пачками и должен записывать изменения
+    read model пакетно. Проекция должна быть идемпотентной по
+    `(aggregate_uuid, version)`: после сбоя или пересборки часть событий
+    может быть применена повторно.
+    """
+
+    __slots__: typing.Sequence[str] = ()
+
+    name: typing.ClassVar[str]
+    """Имя проекции, под которым хранится её чекпоинт."""
+
+    event_types: typing.ClassVar[tuple[type[Event], ...]] = ()
+    """Типы событий, которые нужны проекции. Пустой - все события."""
+
+    def handles(self, event: Event) -> bool:
+        return not self.event_types or isinstance(event, self.event_types)
+
+    @abc.abstractmethod
+    async def apply(self, records: typing.Sequence[RecordedEvent]) -> None:
+        """Применяет пачку событий к read model."""
+
+    async def reset(self) -> None:
+        """Очищает read model перед полной пересборкой."""
+
+
+class CheckpointStore(abc.ABC):
+    __slots__: typing.Sequence[str] = ()
+
+    @abc.abstractmethod
+    async def load(self, name: str) -> int:
+        """Возвращает позицию, до которой применены события проекции."""
+
+    @abc.abstractmethod
+    async def save(self, name: str, position: int) -> None:
+        ...
+
+
+class InMemoryCheckpointStore(CheckpointStore):
+    __slots__: typing.Sequence[str] = ("_positions",)
+
+    def __init__(self) -> None:
+        self._positions: dict[str, int] = {}
+
+    async def load(self, name: str) -> int:
+        return self._positions.get(name, 0)
+
+    async def save(self, name: str, position: int) -> None:
+        self._positions[name] = position
+
+
+class ProjectionRunner:
+    """Догоняющая подписка проекций на хранилище событий.
+
+    События читаются из общего журнала хранилища пачками, одним запросом
+    для всех проекций с одинаковым чекпоинтом; каждая проекция получает
+    только нужные ей события. Чекпоинт сохраняется после успешного
+    применения пачки; ошибка в одной проекции не останавливает
+    остальные, пачка будет применена повторно.
+
+    Журнал может содержать пропуски позиций: коммит мог получить
+    позицию, но ещё не стать видимым. Поэтому чтение останавливается на
+    пропуске и пропускает его, только если он не заполнился за
+    `gap_timeout` секунд. Пропущенные позиции перепроверяются ещё
+    `late_commit_timeout` секунд: появившийся в них коммит применяется к
+    проекциям, которые уже прошли его позицию.
+
+    Parameters
+    ----------
+    event_store : EventStore[Any]
+        Хранилище событий с общим журналом.
+    checkpoints : CheckpointStore
+        Хранилище чекпоинтов проекций.
+    projections : Sequence[Projection]
+        Проекции с уникальными именами.
+    batch_size : int
+        Максимальное количество коммитов в пачке.
+    poll_interval : float
+        Пауза в секундах между проверками журнала, когда новых событий нет.
+    gap_timeout : float
+        Сколько секунд ждать заполнения пропуска позиции.
+    late_commit_timeout : float
+        Сколько секунд перепроверять пропущенную позицию.
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_event_store",
+        "_checkpoints",
+        "_projections",
+        "_batch_size",
+        "_poll_interval",
+        "_gap_timeout",
+        "_late_commit_timeout",
+        "_positions",
+        "_gaps",
+        "_skipped",
+        "_task",
+    )
+
+    def __init__(
+        self,
+        event_store: EventStore[typing.Any],
+        checkpoints: CheckpointStore,
+        projections: typing.Sequence[Projection],
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+        gap_timeout: float = 2.0,
+        late_commit_timeout: float = 300.0,
+    ) -> None:
+        names = [projection.name for projection in projections]
+        if len(set(names)) != len(names):
+            raise ValueError("Projection names must be unique")
+
+        self._event_store = event_store
+        self._checkpoints = checkpoints
+        self._projections = {projection.name: projection for projection in projections}
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._gap_timeout = gap_timeout
+        self._late_commit_timeout = late_commit_timeout
+        self._positions: dict[str, int] = {}
+        self._gaps: dict[int, float] = {}
+        # Пропущенные позиции и время, когда их пропустили.
+        self._skipped: dict[int, float] = {}
+        self._task: typing.Optional[asyncio.Task[None]] = None
+
+    async def position(self, name: str) -> int:
+        """Позиция, до которой применены события проекции."""
+        if name not in self._positions:
+            self._positions[name] = await self._checkpoints.load(name)
+        return self._positions[name]
+
+    async def run_once(self) -> int:
+        """Применяет к проекциям одну пачку событий.
+
+        Returns
+        -------
+        int
+            Количество событий, на которое продвинулись проекции
+            (0 - проекции догнали журнал, либо все отстающие падают).
+        """
+        # Проекции на одной позиции (обычно все) читают журнал одним
+        # запросом; упавшая проекция не задерживает остальные.
+        groups: dict[int, list[str]] = {}
+        for name in self._projections:
+            groups.setdefault(await self.position(name), []).append(name)
+
+        advanced = await self._apply_late_commits()
+        for start, names in groups.items():
+            records, end = self._contiguous(
+                start, await self._event_store.read_all_from(start, self._batch_size),
+            )
+            if end == start:
+                continue
+
+            for name in names:
+                if await self._apply(name, records, end):
+                    advanced += len(records)
+
+        return advanced
+
+    async def _apply(self, name: str, records: typing.Sequence[RecordedEvent], end: int) -> bool:
+        projection = self._projections[name]
+        batch = [record for record in records if projection.handles(record.event)]
+        try:
+            if batch:
+                await projection.apply(batch)
+            await self._checkpoints.save(name, end)
+        except Exception:
+            _LOGGER.exception("Projection %s failed at position %d, will retry", name, self._positions[name])
+            return False
+
+        self._positions[name] = end
+        return True
+
+    async def _apply_late_commits(self) -> int:
+        now = time.monotonic()
+        for position, skipped_at in list(self._skipped.items()):
+            if now - skipped_at >= self._late_commit_timeout:
+                del self._skipped[position]
+
+        if not self._skipped:
+            return 0
+
+        commits: dict[int, list[RecordedEvent]] = {}
+        for record in await self._event_store.read_positions(list(self._skipped)):
+            commits.setdefault(record.position, []).append(record)
+
+        applied = 0
+        for position, records in commits.items():
+            _LOGGER.warning("Commit at skipped event log position %d became visible", position)
+            # Отстающие проекции получат коммит обычным чтением журнала.
+            failed = False
+            for name, projection in self._projections.items():
+                batch = [record for record in records if projection.handles(record.event)]
+                if self._positions[name] < position or not batch:
+                    continue
+                try:
+                    await projection.apply(batch)
+                except Exception:
+                    _LOGGER.exception("Projection %s failed to apply late commit %d, will retry", name, position)
+                    failed = True
+                else:
+                    applied += len(batch)
+
+            if not failed:
+                del self._skipped[position]
+
+        return applied
+
+    async def catch_up(self) -> int:
+        """Применяет события, пока проекции не догонят журнал."""
+        applied = 0
+        while read := await self.run_once():
+            applied += read
+        return applied
+
+    async def start(self) -> None:
+        """Запускает фоновую догоняющую подписку."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="projection-runner")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def rebuild(self, name: str, setup: ProjectionSetup, partitions: int = 1) -> int:
+        """Пересобирает read model проекции с нуля.
+
+        Потоки делятся на партиции по айди агрегата (см. `partition_of`),
+        хранилище отдаёт каждому процессу только потоки его партиции,
+        каждая партиция пересобирается в отдельном процессе, который
+        создаёт себе хранилище и проекцию через `setup`. После пересборки
+        чекпоинт ставится на позицию журнала, зафиксированную до её
+        начала: более поздние события будут применены подпиской
+        (возможно, повторно).
+
+        Parameters
+        ----------
+        name : str
+            Имя проекции, зарегистрированной в этом раннере.
+        setup : ProjectionSetup
+            Фабрика хранилища и проекции для процессов пересборки.
+        partitions : int
+            Количество процессов.
+
+        Returns
+        -------
+        int
+            Количество применённых событий.
+        """
+        projection = self._projections[name]
+        head = await self._event_store.last_position()
+        await projection.reset()
+
+        loop = asyncio.get_running_loop()
+        with concurrent.futures.ProcessPoolExecutor(partitions) as pool:
+            applied = await asyncio.gather(*(
+                loop.run_in_executor(pool, _rebuild_partition_process, setup, partition, partitions)
+                for partition in range(partitions)
+            ))
+
+        await self._checkpoints.save(name, head)
+        self._positions[name] = head
+        return sum(applied)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.catch_up()
+            except Exception:
+                _LOGGER.exception("Failed to read events for projections, will retry")
+            await asyncio.sleep(self._poll_interval)
+
+    def _contiguous(
+        self, start: int, records: typing.Sequence[RecordedEvent],
+    ) -> tuple[typing.Sequence[RecordedEvent], int]:
+        # Обрезает пачку на первом пропуске позиции, который ещё может
+        # заполниться, и возвращает последнюю применимую позицию.
+        end = start
+        for index, record in enumerate(records):
+            if record.position > end + 1:
+                if not self._gap_expired(end + 1):
+                    records = records[:index]
+                    break
+                skipped_at = time.monotonic()
+                for position in range(end + 1, record.position):
+                    self._skipped.setdefault(position, skipped_at)
+            end = record.position
+
+        for gap in [gap for gap in self._gaps if gap <= end]:
+            del self._gaps[gap]
+
+        return records, end
+
+    def _gap_expired(self, position: int) -> bool:
+        now = time.monotonic()
+        first_seen = self._gaps.setdefault(position, now)
+        if now - first_seen < self._gap_timeout:
+            return False
+
+        _LOGGER.warning("Skipping event log gap at position %d", position)
+        return True
+
+
+async def rebuild_partition(
+    event_store: EventStore[typing.Any],
+    projection: Projection,
+    partition: int,
+    partitions: int,
+    batch_size: int = 1000,
+) -> int:
+    """Применяет к проекции все события потоков одной партиции.
+
+    Returns
+    -------
+    int
+        Количество применённых событий.
+    """
+    applied = 0
+    batch: list[RecordedEvent] = []
+    async for stream in event_store.iter_all(batch_size, partition, partitions):
+        aggregate_uuid = stream.aggregate_uuid
+        if aggregate_uuid is None:
+            continue
+
+        batch.extend(
+            # Позиции при пересборке не читаются, проекция опирается на версии.
+            RecordedEvent(0, aggregate_uuid, version, event)
+            for version, event in enumerate(stream.events, 1)
+            if projection.handles(event)
+        )
+        if len(batch) >= batch_size:
+            await projection.apply(batch)
+            applied += len(batch)
+            batch = []
+
+    if batch:
+        await projection.apply(batch)
+        applied += len(batch)
+
+    return applied
+
+
+def _rebuild_partition_process(setup: ProjectionSetup, partition: int, partitions: int) -> int:
+    async def rebuild() -> int:
+        event_store, projection = await setup()
+        return await rebuild_partition(event_store, projection, partition, partitions)
+
+    return asyncio.run(rebuild())
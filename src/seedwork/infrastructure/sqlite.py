@@ -0,0 +1,148 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import sqlite3
+import typing
+
+SqlParams: typing.TypeAlias = typing.Sequence[typing.Any]
+
+
+class SqliteDatabase:
+    """Асинхронная обёртка над sqlite3 для однонодовых развёртываний.
+
+    Все обращения к соединению выполняются в отдельном потоке, чтобы не
+    блокировать event loop. Записи, пришедшие в рамках одной итерации
+    event loop, объединяются в одну транзакцию. Каждая запись выполняется
+    в своей точке сохранения, поэтому ошибка откатывает только её.
+
+    Parameters
+    ----------
+    path : str
+        Путь к файлу базы данных.
+    schema : Sequence[str]
+        DDL-выражения, которые выполняются при первом подключении.
+    cached_statements : int
+        Размер кеша скомпилированных выражений соединения.
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_path",
+        "_schema",
+        "_cached_statements",
+        "_connection",
+        "_executor",
+        "_pending_writes",
+        "_flush_task",
+    )
+
+    def __init__(
+        self, path: str, schema: typing.Sequence[str] = (), cached_statements: int = 128,
+    ) -> None:
+        self._path = path
+        self._schema = schema
+        self._cached_statements = cached_statements
+        self._connection: typing.Optional[sqlite3.Connection] = None
+        # Один поток: sqlite-соединение не должно использоваться конкурентно.
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sqlite",
+        )
+        self._pending_writes: list[tuple[str, SqlParams, asyncio.Future[int]]] = []
+        self._flush_task: typing.Optional[asyncio.Task[None]] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self._path,
+                isolation_level=None,
+                check_same_thread=False,
+                cached_statements=self._cached_statements,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            for statement in self._schema:
+                connection.execute(statement)
+            self._connection = connection
+
+        return self._connection
+
+    async def _run(self, func: typing.Callable[[sqlite3.Connection], typing.Any]) -> typing.Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connect()))
+
+    async def fetch_one(self, sql: str, params: SqlParams = ()) -> typing.Optional[tuple[typing.Any, ...]]:
+        """Выполняет запрос и возвращает первую строку результата."""
+        row = await self._run(lambda connection: connection.execute(sql, params).fetchone())
+        return typing.cast(typing.Optional[tuple[typing.Any, ...]], row)
+
+    async def fetch_all(self, sql: str, params: SqlParams = ()) -> list[tuple[typing.Any, ...]]:
+        """Выполняет запрос и возвращает все строки результата."""
+        rows = await self._run(lambda connection: connection.execute(sql, params).fetchall())
+        return typing.cast(list[tuple[typing.Any, ...]], rows)
+
+    async def execute(self, sql: str, params: SqlParams = ()) -> int:
+        """Ставит запись в очередь и ждёт фиксации транзакции с ней.
+
+        Returns
+        -------
+        int
+            Количество строк, затронутых выражением.
+        """
+        future: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+        self._pending_writes.append((sql, params, future))
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_writes())
+
+        return await future
+
+    async def _flush_writes(self) -> None:
+        # Даём остальным корутинам текущей итерации попасть в ту же пачку.
+        await asyncio.sleep(0)
+        while self._pending_writes:
+            batch, self._pending_writes = self._pending_writes, []
+
+            def write_batch(connection: sqlite3.Connection) -> list[typing.Union[int, Exception]]:
+                results: list[typing.Union[int, Exception]] = []
+                connection.execute("BEGIN")
+                try:
+                    for sql, params, _ in batch:
+                        connection.execute("SAVEPOINT write")
+                        try:
+                            results.append(connection.execute(sql, params).rowcount)
+                        except sqlite3.Error as exc:
+                            connection.execute("ROLLBACK TO write")
+                            results.append(exc)
+                        connection.execute("RELEASE write")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+
+                connection.execute("COMMIT")
+                return results
+
+            try:
+                results = await self._run(write_batch)
+            except Exception as exc:
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            for (_, _, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    async def close(self) -> None:
+        """Дожидается незавершённых записей и закрывает соединение."""
+        if self._flush_task is not None:
+            await self._flush_task
+
+        if self._connection is not None:
+            await self._run(lambda connection: connection.close())
+            self._connection = None
+
+        self._executor.shutdown(wait=True)
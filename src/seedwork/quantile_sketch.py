@@ -0,0 +1,237 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Потоковые скетчи для приближённого вычисления квантилей."""
+from __future__ import annotations
+
+__all__: typing.Sequence[str] = ("TDigest",)
+
+import bisect
+import math
+import typing
+
+
+class TDigest:
+    """Merging t-digest для приближённой оценки распределения значений.
+
+    Память скетча ограничена параметром `compression` и не зависит от
+    количества добавленных значений. Скетчи можно объединять, что позволяет
+    собирать их частями и хранить между перезапусками.
+
+    Parameters
+    ----------
+    compression : float
+        Параметр сжатия. Чем больше, тем точнее оценки и тем больше
+        центроидов хранит скетч (не более ~2 * compression).
+    """
+
+    __slots__: typing.Sequence[str] = (
+        "_compression",
+        "_means",
+        "_weights",
+        "_cumulative",
+        "_buffer",
+        "_buffer_size",
+        "_count",
+        "_min",
+        "_max",
+    )
+
+    def __init__(self, compression: float = 100.0) -> None:
+        if compression <= 0:
+            raise ValueError("Compression must be positive")
+
+        self._compression = compression
+        self._means: list[float] = []
+        self._weights: list[float] = []
+        self._cumulative: list[float] = []
+        self._buffer: list[tuple[float, float]] = []
+        self._buffer_size = int(compression * 5)
+        self._count = 0.0
+        self._min = math.inf
+        self._max = -math.inf
+
+    @property
+    def compression(self) -> float:
+        """Параметр сжатия скетча."""
+        return self._compression
+
+    @property
+    def count(self) -> float:
+        """Суммарный вес всех добавленных значений."""
+        return self._count
+
+    def __len__(self) -> int:
+        self._compress()
+        return len(self._means)
+
+    def update(self, value: float, weight: float = 1.0) -> None:
+        """Добавляет значение в скетч.
+
+        Parameters
+        ----------
+        value : float
+            Значение, которое нужно учесть.
+        weight : float
+            Вес значения.
+        """
+        self._buffer.append((value, weight))
+        self._count += weight
+        if value < self._min:
+            self._min = value
+        if value > self._max:
+            self._max = value
+
+        if len(self._buffer) >= self._buffer_size:
+            self._compress()
+
+    def merge(self, other: TDigest) -> None:
+        """Объединяет текущий скетч с другим.
+
+        Parameters
+        ----------
+        other : TDigest
+            Скетч, центроиды которого нужно добавить в текущий.
+        """
+        other._compress()
+        self._buffer.extend(zip(other._means, other._weights))
+        self._count += other._count
+        self._min = min(self._min, other._min)
+        self._max = max(self._max, other._max)
+        self._compress()
+
+    def cdf(self, value: float) -> float:
+        """Возвращает приближённую долю значений, не превышающих указанное.
+
+        Parameters
+        ----------
+        value : float
+            Значение, для которого нужно оценить функцию распределения.
+
+        Raises
+        ------
+        ValueError
+            Возбуждается в случае, если скетч пуст.
+
+        Returns
+        -------
+        float
+            Число в диапазоне [0, 1].
+        """
+        self._compress()
+        if self._count == 0:
+            raise ValueError("Cannot estimate distribution of empty digest")
+
+        if value < self._min:
+            return 0.0
+        if value >= self._max:
+            return 1.0
+
+        means = self._means
+        cumulative = self._cumulative
+        if len(means) == 1:
+            return (value - self._min) / (self._max - self._min)
+
+        index = bisect.bisect_right(means, value)
+        if index == 0:
+            left_value, left_rank = self._min, 0.0
+            right_value, right_rank = means[0], cumulative[0]
+        elif index == len(means):
+            left_value, left_rank = means[-1], cumulative[-1]
+            right_value, right_rank = self._max, self._count
+        else:
+            left_value, left_rank = means[index - 1], cumulative[index - 1]
+            right_value, right_rank = means[index], cumulative[index]
+
+        if right_value == left_value:
+            return right_rank / self._count
+
+        fraction = (value - left_value) / (right_value - left_value)
+        return (left_rank + fraction * (right_rank - left_rank)) / self._count
+
+    def as_dict(self) -> dict[str, typing.Any]:
+        """Сериализует скетч в словарь из примитивных типов."""
+        self._compress()
+        return {
+            "compression": self._compression,
+            "centroids": [[m, w] for m, w in zip(self._means, self._weights)],
+            "count": self._count,
+            "min": self._min if self._count else None,
+            "max": self._max if self._count else None,
+        }
+
+    @classmethod
+    def from_dict(cls, mapping: typing.Mapping[str, typing.Any]) -> TDigest:
+        """Восстанавливает скетч, сериализованный через `as_dict`."""
+        digest = cls(mapping["compression"])
+        for mean, weight in mapping["centroids"]:
+            digest._means.append(mean)
+            digest._weights.append(weight)
+        digest._count = mapping["count"]
+        if digest._count:
+            digest._min = mapping["min"]
+            digest._max = mapping["max"]
+        digest._rebuild_cumulative()
+        return digest
+
+    def _scale(self, q: float) -> float:
+        # Функция масштаба k1: центроиды на хвостах распределения мельче,
+        # поэтому оценки для "топ X%" точнее всего именно там.
+        return self._compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _inverse_scale(self, k: float) -> float:
+        if k >= self._compression / 4:
+            return 1.0
+        return (math.sin(k * 2 * math.pi / self._compression) + 1) / 2
+
+    def _compress(self) -> None:
+        if not self._buffer:
+            return
+
+        points = sorted([*zip(self._means, self._weights), *self._buffer])
+        self._buffer.clear()
+
+        total = sum(weight for _, weight in points)
+        means: list[float] = []
+        weights: list[float] = []
+
+        current_mean, current_weight = points[0]
+        weight_so_far = 0.0
+        weight_limit = total * self._inverse_scale(self._scale(0.0) + 1)
+        for mean, weight in points[1:]:
+            if weight_so_far + current_weight + weight <= weight_limit:
+                current_weight += weight
+                current_mean += (mean - current_mean) * weight / current_weight
+                continue
+
+            means.append(current_mean)
+            weights.append(current_weight)
+            weight_so_far += current_weight
+            weight_limit = total * self._inverse_scale(self._scale(weight_so_far / total) + 1)
+            current_mean, current_weight = mean, weight
+
+        means.append(current_mean)
+        weights.append(current_weight)
+
+        self._means = means
+        self._weights = weights
+        self._rebuild_cumulative()
+
+    def _rebuild_cumulative(self) -> None:
+        # Ранг центра каждого центроида, чтобы cdf сводился к бинарному поиску.
+        cumulative = []
+        weight_so_far = 0.0
+        for weight in self._weights:
+            cumulative.append(weight_so_far + weight / 2)
+            weight_so_far += weight
+        self._cumulative = cumulative
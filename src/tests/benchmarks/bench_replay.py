@@ -0,0 +1,87 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Замер скорости восстановления агрегата из миллиона событий.
+
+Запуск: `python -m src.tests.benchmarks.bench_replay [количество событий]`.
+"""
+from __future__ import annotations
+
+import dataclasses
+import functools
+import sys
+import time
+import typing
+
+from src.seedwork.domain.aggregate import EventSourcedAggregate
+from src.seedwork.domain.event import Event
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Deposited(Event):
+    amount: int
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Withdrawn(Event):
+    amount: int
+
+
+class Account(EventSourcedAggregate):
+    __slots__ = ("balance",)
+
+    def __init__(self, version: int = 0) -> None:
+        super().__init__(version)
+        self.balance = 0
+
+    @functools.singledispatchmethod
+    def _aggregate(self, event: Event) -> None:
+        raise ValueError(f"Unknown event {event!r}")
+
+    @_aggregate.register
+    def _(self, event: Deposited) -> None:
+        self.balance += event.amount
+
+    @_aggregate.register
+    def _(self, event: Withdrawn) -> None:
+        self.balance -= event.amount
+
+
+def replay_with_singledispatch(events: typing.Sequence[Event]) -> Account:
+    account = Account()
+    for event in events:
+        account._aggregate(event)
+    return account
+
+
+def replay_with_dispatch_table(events: typing.Sequence[Event]) -> Account:
+    account = Account()
+    account.replay(events)
+    return account
+
+
+def main(count: int) -> None:
+    events = [Deposited(amount=2) if index % 4 else Withdrawn(amount=1) for index in range(count)]
+
+    for replay in (replay_with_singledispatch, replay_with_dispatch_table):
+        started_at = time.perf_counter()
+        account = replay(events)
+        elapsed = time.perf_counter() - started_at
+        print(
+            f"{replay.__name__:<28} {elapsed:7.3f}s {count / elapsed:>12,.0f} events/s"
+            f" (balance {account.balance})"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,116 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+from unittest import mock
+
+import pytest
+
+from src.seedwork.application.admission import AdmissionController
+from src.seedwork.application.admission import AdmissionLimit
+from src.seedwork.application.admission import AdmissionRejectedError
+from src.seedwork.application.module import Application
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_handler import QueryResult
+from src.seedwork.bulkhead import Bulkhead
+from src.seedwork.bulkhead import BulkheadFullError
+
+
+@dataclasses.dataclass(frozen=True)
+class SlowQuery(Query):
+    pass
+
+
+def test_bulkhead_rejects_when_queue_is_full() -> None:
+    async def main() -> None:
+        bulkhead = Bulkhead(max_concurrency=1, max_queue=1)
+        release = asyncio.Event()
+
+        async def hold() -> None:
+            async with bulkhead.hold():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        assert (bulkhead.in_flight, bulkhead.queued) == (1, 1)
+
+        with pytest.raises(BulkheadFullError):
+            await bulkhead.acquire()
+
+        release.set()
+        await asyncio.gather(holder, waiter)
+        assert (bulkhead.in_flight, bulkhead.queued) == (0, 0)
+
+    asyncio.run(main())
+
+
+def test_bulkhead_does_not_let_new_callers_skip_the_queue() -> None:
+    async def main() -> None:
+        bulkhead = Bulkhead(max_concurrency=1, max_queue=1)
+        await bulkhead.acquire()
+        waiter = asyncio.create_task(bulkhead.acquire())
+        await asyncio.sleep(0)
+
+        # Место освободилось, но уже отдано ожидающему.
+        bulkhead.release()
+        with pytest.raises(BulkheadFullError):
+            await bulkhead.acquire(max_wait=0.01)
+
+        await waiter
+        assert (bulkhead.in_flight, bulkhead.queued) == (1, 0)
+
+    asyncio.run(main())
+
+
+def test_admission_controller_without_deadline() -> None:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+
+    async def handle_slow(query: SlowQuery) -> QueryResult[None]:
+        return QueryResult.success()
+
+    application.register_query_handler(handle_slow)
+    application.add_middleware(
+        AdmissionController(deadline=None, default_limit=AdmissionLimit(max_concurrency=1, max_queue=1))
+    )
+
+    assert asyncio.run(application.execute_query(SlowQuery())).is_success()
+
+
+def test_admission_controller_sheds_load() -> None:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+    release = asyncio.Event()
+
+    async def handle_slow(query: SlowQuery) -> QueryResult[None]:
+        await release.wait()
+        return QueryResult.success()
+
+    application.register_query_handler(handle_slow)
+    controller = application.add_middleware(
+        AdmissionController(deadline=1.0, limits={SlowQuery: AdmissionLimit(max_concurrency=2, max_queue=1)})
+    )
+
+    async def main() -> list[QueryResult[None]]:
+        tasks = [asyncio.create_task(application.execute_query(SlowQuery())) for _ in range(4)]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(main())
+    assert sum(result.is_success() for result in results) == 3
+    rejected = next(result for result in results if result.has_errors())
+    assert isinstance(rejected.errors[0][1], AdmissionRejectedError)
+    assert controller.rejected == 1
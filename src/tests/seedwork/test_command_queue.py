@@ -0,0 +1,120 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+import pytest
+
+from src.seedwork.application.command import Command
+from src.seedwork.application.command_queue import CommandQueueFullError
+from src.seedwork.application.command_queue import CommandStore
+from src.seedwork.application.command_queue import CommandWorkerPool
+from src.seedwork.application.command_queue import QueuedCommand
+from src.seedwork.application.module import Application
+
+
+@dataclasses.dataclass(frozen=True)
+class RefreshCommand(Command):
+    nickname: str
+
+
+class MemoryCommandStore(CommandStore):
+    def __init__(self) -> None:
+        self.commands: dict[str, tuple[QueuedCommand, str]] = {}
+
+    async def add(self, queued: QueuedCommand) -> bool:
+        if queued.idempotency_key in self.commands:
+            return False
+        self.commands[queued.idempotency_key] = (queued, "pending")
+        return True
+
+    async def pending(self) -> typing.Sequence[QueuedCommand]:
+        return [queued for queued, status in self.commands.values() if status == "pending"]
+
+    async def complete(self, idempotency_key: str) -> None:
+        self.commands[idempotency_key] = (self.commands[idempotency_key][0], "done")
+
+    async def reschedule(self, idempotency_key: str, attempts: int) -> None:
+        pass
+
+    async def fail(self, idempotency_key: str, error: str) -> None:
+        self.commands[idempotency_key] = (self.commands[idempotency_key][0], "failed")
+
+
+def create_application(handled: list[str], failures: int = 0) -> Application:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+    remaining_failures = failures
+
+    async def handle_refresh(command: RefreshCommand) -> None:
+        nonlocal remaining_failures
+        if remaining_failures:
+            remaining_failures -= 1
+            raise ConnectionError("upstream unavailable")
+        handled.append(command.nickname)
+
+    application.register_command_handler(handle_refresh)
+    return application
+
+
+def test_enqueue_command_is_idempotent_and_retried() -> None:
+    handled: list[str] = []
+    application = create_application(handled, failures=2)
+    store = MemoryCommandStore()
+    pool = CommandWorkerPool(application, workers=2, store=store, base_delay=0.001)
+    application.configure_command_workers(pool)
+
+    async def main() -> None:
+        await pool.start()
+        assert await application.enqueue_command(RefreshCommand("a"), idempotency_key="a")
+        assert not await application.enqueue_command(RefreshCommand("a"), idempotency_key="a")
+        for _ in range(100):
+            if handled:
+                break
+            await asyncio.sleep(0.01)
+        await pool.stop(drain_timeout=1)
+
+    asyncio.run(main())
+    assert handled == ["a"]
+    assert store.commands["a"][1] == "done"
+    metrics = pool.as_dict()
+    assert (metrics["completed"], metrics["retried"], metrics["duplicates"]) == (1, 2, 1)
+
+
+def test_pending_commands_are_redelivered_on_start() -> None:
+    handled: list[str] = []
+    store = MemoryCommandStore()
+    asyncio.run(store.add(QueuedCommand(RefreshCommand("b"), "b")))
+    pool = CommandWorkerPool(create_application(handled), store=store)
+
+    async def main() -> None:
+        await pool.start()
+        await pool.stop(drain_timeout=1)
+
+    asyncio.run(main())
+    assert handled == ["b"]
+
+
+def test_enqueue_rejects_when_queue_is_full() -> None:
+    pool = CommandWorkerPool(create_application([]), max_queue=1)
+
+    async def main() -> None:
+        await pool.enqueue(RefreshCommand("a"))
+        with pytest.raises(CommandQueueFullError):
+            await pool.enqueue(RefreshCommand("b"))
+
+    asyncio.run(main())
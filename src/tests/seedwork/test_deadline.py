@@ -0,0 +1,73 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+import pytest
+
+from src.seedwork.application.module import Application
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_handler import QueryResult
+from src.seedwork.deadline import Deadline
+from src.seedwork.deadline import DeadlineExceededError
+from src.seedwork.deadline import current_deadline
+from src.seedwork.deadline import deadline_scope
+from src.seedwork.deadline import remaining_timeout
+
+
+@dataclasses.dataclass(frozen=True)
+class SleepQuery(Query):
+    seconds: float
+
+
+def test_deadline_scope_keeps_earliest_deadline() -> None:
+    early, late = Deadline.after(1), Deadline.after(10)
+    assert remaining_timeout(5.0) == 5.0
+
+    with deadline_scope(early):
+        with deadline_scope(late) as effective:
+            assert effective is early
+            assert typing.cast(float, remaining_timeout(5.0)) <= 1.0
+
+    assert current_deadline() is None
+    with deadline_scope(Deadline.after(-1)), pytest.raises(DeadlineExceededError):
+        remaining_timeout()
+
+
+def test_handler_past_deadline_is_cancelled() -> None:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+    observed: list[typing.Optional[Deadline]] = []
+    cancelled = []
+
+    async def handle_sleep(query: SleepQuery) -> QueryResult[None]:
+        observed.append(current_deadline())
+        try:
+            await asyncio.sleep(query.seconds)
+        except asyncio.CancelledError:
+            cancelled.append(query)
+            raise
+        return QueryResult.success()
+
+    application.register_query_handler(handle_sleep)
+    deadline = Deadline.after(0.05)
+    result = asyncio.run(application.execute_query(SleepQuery(10), deadline=deadline))
+
+    assert observed == [deadline]
+    assert cancelled == [SleepQuery(10)]
+    assert isinstance(result.errors[0][1], DeadlineExceededError)
+    assert asyncio.run(application.execute_query(SleepQuery(0), deadline=Deadline.after(1))).is_success()
@@ -0,0 +1,47 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import dataclasses
+import pickle
+import uuid
+
+import pytest
+
+from src.seedwork.application.event_handler import EventId
+from src.seedwork.domain.entity_uuid import EntityId
+
+
+def test_entity_id_stores_only_integer() -> None:
+    identifier = uuid.uuid4()
+    entity_id = EntityId.from_str(str(identifier))
+
+    assert not hasattr(entity_id, "__dict__")
+    assert entity_id.integer == identifier.int
+    assert entity_id.string == str(identifier)
+    assert entity_id.hex == identifier.hex
+    assert entity_id.string is entity_id.string
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        entity_id.integer = 1  # type: ignore[misc]
+
+
+def test_entity_id_equality_and_hash_use_integer() -> None:
+    entity_id = EntityId.from_int(42)
+
+    assert entity_id == EntityId.from_str("42") == EntityId.from_str(entity_id.string)
+    assert entity_id == EventId(42)
+    assert hash(entity_id) == hash(EventId(42))
+    assert pickle.loads(pickle.dumps(entity_id)) == entity_id
+    with pytest.raises(ValueError):
+        EntityId(1 << 128)
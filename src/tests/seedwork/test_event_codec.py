@@ -0,0 +1,101 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import dataclasses
+import datetime
+import typing
+
+import msgpack
+import pytest
+
+from src.seedwork.domain.entity_uuid import EntityId
+from src.seedwork.domain.event import Event
+from src.seedwork.infrastructure.event_codec import EventCodec
+from src.seedwork.infrastructure.event_codec import EventRegistry
+from src.seedwork.infrastructure.event_codec import EventSchemaError
+
+registry = EventRegistry()
+
+
+@registry.register("player.renamed")
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class PlayerRenamed(Event):
+    player_id: EntityId
+    nickname: str
+    previous: typing.Optional[str]
+    tags: tuple[str, ...]
+    renamed_at: datetime.datetime
+
+
+@registry.register("rating.changed", version=2)
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class RatingChanged(Event):
+    metric: str
+    value: float
+
+
+@registry.upcaster("rating.changed", from_version=1)
+def add_metric(values: list[typing.Any]) -> list[typing.Any]:
+    return ["wins", *values]
+
+
+def test_roundtrip_is_compact() -> None:
+    codec = EventCodec(registry)
+    event = PlayerRenamed(
+        player_id=EntityId.next_id(),
+        nickname="Steve",
+        previous=None,
+        tags=("vip",),
+        renamed_at=datetime.datetime(2024, 5, 1, tzinfo=datetime.timezone.utc),
+    )
+
+    data = codec.encode(event)
+    assert codec.decode(data) == event
+    assert len(data) < len(repr(event.as_dict()))
+
+
+def test_lazy_decoding_exposes_header() -> None:
+    codec = EventCodec(registry)
+    encoded = codec.decode_lazy(codec.encode(RatingChanged(metric="kills", value=1.5)))
+
+    assert (encoded.name, encoded.version) == ("rating.changed", 2)
+    assert encoded.event == RatingChanged(metric="kills", value=1.5)
+
+
+def test_old_versions_are_upcasted() -> None:
+    codec = EventCodec(registry)
+    assert codec.decode_payload("rating.changed", 1, codec_payload([3.0])) == RatingChanged(
+        metric="wins", value=3.0,
+    )
+
+    with pytest.raises(EventSchemaError):
+        codec.decode_payload("rating.changed", 3, codec_payload(["wins", 3.0]))
+
+
+def test_unregistered_event_is_rejected() -> None:
+    with pytest.raises(EventSchemaError):
+        EventCodec(registry).encode(Event())
+
+
+def test_malformed_payload_is_rejected() -> None:
+    codec = EventCodec(registry)
+    with pytest.raises(EventSchemaError):
+        codec.decode_payload("rating.changed", 2, b"\xc1")
+    with pytest.raises(EventSchemaError):
+        codec.decode_payload("rating.changed", 2, codec_payload(["wins", 3.0]) + b"\x00")
+
+
+def codec_payload(values: list[typing.Any]) -> bytes:
+    return typing.cast(bytes, msgpack.packb(values))
@@ -0,0 +1,175 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import functools
+import typing
+
+import pytest
+
+from src.seedwork.domain.aggregate import EventSourcedAggregate
+from src.seedwork.domain.entity_uuid import EntityId
+from src.seedwork.domain.event import Event
+from src.seedwork.infrastructure.event_store import ConcurrentStreamWriteError
+from src.seedwork.infrastructure.event_store import EventSourcedRepository
+from src.seedwork.infrastructure.event_store import InMemoryEventStore
+from src.seedwork.infrastructure.event_store import InMemorySnapshotStore
+from src.seedwork.infrastructure.event_store import Snapshot
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class Incremented(Event):
+    amount: int
+
+
+class Counter(EventSourcedAggregate):
+    __slots__ = ("value", "applied")
+
+    supports_snapshots = True
+
+    def __init__(self, version: int = 0) -> None:
+        super().__init__(version)
+        self.value = 0
+        self.applied = 0
+
+    def snapshot_state(self) -> typing.Mapping[str, typing.Any]:
+        return {"value": self.value}
+
+    @classmethod
+    def from_snapshot(cls, state: typing.Mapping[str, typing.Any], version: int) -> Counter:
+        counter = cls(version)
+        counter.value = state["value"]
+        return counter
+
+    def increment(self, amount: int) -> None:
+        self._record_that(Incremented(amount=amount))
+
+    @functools.singledispatchmethod
+    def _aggregate(self, event: Event) -> None:
+        raise ValueError(f"Unknown event {event!r}")
+
+    @_aggregate.register
+    def _(self, event: Incremented) -> None:
+        self.value += event.amount
+        self.applied += 1
+
+
+def test_append_commits_events_and_bumps_version() -> None:
+    store: InMemoryEventStore[Counter] = InMemoryEventStore()
+    counter_id = EntityId.next_id()
+    counter = Counter()
+    counter.increment(1)
+    counter.increment(2)
+
+    async def main() -> None:
+        await store.append_to_stream(counter_id, counter)
+        assert counter.version == 2
+        assert not counter.uncommitted_events
+
+        stream = await store.load_stream(counter_id)
+        assert stream.version == 2
+        assert [event async for event in store.iter_stream(counter_id, from_version=1)] == [
+            Incremented(amount=2),
+        ]
+
+    asyncio.run(main())
+
+
+def test_concurrent_writer_is_rejected() -> None:
+    store: InMemoryEventStore[Counter] = InMemoryEventStore()
+    counter_id = EntityId.next_id()
+    first, second = Counter(), Counter()
+    first.increment(1)
+    second.increment(5)
+
+    async def main() -> None:
+        await store.append_to_stream(counter_id, first)
+        with pytest.raises(ConcurrentStreamWriteError):
+            await store.append_to_stream(counter_id, second)
+        assert (await store.load_stream(counter_id)).events == [Incremented(amount=1)]
+
+    asyncio.run(main())
+
+
+def test_repository_replays_only_events_after_snapshot() -> None:
+    snapshots = InMemorySnapshotStore()
+    repository = EventSourcedRepository(InMemoryEventStore(), Counter, snapshots, snapshot_every=3)
+    counter_id = EntityId.next_id()
+
+    async def main() -> Counter:
+        counter = Counter()
+        for amount in range(1, 5):
+            counter.increment(amount)
+            await repository.save(counter_id, counter)
+
+        loaded = await repository.get_by_id(counter_id)
+        assert loaded is not None
+        return loaded
+
+    counter = asyncio.run(main())
+    assert (counter.value, counter.version, counter.applied) == (10, 4, 1)
+
+
+def test_repository_skips_snapshots_of_aggregates_without_support() -> None:
+    class PlainCounter(Counter):
+        __slots__ = ()
+
+        supports_snapshots = False
+
+    snapshots = InMemorySnapshotStore()
+    repository = EventSourcedRepository(InMemoryEventStore(), PlainCounter, snapshots, snapshot_every=1)
+    counter_id = EntityId.next_id()
+
+    async def main() -> None:
+        counter = PlainCounter()
+        counter.increment(1)
+        await repository.save(counter_id, counter)
+        assert await snapshots.load_snapshot(counter_id) is None
+
+    asyncio.run(main())
+
+
+def test_repository_falls_back_to_full_replay_on_incompatible_snapshot() -> None:
+    snapshots = InMemorySnapshotStore()
+    store: InMemoryEventStore[Counter] = InMemoryEventStore()
+    repository = EventSourcedRepository(store, Counter, snapshots)
+    counter_id = EntityId.next_id()
+
+    async def main() -> typing.Optional[Counter]:
+        counter = Counter()
+        counter.increment(2)
+        counter.increment(3)
+        await repository.save(counter_id, counter)
+        await snapshots.save_snapshot(counter_id, Snapshot(2, Counter.__snapshot_schema__, {"total": 5}))
+        return await repository.get_by_id(counter_id)
+
+    counter = asyncio.run(main())
+    assert counter is not None
+    assert (counter.value, counter.version, counter.applied) == (5, 2, 2)
+
+
+def test_replay_dispatches_event_subclasses_to_base_handler() -> None:
+    @dataclasses.dataclass(frozen=True, kw_only=True)
+    class BonusIncremented(Incremented):
+        pass
+
+    counter = Counter()
+    counter.replay([Incremented(amount=1), BonusIncremented(amount=10), BonusIncremented(amount=100)])
+    assert (counter.value, counter.version, counter.applied) == (111, 3, 3)
+
+    with pytest.raises(ValueError):
+        counter.replay([Event()])
+    assert counter.version == 3
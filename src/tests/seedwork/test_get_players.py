@@ -0,0 +1,161 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+import pytest
+
+from src.modules.csm.application.models.player_read_model import PlayerReadModel
+from src.modules.csm.application.queries.get_players import GetPlayers
+from src.modules.csm.application.queries.get_players import get_players
+from src.modules.csm.application.services.http_service import PlayerIdScrappingError
+from src.modules.csm.application.services.http_service import ScrappingError
+from src.modules.csm.domain.player import Player
+from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.domain.player_stats import PlayerStats
+from src.modules.csm.infrastructure.stub_http_service import StubCristalixService
+
+
+class FlakyCristalixService(StubCristalixService):
+    """Не находит профиль Herobrine и не отдаёт статистику Notch."""
+
+    __slots__: typing.Sequence[str] = ()
+
+    async def request_player_api_uuid(self, player_nickname: str) -> str:
+        if player_nickname == "Herobrine":
+            raise PlayerIdScrappingError(player_nickname)
+        return await super().request_player_api_uuid(player_nickname)
+
+    async def request_player_stats(
+        self, player_nickname: str, player_api_id: typing.Optional[str] = None,
+    ) -> PlayerStats:
+        if player_nickname == "Notch":
+            raise ScrappingError(player_nickname)
+        return await super().request_player_stats(player_nickname, player_api_id)
+
+
+def test_players_stats_keep_per_player_errors() -> None:
+    service = FlakyCristalixService()
+
+    async def main() -> typing.Mapping[str, typing.Union[PlayerStats, Exception]]:
+        return await service.request_players_stats({"Steve": "0" * 32, "Notch": "f" * 32})
+
+    stats = asyncio.run(main())
+    assert list(stats) == ["Steve", "Notch"]
+    assert isinstance(stats["Steve"], PlayerStats)
+    assert isinstance(stats["Notch"], ScrappingError)
+
+
+def test_get_players_splits_players_and_errors() -> None:
+    stats = asyncio.run(StubCristalixService().request_player_stats("Steve"))
+    error = ScrappingError("Notch")
+    query_service = mock.AsyncMock()
+    query_service.get_players.return_value = {
+        "Steve": PlayerReadModel(nickname="Steve", api_uuid="uuid-1", stats=stats),
+        "Notch": error,
+    }
+
+    result = asyncio.run(get_players(GetPlayers((" Steve", "steve", "Notch", "")), query_service))
+
+    assert query_service.get_players.await_args.args[0] == ["Steve", "Notch"]
+    batch = result.payload
+    assert list(batch.players) == ["Steve"]
+    assert batch.players["Steve"].stats == stats
+    assert batch.errors == {"Notch": error}
+
+
+def test_query_service_returns_partial_results_in_request_order() -> None:
+    pytest.importorskip("motor")
+    pytest.importorskip("pymongo")
+    from src.modules.csm.infrastructure.player_repository import InMemoryPlayerRepository
+    from src.modules.csm.infrastructure.query_service import PlayerQueryServiceImpl
+
+    repository = InMemoryPlayerRepository()
+    http_service = FlakyCristalixService()
+    query_service = PlayerQueryServiceImpl(repository, http_service, mock.Mock())
+
+    async def main() -> typing.Mapping[str, typing.Union[PlayerReadModel, Exception]]:
+        await repository.insert(Player(id=PlayerId("Steve"), api_uuid="0" * 32))
+        return await query_service.get_players(["Notch", "Herobrine", "Steve", "Alex"], concurrency=2)
+
+    results = asyncio.run(main())
+    assert list(results) == ["Notch", "Herobrine", "Steve", "Alex"]
+    assert isinstance(results["Notch"], ScrappingError)
+    assert isinstance(results["Herobrine"], PlayerIdScrappingError)
+    steve, alex = results["Steve"], results["Alex"]
+    assert isinstance(steve, PlayerReadModel) and steve.api_uuid == "0" * 32
+    assert isinstance(alex, PlayerReadModel)
+    assert alex.api_uuid == asyncio.run(http_service.request_player_api_uuid("Alex"))
+
+
+class SlowCristalixService(StubCristalixService):
+    """Отвечает, только когда тест откроет `gate`."""
+
+    __slots__: typing.Sequence[str] = ("gate", "scraped")
+
+    def __init__(self) -> None:
+        self.gate = asyncio.Event()
+        self.scraped = 0
+
+    async def request_player_api_uuid(self, player_nickname: str) -> str:
+        self.scraped += 1
+        await self.gate.wait()
+        return await super().request_player_api_uuid(player_nickname)
+
+
+def test_get_player_races_read_model_with_upstream() -> None:
+    pytest.importorskip("motor")
+    pytest.importorskip("pymongo")
+    from src.modules.csm.infrastructure.player_repository import InMemoryPlayerRepository
+    from src.modules.csm.infrastructure.query_service import PlayerQueryServiceImpl
+
+    async def main() -> None:
+        stats = await StubCristalixService().request_player_stats("Steve")
+        read_models = mock.MagicMock()
+        lookup = asyncio.Event()
+
+        async def find_one(query: typing.Any) -> typing.Optional[dict[str, typing.Any]]:
+            await lookup.wait()
+            if query["_id"] != "Steve":
+                return None
+            return {
+                "_id": "Steve",
+                "api_uuid": "0" * 32,
+                "csc_stats": dataclasses.asdict(stats.csc_stats),
+                "events_stats": dataclasses.asdict(stats.events_stats),
+            }
+
+        read_models.find_one = find_one
+        http_service = SlowCristalixService()
+        query_service = PlayerQueryServiceImpl(InMemoryPlayerRepository(), http_service, mock.Mock(), read_models)
+
+        # Скрапинг стартует, не дожидаясь read model, а попадание в
+        # неё не ждёт скрапинга.
+        hit = asyncio.ensure_future(query_service.get_player("Steve"))
+        for _ in range(3):
+            await asyncio.sleep(0)
+        assert http_service.scraped == 1
+        lookup.set()
+        assert (await asyncio.wait_for(hit, 1)).stats == stats
+
+        miss = asyncio.ensure_future(query_service.get_player("Alex"))
+        http_service.gate.set()
+        read_model = await asyncio.wait_for(miss, 1)
+        assert read_model.nickname == "Alex"
+
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import pytest
+
+pytest.importorskip("dependency_injector")
+
+from dependency_injector import containers
+from dependency_injector import providers
+
+from src.seedwork.application.ioc import Lifetime
+from src.seedwork.infrastructure.ioc import IocProvider
+
+
+class Repository:
+    pass
+
+
+class SqlRepository(Repository):
+    pass
+
+
+class MemoryRepository(Repository):
+    pass
+
+
+class Service:
+    pass
+
+
+class RepositoryContainer(containers.DeclarativeContainer):
+    repository = providers.Singleton(SqlRepository)
+
+
+class AmbiguousContainer(containers.DeclarativeContainer):
+    sql_repository = providers.Factory(SqlRepository)
+    memory_repository = providers.Factory(MemoryRepository)
+
+
+class ServiceContainer(containers.DeclarativeContainer):
+    service = providers.Factory(Service)
+
+
+def test_dependency_is_resolved_by_any_type_in_mro() -> None:
+    provider = IocProvider(RepositoryContainer())
+
+    repository = provider.get_dependency(Repository)
+    assert isinstance(repository, SqlRepository)
+    assert provider.get_dependency(SqlRepository) is repository
+    assert provider.get_lifetime(Repository) is Lifetime.SINGLETON
+    # `object` не индексируется, иначе любой провайдер подходил бы под него.
+    assert not provider.has_dependency(object)
+    with pytest.raises(KeyError):
+        provider.get_dependency(object)
+
+
+def test_ambiguous_type_is_not_resolved() -> None:
+    provider = IocProvider(AmbiguousContainer())
+
+    assert not provider.has_dependency(Repository)
+    assert provider.get_lifetime(Repository) is Lifetime.TRANSIENT
+    with pytest.raises(ValueError):
+        provider.get_dependency(Repository)
+    assert isinstance(provider.get_dependency(MemoryRepository), MemoryRepository)
+
+
+def test_attached_container_is_indexed() -> None:
+    provider = IocProvider(RepositoryContainer())
+    assert not provider.has_dependency(Service)
+
+    provider.attach_container(ServiceContainer())
+    assert isinstance(provider.get_dependency(Service), Service)
+    assert provider.get_lifetime(Service) is Lifetime.TRANSIENT
+
+
+def test_registered_dependency_overrides_type_and_is_indexed_by_name() -> None:
+    provider = IocProvider(AmbiguousContainer())
+    repository = MemoryRepository()
+    provider.register_dependency(Repository, repository)
+    assert provider.get_dependency(Repository) is repository
+
+    service = Service()
+    provider.register_dependency("service", service)
+    assert provider.get_dependency(Service) is service
+    assert provider.get_lifetime(Service) is Lifetime.SINGLETON
@@ -0,0 +1,89 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+import pytest
+
+from src.seedwork.application.middleware import LatencyHistogram
+from src.seedwork.application.middleware import TimingMiddleware
+from src.seedwork.application.module import Application
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_handler import QueryResult
+
+
+@dataclasses.dataclass(frozen=True)
+class SampleQuery(Query):
+    fail: bool = False
+
+
+async def handle_query(query: SampleQuery) -> QueryResult[None]:
+    if query.fail:
+        raise RuntimeError("boom")
+    return QueryResult.success()
+
+
+def create_application() -> Application:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+    application.register_query_handler(handle_query)
+    return application
+
+
+def test_middlewares_are_chained_in_order() -> None:
+    application = create_application()
+    calls: list[str] = []
+
+    def make_middleware(name: str) -> typing.Any:
+        async def middleware(ctx, task, handler, call_next):  # type: ignore[no-untyped-def]
+            calls.append(f"{name}:before")
+            result = await call_next()
+            calls.append(f"{name}:after")
+            return result
+
+        return middleware
+
+    application.add_middleware(make_middleware("outer"))
+    application.add_middleware(make_middleware("inner"))
+    asyncio.run(application.execute_query(SampleQuery()))
+
+    assert calls == ["outer:before", "inner:before", "inner:after", "outer:after"]
+
+
+def test_timing_middleware_records_latency_and_errors() -> None:
+    application = create_application()
+    timing = application.add_middleware(TimingMiddleware())
+
+    asyncio.run(application.execute_query(SampleQuery()))
+    with pytest.raises(RuntimeError):
+        asyncio.run(application.execute_query(SampleQuery(fail=True)))
+
+    histogram = timing.get_histogram(handle_query)
+    assert histogram.count == 2
+    assert histogram.errors == 1
+    assert f"{__name__}.handle_query" in timing.as_dict()
+
+
+def test_latency_histogram_quantiles() -> None:
+    histogram = LatencyHistogram(buckets=(0.1, 1.0))
+    for _ in range(99):
+        histogram.observe(0.05)
+    histogram.observe(5.0)
+
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(1.0) == float("inf")
+    assert histogram.as_dict()["buckets"] == {0.1: 99, 1.0: 0, float("inf"): 1}
@@ -0,0 +1,366 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+import pytest
+
+from src.seedwork.application.command import Command
+from src.seedwork.application.command_handler import CommandResult
+from src.seedwork.application.ioc import DependencyProvider
+from src.seedwork.application.ioc import DependencyResolutionError
+from src.seedwork.application.ioc import Lifetime
+from src.seedwork.application.module import Application
+from src.seedwork.application.module import ApplicationModule
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_handler import QueryResult
+from src.seedwork.domain.event import Event
+from src.seedwork.domain.repository import EventRepository
+
+
+@dataclasses.dataclass(frozen=True)
+class SampleQuery(Query):
+    value: int
+
+
+@dataclasses.dataclass(frozen=True)
+class DerivedQuery(SampleQuery):
+    pass
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class SampleEvent(Event):
+    pass
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class DerivedEvent(SampleEvent):
+    pass
+
+
+class DictProvider(DependencyProvider[type, typing.Any]):
+    def __init__(self, **dependencies: typing.Any) -> None:
+        self.dependencies = {type(value): value for value in dependencies.values()}
+
+    def register_dependency(self, identifier: type, dependency: typing.Any) -> None:
+        self.dependencies[identifier] = dependency
+
+    def get_dependency(self, identifier: type) -> typing.Any:
+        return self.dependencies[identifier]
+
+
+def create_application() -> Application:
+    return Application("test", 0.1, dependency_provider=mock.MagicMock())
+
+
+async def handle_query(query: SampleQuery) -> None:
+    pass
+
+
+async def handle_event(event: SampleEvent) -> None:
+    pass
+
+
+async def handle_derived_event(event: DerivedEvent) -> None:
+    pass
+
+
+def test_query_handler_dispatch_through_module() -> None:
+    application = create_application()
+    module = ApplicationModule("module", 0.1)
+    application.include_module(module)
+
+    with pytest.raises(KeyError):
+        application.get_query_handler(SampleQuery(1))
+
+    # Регистрация после включения модуля должна сбросить таблицу.
+    module.register_query_handler(handle_query)
+    assert application.get_query_handler(SampleQuery(1)) is handle_query
+
+
+def test_query_handler_matches_subclasses() -> None:
+    application = create_application()
+    application.register_query_handler(handle_query)
+    assert application.get_query_handler(DerivedQuery(1)) is handle_query
+
+
+def test_event_handlers_include_base_classes() -> None:
+    application = create_application()
+    module = ApplicationModule("module", 0.1)
+    module.register_event_handler(handle_event)
+    application.include_module(module)
+    application.register_event_handler(handle_derived_event)
+
+    assert application.get_event_handlers(SampleEvent()) == (handle_event,)
+    assert application.get_event_handlers(DerivedEvent()) == (handle_derived_event, handle_event)
+    # Повторный вызов возвращает тот же обьект без новых аллокаций.
+    assert application.get_event_handlers(DerivedEvent()) is application.get_event_handlers(DerivedEvent())
+
+
+async def handle_query_with_dependency(query: SampleQuery, multiplier: int) -> QueryResult[int]:
+    return QueryResult.success(payload=query.value * multiplier)
+
+
+def test_injection_plan_is_computed_once() -> None:
+    application = Application("test", 0.1, dependency_provider=DictProvider(multiplier=3))
+    application.register_query_handler(handle_query_with_dependency)
+    with mock.patch(
+        "src.seedwork.metaprogramming.get_type_hints",
+        side_effect=AssertionError("plan must be computed at registration"),
+    ):
+        result = asyncio.run(application.execute_query(SampleQuery(2)))
+
+    assert result.payload == 6
+
+
+def test_validate_dependencies_reports_missing() -> None:
+    application = Application("test", 0.1, dependency_provider=DictProvider())
+    application.register_query_handler(handle_query_with_dependency)
+
+    with pytest.raises(DependencyResolutionError, match="multiplier"):
+        application.validate_dependencies()
+
+    application.validate_dependencies("multiplier")
+
+
+class Connection:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class ScopedProvider(DictProvider):
+    def __init__(self) -> None:
+        super().__init__()
+        self.created: list[Connection] = []
+
+    def get_dependency(self, identifier: type) -> typing.Any:
+        connection = Connection()
+        self.created.append(connection)
+        return connection
+
+    def get_lifetime(self, identifier: type) -> Lifetime:
+        return Lifetime.SCOPED
+
+
+async def handle_query_with_connection(query: SampleQuery, first: Connection, second: Connection) -> QueryResult[bool]:
+    return QueryResult.success(payload=first is second)
+
+
+def test_scoped_dependencies_are_shared_and_disposed() -> None:
+    provider = ScopedProvider()
+    application = Application("test", 0.1, dependency_provider=provider)
+    application.register_query_handler(handle_query_with_connection)
+
+    result = asyncio.run(application.execute_query(SampleQuery(1)))
+    assert result.payload is True
+    assert len(provider.created) == 1
+    assert provider.created[0].closed
+
+    asyncio.run(application.execute_query(SampleQuery(1)))
+    assert len(provider.created) == 2
+
+
+class BrokenConnection(Connection):
+    async def close(self) -> None:
+        raise ConnectionError("connection is already closed")
+
+
+class BrokenScopedProvider(ScopedProvider):
+    def get_dependency(self, identifier: type) -> typing.Any:
+        return BrokenConnection()
+
+
+def test_sync_exit_logs_failed_async_disposal(caplog: pytest.LogCaptureFixture) -> None:
+    application = Application("test", 0.1, dependency_provider=BrokenScopedProvider())
+    application.register_query_handler(handle_query_with_connection)
+
+    async def main() -> None:
+        with application.transaction_context() as ctx:
+            await ctx.execute_query(SampleQuery(1))
+        for _ in range(3):
+            await asyncio.sleep(0)
+
+    asyncio.run(main())
+
+    assert "Failed to dispose a scoped dependency" in caplog.text
+
+
+@dataclasses.dataclass(frozen=True)
+class SampleCommand(Command):
+    pass
+
+
+async def handle_command_with_event(command: SampleCommand) -> CommandResult:
+    return CommandResult.success(event=SampleEvent())
+
+
+def test_event_handlers_run_concurrently_with_ordered_chain() -> None:
+    application = create_application()
+    application.register_command_handler(handle_command_with_event)
+    calls: list[str] = []
+    both_started = asyncio.Event()
+
+    async def first(event: SampleEvent) -> None:
+        calls.append("first")
+        await both_started.wait()
+
+    async def second(event: SampleEvent) -> None:
+        calls.append("second")
+        both_started.set()
+
+    async def ordered_a(event: SampleEvent) -> None:
+        await asyncio.sleep(0)
+        calls.append("ordered_a")
+
+    async def ordered_b(event: SampleEvent) -> None:
+        calls.append("ordered_b")
+
+    application.register_event_handler(first)
+    application.register_event_handler(ordered_a, ordered=True)
+    application.register_event_handler(second)
+    application.register_event_handler(ordered_b, ordered=True)
+    assert application.get_event_dispatch(SampleEvent()) == ((ordered_a, ordered_b), (first, second))
+
+    # `first` завершится только если `second` запущен конкурентно с ним.
+    result = asyncio.run(asyncio.wait_for(application.execute_command(SampleCommand()), 1))
+    assert result.is_success()
+    assert calls.index("ordered_a") < calls.index("ordered_b")
+
+
+def test_gather_queries_shares_dependencies() -> None:
+    provider = ScopedProvider()
+    application = Application("test", 0.1, dependency_provider=provider)
+    in_flight = 0
+    peak = 0
+
+    async def handle_with_connection(query: SampleQuery, connection: Connection) -> QueryResult[int]:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        return QueryResult.success(payload=query.value)
+
+    application.register_query_handler(handle_with_connection)
+    results = asyncio.run(application.gather_queries([SampleQuery(i) for i in range(3)]))
+
+    assert [result.payload for result in results] == [0, 1, 2]
+    assert peak == 3
+    assert len(provider.created) == 1
+
+
+@dataclasses.dataclass(frozen=True)
+class NumberCommand(Command):
+    value: int
+
+
+def test_execute_many_returns_results_in_order() -> None:
+    application = create_application()
+    in_flight = 0
+    peak = 0
+    handled_events: list[Event] = []
+
+    async def handle_number(command: NumberCommand) -> CommandResult:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0)
+        in_flight -= 1
+        if command.value == 3:
+            raise ValueError("bad value")
+        return CommandResult.success(payload=command.value, event=SampleEvent())
+
+    async def handle_sample_event(event: SampleEvent) -> None:
+        handled_events.append(event)
+
+    application.register_command_handler(handle_number)
+    application.register_event_handler(handle_sample_event)
+    results = asyncio.run(application.execute_many([NumberCommand(i) for i in range(10)], concurrency=4))
+
+    assert [result.payload for result in results if result.is_success()] == [0, 1, 2, 4, 5, 6, 7, 8, 9]
+    assert isinstance(results[3].errors[0][1], ValueError)
+    assert peak == 4
+    assert len(handled_events) == 9
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class NumberSaved(Event):
+    value: int
+
+
+class RecordingRepository(EventRepository[int, int]):
+    def __init__(self) -> None:
+        self.events: list[Event] = []
+
+    async def get_all(self) -> typing.Sequence[int]:
+        return []
+
+    async def get_by_id(self, entity_id: int) -> typing.Optional[int]:
+        return None
+
+    async def insert(self, entity: int) -> None:
+        pass
+
+    async def save(self, entity: int) -> None:
+        await asyncio.sleep(0)
+        self.events.append(NumberSaved(value=entity))
+
+    async def delete_by_id(self, entity_id: int) -> None:
+        pass
+
+    def collect_events(self) -> typing.Sequence[Event]:
+        events, self.events = self.events, []
+        return events
+
+
+def test_execute_many_drops_events_of_failed_commands() -> None:
+    application = Application(
+        "test", 0.1, dependency_provider=DictProvider(repository=RecordingRepository()),
+    )
+    saved: list[int] = []
+
+    async def handle_number(command: NumberCommand, repository: RecordingRepository) -> CommandResult:
+        await repository.save(command.value)
+        await asyncio.sleep(0)
+        if command.value % 2:
+            raise ValueError("odd value")
+        return CommandResult.success(payload=command.value)
+
+    async def handle_saved(event: NumberSaved) -> None:
+        saved.append(event.value)
+
+    application.register_command_handler(handle_number)
+    application.register_event_handler(handle_saved)
+    results = asyncio.run(application.execute_many([NumberCommand(i) for i in range(6)], concurrency=4))
+
+    assert [result.is_success() for result in results] == [True, False] * 3
+    assert sorted(saved) == [0, 2, 4]
+
+
+def test_execute_many_raises_handler_assertion_unwrapped() -> None:
+    application = create_application()
+
+    async def handle_number(command: NumberCommand) -> typing.Any:
+        return command.value
+
+    application.register_command_handler(handle_number)
+    with pytest.raises(AssertionError):
+        asyncio.run(application.execute_many([NumberCommand(1)]))
@@ -0,0 +1,152 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+from src.seedwork.application.command import Command
+from src.seedwork.application.command_handler import CommandResult
+from src.seedwork.application.event import IntegrationEvent
+from src.seedwork.application.module import Application
+from src.seedwork.application.outbox import InMemoryOutbox
+from src.seedwork.application.outbox import OutboxRelay
+
+
+@dataclasses.dataclass(frozen=True)
+class RenameCommand(Command):
+    nickname: str
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class PlayerRenamed(IntegrationEvent):
+    nickname: str
+
+
+def create_application(relay: OutboxRelay) -> Application:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+
+    async def handle_rename(command: RenameCommand) -> CommandResult:
+        return CommandResult.success(event=PlayerRenamed(nickname=command.nickname))
+
+    application.register_command_handler(handle_rename)
+    application.configure_outbox(relay)
+    return application
+
+
+def test_integration_events_are_saved_with_command_and_published_in_batches() -> None:
+    outbox = InMemoryOutbox()
+    relay = OutboxRelay(outbox, batch_size=2, flush_interval=60)
+    application = create_application(relay)
+    batches: list[list[str]] = []
+
+    async def consume(events: typing.Sequence[IntegrationEvent]) -> None:
+        batches.append([typing.cast(PlayerRenamed, event).nickname for event in events])
+
+    relay.subscribe(IntegrationEvent, consume)
+
+    async def main() -> None:
+        for nickname in ("a", "b", "c"):
+            result = await application.execute_command(RenameCommand(nickname))
+            assert result.is_success()
+        # Команда не ждёт доставки, события лежат в outbox.
+        assert len(outbox) == 3
+        assert await relay.flush() == 3
+
+    asyncio.run(main())
+    assert batches == [["a", "b"], ["c"]]
+    assert len(outbox) == 0
+    assert relay.published == 3
+
+
+def test_full_batch_wakes_relay_before_flush_interval() -> None:
+    relay = OutboxRelay(InMemoryOutbox(), batch_size=2, flush_interval=60)
+    application = create_application(relay)
+
+    async def main() -> list[str]:
+        received: list[str] = []
+        done = asyncio.Event()
+
+        async def consume(events: typing.Sequence[IntegrationEvent]) -> None:
+            received.extend(typing.cast(PlayerRenamed, event).nickname for event in events)
+            done.set()
+
+        relay.subscribe(PlayerRenamed, consume)
+        await relay.start()
+        await application.execute_many([RenameCommand("a"), RenameCommand("b")])
+        await asyncio.wait_for(done.wait(), 1)
+        await relay.stop()
+        return received
+
+    assert asyncio.run(main()) == ["a", "b"]
+
+
+def test_failed_batch_is_redelivered_only_to_failed_consumer() -> None:
+    outbox = InMemoryOutbox()
+    relay = OutboxRelay(outbox, batch_size=10, flush_interval=60)
+    attempts = 0
+    audited: list[str] = []
+
+    async def consume(events: typing.Sequence[IntegrationEvent]) -> None:
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionError("consumer unavailable")
+
+    async def audit(events: typing.Sequence[IntegrationEvent]) -> None:
+        audited.extend(typing.cast(PlayerRenamed, event).nickname for event in events)
+
+    relay.subscribe(PlayerRenamed, consume)
+    relay.subscribe(PlayerRenamed, audit)
+
+    async def main() -> None:
+        await relay.save([PlayerRenamed(nickname="a")])
+        assert await relay.flush() == 0
+        assert len(outbox) == 1
+        assert await relay.flush() == 1
+
+    asyncio.run(main())
+    assert attempts == 2
+    assert audited == ["a"]
+    assert len(outbox) == 0
+
+
+def test_poison_message_is_dead_lettered_without_blocking_others() -> None:
+    outbox = InMemoryOutbox()
+    relay = OutboxRelay(outbox, batch_size=10, flush_interval=60, max_attempts=2)
+    received: list[str] = []
+
+    async def consume(events: typing.Sequence[IntegrationEvent]) -> None:
+        nicknames = [typing.cast(PlayerRenamed, event).nickname for event in events]
+        if "poison" in nicknames:
+            raise ValueError("cannot handle event")
+        received.extend(nicknames)
+
+    relay.subscribe(PlayerRenamed, consume)
+
+    async def main() -> None:
+        await relay.save([PlayerRenamed(nickname="poison"), PlayerRenamed(nickname="a")])
+        assert await relay.flush() == 0
+        # Упавшие сообщения доставляются по одному: "a" больше не
+        # зависит от ядовитого сообщения.
+        assert await relay.flush() == 2
+
+    asyncio.run(main())
+    assert received == ["a"]
+    assert [typing.cast(PlayerRenamed, message.event).nickname for message in outbox.dead_letters] == ["poison"]
+    assert len(outbox) == 0
+    assert relay.published == 1
+    assert relay.dead_lettered == 1
@@ -0,0 +1,49 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import pytest
+
+from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.infrastructure.player_mapper import PlayerMapper
+from src.modules.csm.infrastructure.player_mapper import SqlitePlayerMapper
+
+
+def test_models_are_mapped_in_batch_order() -> None:
+    players = PlayerMapper().models_to_entities([
+        {"_id": "Steve", "api_uuid": "uuid-1"},
+        {"_id": "Alex", "api_uuid": "uuid-2"},
+    ])
+    assert [(player.id, player.api_uuid) for player in players] == [
+        (PlayerId("Steve"), "uuid-1"), (PlayerId("Alex"), "uuid-2"),
+    ]
+    assert SqlitePlayerMapper().models_to_entities([]) == []
+
+
+def test_raw_bson_documents_are_mapped_by_touched_fields() -> None:
+    bson = pytest.importorskip("bson")
+    from bson.raw_bson import RawBSONDocument
+
+    # Лишние поля документа не мешают маппингу и не декодируются заранее.
+    document = RawBSONDocument(bson.encode({
+        "_id": "Steve", "api_uuid": "uuid-1", "history": [{"wins": wins} for wins in range(100)],
+    }))
+    mapper = PlayerMapper()
+    players = mapper.models_to_entities([
+        document, RawBSONDocument(bson.encode({"_id": "Alex", "api_uuid": "uuid-2"})),
+    ])
+    assert [(player.id, player.api_uuid) for player in players] == [
+        (PlayerId("Steve"), "uuid-1"), (PlayerId("Alex"), "uuid-2"),
+    ]
+    assert mapper.entity_to_model(players[0]) == {"_id": "Steve", "api_uuid": "uuid-1"}
@@ -0,0 +1,116 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import pathlib
+
+import pytest
+
+# Модуль репозиториев импортирует драйвер Mongo.
+pytest.importorskip("motor")
+
+from src.modules.csm.domain.player import Player
+from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.infrastructure.player_repository import InMemoryPlayerRepository
+from src.modules.csm.infrastructure.player_repository import SQLITE_PLAYER_SCHEMA
+from src.modules.csm.infrastructure.player_repository import SqlitePlayerRepository
+from src.seedwork.infrastructure.sqlite import SqliteDatabase
+
+
+def make_player(nickname: str, api_uuid: str) -> Player:
+    return Player(id=PlayerId(nickname), api_uuid=api_uuid)
+
+
+def test_in_memory_player_repository_crud() -> None:
+    async def main() -> None:
+        repository = InMemoryPlayerRepository()
+        await repository.insert(make_player("Steve", "uuid-1"))
+        await repository.insert(make_player("Alex", "uuid-2"))
+        with pytest.raises(KeyError):
+            await repository.insert(make_player("Steve", "uuid-3"))
+        with pytest.raises(KeyError):
+            await repository.save(make_player("Herobrine", "uuid-4"))
+
+        player = await repository.get_by_id(PlayerId("Steve"))
+        assert player is not None and player.api_uuid == "uuid-1"
+        assert await repository.get_by_id(PlayerId("Herobrine")) is None
+
+        players = await repository.get_by_ids([PlayerId("Alex"), PlayerId("Herobrine")])
+        assert list(players) == [PlayerId("Alex")]
+
+        await repository.save(make_player("Steve", "uuid-5"))
+        player = await repository.get_by_id(PlayerId("Steve"))
+        assert player is not None and player.api_uuid == "uuid-5"
+
+        await repository.delete_by_id(PlayerId("Alex"))
+        assert [player.id for player in await repository.get_all()] == [PlayerId("Steve")]
+
+    asyncio.run(main())
+
+
+def test_in_memory_player_repository_indexes_api_uuid() -> None:
+    async def main() -> None:
+        repository = InMemoryPlayerRepository()
+        await repository.insert(make_player("Steve", "uuid-1"))
+        await repository.insert(make_player("Alex", "uuid-2"))
+
+        await repository.save(make_player("Steve", "uuid-3"))
+        assert await repository.get_by_api_uuid("uuid-1") is None
+        player = await repository.get_by_api_uuid("uuid-3")
+        assert player is not None and player.id == PlayerId("Steve")
+
+        await repository.delete_by_id(PlayerId("Alex"))
+        assert await repository.get_by_api_uuid("uuid-2") is None
+        assert (await repository.get_by_api_uuid("uuid-3")) is not None
+
+    asyncio.run(main())
+
+
+def test_in_memory_player_repository_is_restored_from_snapshot(tmp_path: pathlib.Path) -> None:
+    snapshot_path = str(tmp_path / "players.json")
+
+    async def main() -> None:
+        repository = InMemoryPlayerRepository(snapshot_path)
+        # Без изменений снапшот не пишется.
+        await repository.snapshot()
+        assert not pathlib.Path(snapshot_path).exists()
+
+        await repository.insert(make_player("Steve", "uuid-1"))
+        await repository.insert(make_player("Alex", "uuid-2"))
+        await repository.delete_by_id(PlayerId("Alex"))
+        await repository.snapshot()
+
+        restored = InMemoryPlayerRepository(snapshot_path)
+        players = await restored.get_all()
+        assert [(player.id, player.api_uuid) for player in players] == [(PlayerId("Steve"), "uuid-1")]
+
+    asyncio.run(main())
+
+
+def test_sqlite_player_repository_returns_only_stored_players(tmp_path: pathlib.Path) -> None:
+    async def main() -> None:
+        database = SqliteDatabase(str(tmp_path / "players.sqlite3"), SQLITE_PLAYER_SCHEMA)
+        repository = SqlitePlayerRepository(database)
+        await asyncio.gather(*(
+            repository.insert(make_player(f"player{index}", f"uuid-{index}")) for index in range(0, 1200, 2)
+        ))
+
+        # Больше одной пачки IN, половина айди не сохранена.
+        players = await repository.get_by_ids(PlayerId(f"player{index}") for index in range(1200))
+        assert sorted(players) == sorted(PlayerId(f"player{index}") for index in range(0, 1200, 2))
+        assert players[PlayerId("player42")].api_uuid == "uuid-42"
+        await database.close()
+
+    asyncio.run(main())
@@ -0,0 +1,104 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import typing
+from unittest import mock
+
+from src.modules.csm.application.commands.record_player_stats import RecordPlayerStats
+from src.modules.csm.application.commands.record_player_stats import record_player_stats
+from src.modules.csm.domain.csc import CscStatistic
+from src.modules.csm.domain.events import EventsStatistic
+from src.modules.csm.domain.player_id import PlayerId
+from src.modules.csm.domain.player_stats import PlayerStats
+from src.modules.csm.domain.player_stats_history import PlayerStatsHistory
+from src.modules.csm.domain.player_stats_history import PlayerStatsRecorded
+from src.modules.csm.infrastructure.event_registry import create_event_codec
+from src.modules.csm.infrastructure.player_stats_history_repository import EventSourcedPlayerStatsHistoryRepository
+from src.seedwork.infrastructure import mongo
+from src.seedwork.infrastructure.event_store import InMemoryEventStore
+from src.seedwork.infrastructure.event_store import InMemorySnapshotStore
+
+
+def make_stats(wins: int) -> PlayerStats:
+    return PlayerStats(
+        csc_stats=CscStatistic(wins, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        events_stats=EventsStatistic(wins, 0, 0, 0),
+    )
+
+
+def make_command(wins: int, recorded_at: float) -> RecordPlayerStats:
+    stats = make_stats(wins)
+    return RecordPlayerStats(
+        nickname="Steve",
+        api_uuid="api-uuid",
+        csc_stats=dataclasses.asdict(stats.csc_stats),
+        events_stats=dataclasses.asdict(stats.events_stats),
+        recorded_at=recorded_at,
+    )
+
+
+def test_unchanged_stats_are_recorded_once_per_interval() -> None:
+    store: InMemoryEventStore[PlayerStatsHistory] = InMemoryEventStore()
+    repository = EventSourcedPlayerStatsHistoryRepository(store, InMemorySnapshotStore())
+    player_repository = mock.AsyncMock()
+    player_repository.get_by_id.side_effect = [None, mock.Mock(), mock.Mock(), mock.Mock()]
+
+    async def main() -> PlayerStatsHistory:
+        for wins, recorded_at in ((1, 0.0), (1, 10.0), (2, 20.0), (2, 100.0)):
+            await record_player_stats(make_command(wins, recorded_at), repository, player_repository)
+        return await repository.get("Steve")
+
+    history = asyncio.run(main())
+    # Новый игрок сохраняется один раз, при первой записи.
+    player_repository.insert.assert_awaited_once()
+    player = player_repository.insert.await_args.args[0]
+    assert (player.id, player.api_uuid) == (PlayerId("Steve"), "api-uuid")
+    assert history.version == 3
+    assert history.stats == make_stats(2)
+    assert history.recorded_at == 100.0
+
+
+def test_history_is_restored_from_snapshot() -> None:
+    history = PlayerStatsHistory()
+    history.record("Steve", "api-uuid", make_stats(3), 5.0, refresh_interval=60.0)
+    history.commit_events()
+
+    restored = PlayerStatsHistory.from_snapshot(history.snapshot_state(), history.version)
+    assert restored.stats == make_stats(3)
+    assert restored.recorded_at == 5.0
+
+
+def test_recorded_stats_are_encoded_under_stable_name() -> None:
+    codec = create_event_codec()
+    stats = make_stats(4)
+    event = PlayerStatsRecorded(
+        nickname="Steve",
+        api_uuid="api-uuid",
+        csc_stats=dataclasses.asdict(stats.csc_stats),
+        events_stats=dataclasses.asdict(stats.events_stats),
+        recorded_at=5.0,
+    )
+
+    encoded = codec.decode_lazy(codec.encode(event))
+    assert (encoded.name, encoded.version) == ("csm.player_stats_recorded", 1)
+    assert encoded.event == event
+    assert typing.cast(PlayerStatsRecorded, encoded.event).stats == stats
+
+    # Коммиты, записанные до включения кодека, по-прежнему читаются.
+    store = mongo.MongoEventStore(mock.MagicMock(), codec)
+    assert isinstance(store._dump(event), bytes)
+    assert store._load(mongo._dump_event(event)) == event
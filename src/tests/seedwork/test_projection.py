@@ -0,0 +1,174 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import collections
+import dataclasses
+import functools
+import typing
+
+from src.seedwork.domain.aggregate import EventSourcedAggregate
+from src.seedwork.domain.entity_uuid import EntityId
+from src.seedwork.domain.event import Event
+from src.seedwork.infrastructure.event_store import EventStore
+from src.seedwork.infrastructure.event_store import InMemoryEventStore
+from src.seedwork.infrastructure.event_store import RecordedEvent
+from src.seedwork.infrastructure.projection import InMemoryCheckpointStore
+from src.seedwork.infrastructure.projection import Projection
+from src.seedwork.infrastructure.projection import ProjectionRunner
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class GamePlayed(Event):
+    won: bool
+
+
+class Stats(EventSourcedAggregate):
+    __slots__ = ()
+
+    def __init__(self, version: int = 0) -> None:
+        super().__init__(version)
+
+    def play(self, won: bool) -> None:
+        self._record_that(GamePlayed(won=won))
+
+    @functools.singledispatchmethod
+    def _aggregate(self, event: Event) -> None:
+        pass
+
+
+class WinsProjection(Projection):
+    name = "wins"
+    event_types = (GamePlayed,)
+
+    def __init__(self) -> None:
+        self.wins: collections.Counter[EntityId] = collections.Counter()
+        self.batches = 0
+
+    async def apply(self, records: typing.Sequence[RecordedEvent]) -> None:
+        self.batches += 1
+        for record in records:
+            self.wins[record.aggregate_uuid] += typing.cast(GamePlayed, record.event).won
+
+
+class FailingProjection(Projection):
+    name = "failing"
+
+    async def apply(self, records: typing.Sequence[RecordedEvent]) -> None:
+        raise RuntimeError("read model unavailable")
+
+
+async def fill_store(players: int = 4, games: int = 3) -> InMemoryEventStore[Stats]:
+    store: InMemoryEventStore[Stats] = InMemoryEventStore()
+    for player in range(players):
+        stats = Stats()
+        for game in range(games):
+            stats.play(won=game % 2 == 0)
+        await store.append_to_stream(EntityId.from_int(player), stats)
+    return store
+
+
+async def setup_rebuild() -> tuple[EventStore[typing.Any], Projection]:
+    return await fill_store(players=10), WinsProjection()
+
+
+def test_runner_catches_up_in_batches_and_saves_checkpoints() -> None:
+    checkpoints = InMemoryCheckpointStore()
+    wins, failing = WinsProjection(), FailingProjection()
+
+    async def main() -> None:
+        store = await fill_store()
+        runner = ProjectionRunner(store, checkpoints, [wins, failing], batch_size=3)
+        assert await runner.catch_up() == 12
+        assert await checkpoints.load("wins") == 4
+        assert await checkpoints.load("failing") == 0
+
+        stats = Stats(3)
+        stats.play(won=True)
+        await store.append_to_stream(EntityId.from_int(0), stats)
+        await runner.catch_up()
+
+    asyncio.run(main())
+    assert wins.wins[EntityId.from_int(0)] == 3
+    assert wins.batches == 3
+
+
+class GappedStore(InMemoryEventStore[Stats]):
+    """Хранилище, в котором коммиты с позициями из `hidden` ещё не видны."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.hidden: set[int] = set()
+
+    async def read_all_from(self, position: int, limit: int) -> typing.Sequence[RecordedEvent]:
+        records = await super().read_all_from(position, limit)
+        return [record for record in records if record.position not in self.hidden]
+
+    async def read_positions(self, positions: typing.Collection[int]) -> typing.Sequence[RecordedEvent]:
+        records = await super().read_positions(positions)
+        return [record for record in records if record.position not in self.hidden]
+
+
+async def fill_gapped_store(players: int = 3) -> GappedStore:
+    store = GappedStore()
+    for player in range(players):
+        stats = Stats()
+        stats.play(won=True)
+        await store.append_to_stream(EntityId.from_int(player), stats)
+    store.hidden.add(2)
+    return store
+
+
+def test_runner_waits_for_gap_before_skipping_it() -> None:
+    async def main() -> tuple[int, int]:
+        store = await fill_gapped_store()
+        checkpoints = InMemoryCheckpointStore()
+        waiting = ProjectionRunner(store, checkpoints, [WinsProjection()], gap_timeout=60)
+        await waiting.catch_up()
+        waited_at = await checkpoints.load("wins")
+
+        skipping = ProjectionRunner(store, checkpoints, [WinsProjection()], gap_timeout=0)
+        await skipping.catch_up()
+        return waited_at, await checkpoints.load("wins")
+
+    assert asyncio.run(main()) == (1, 3)
+
+
+def test_runner_applies_commit_that_appears_in_skipped_gap() -> None:
+    wins = WinsProjection()
+
+    async def main() -> tuple[int, int]:
+        store = await fill_gapped_store()
+        runner = ProjectionRunner(store, InMemoryCheckpointStore(), [wins], gap_timeout=0)
+        skipped = await runner.catch_up()
+
+        store.hidden.clear()
+        return skipped, await runner.catch_up()
+
+    assert asyncio.run(main()) == (2, 1)
+    assert wins.wins[EntityId.from_int(1)] == 1
+    assert sum(wins.wins.values()) == 3
+
+
+def test_rebuild_is_partitioned_across_processes() -> None:
+    checkpoints = InMemoryCheckpointStore()
+
+    async def main() -> tuple[int, int]:
+        store, projection = await setup_rebuild()
+        runner = ProjectionRunner(store, checkpoints, [projection])
+        applied = await runner.rebuild("wins", setup_rebuild, partitions=3)
+        return applied, await checkpoints.load("wins")
+
+    assert asyncio.run(main()) == (30, 10)
@@ -0,0 +1,67 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from src.seedwork.quantile_sketch import TDigest
+
+
+def test_tdigest_cdf_uniform() -> None:
+    digest = TDigest()
+    for value in range(10_000):
+        digest.update(value)
+
+    assert digest.cdf(-1) == 0.0
+    assert digest.cdf(10_000) == 1.0
+    assert digest.cdf(5_000) == pytest.approx(0.5, abs=0.01)
+    # Хвосты должны оцениваться точнее всего.
+    assert digest.cdf(9_900) == pytest.approx(0.99, abs=0.002)
+
+
+def test_tdigest_memory_is_bounded() -> None:
+    digest = TDigest(compression=50)
+    for _ in range(50_000):
+        digest.update(random.random())
+
+    assert len(digest) <= 2 * digest.compression
+    assert digest.count == 50_000
+
+
+def test_tdigest_merge() -> None:
+    left, right = TDigest(), TDigest()
+    for value in range(5_000):
+        left.update(value)
+        right.update(value + 5_000)
+
+    left.merge(right)
+    assert left.count == 10_000
+    assert left.cdf(5_000) == pytest.approx(0.5, abs=0.01)
+
+
+def test_tdigest_serialization_roundtrip() -> None:
+    digest = TDigest()
+    for value in range(1_000):
+        digest.update(value)
+
+    restored = TDigest.from_dict(digest.as_dict())
+    assert restored.count == digest.count
+    assert restored.cdf(250) == digest.cdf(250)
+
+
+def test_tdigest_empty_cdf() -> None:
+    with pytest.raises(ValueError):
+        TDigest().cdf(1)
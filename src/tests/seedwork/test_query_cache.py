@@ -0,0 +1,133 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+from unittest import mock
+
+from src.seedwork.application.command import Command
+from src.seedwork.application.command_handler import CommandResult
+from src.seedwork.application.module import Application
+from src.seedwork.application.query import Query
+from src.seedwork.application.query_cache import QueryCache
+from src.seedwork.application.query_cache import cached_query
+from src.seedwork.application.query_handler import QueryResult
+from src.seedwork.domain.event import Event
+
+
+@dataclasses.dataclass(frozen=True)
+class CountQuery(Query):
+    key: str
+
+
+@dataclasses.dataclass(frozen=True)
+class ResetCommand(Command):
+    pass
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class CountChanged(Event):
+    pass
+
+
+@dataclasses.dataclass(frozen=True)
+class ChangeCommand(Command):
+    pass
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def create_application(cache: QueryCache) -> tuple[Application, list[str]]:
+    application = Application("test", 0.1, dependency_provider=mock.MagicMock())
+    calls: list[str] = []
+
+    @cached_query(ttl=10, invalidated_by=(ResetCommand, CountChanged))
+    async def handle_count(query: CountQuery) -> QueryResult[int]:
+        calls.append(query.key)
+        return QueryResult.success(payload=len(calls))
+
+    async def handle_reset(command: ResetCommand) -> None:
+        pass
+
+    async def handle_change(command: ChangeCommand) -> CommandResult:
+        # У события нет обработчиков.
+        return CommandResult.success(event=CountChanged())
+
+    application.register_query_handler(handle_count)
+    application.register_command_handler(handle_reset)
+    application.register_command_handler(handle_change)
+    application.add_middleware(cache)
+    return application, calls
+
+
+def test_query_cache_ttl() -> None:
+    clock = Clock()
+    application, calls = create_application(QueryCache(clock=clock))
+
+    async def main() -> None:
+        assert (await application.execute_query(CountQuery("a"))).payload == 1
+        assert (await application.execute_query(CountQuery("a"))).payload == 1
+        clock.now = 11
+        assert (await application.execute_query(CountQuery("a"))).payload == 2
+
+    asyncio.run(main())
+    assert calls == ["a", "a"]
+
+
+def test_query_cache_invalidated_by_command() -> None:
+    cache = QueryCache()
+    application, calls = create_application(cache)
+
+    async def main() -> None:
+        await application.execute_query(CountQuery("a"))
+        await application.execute_command(ResetCommand())
+        await application.execute_query(CountQuery("a"))
+
+    asyncio.run(main())
+    assert calls == ["a", "a"]
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_query_cache_invalidated_by_event_without_handlers() -> None:
+    cache = QueryCache()
+    application, calls = create_application(cache)
+
+    async def main() -> None:
+        await application.execute_query(CountQuery("a"))
+        await application.execute_command(ChangeCommand())
+        await application.execute_query(CountQuery("a"))
+
+    asyncio.run(main())
+    assert calls == ["a", "a"]
+
+
+def test_query_cache_lru_eviction() -> None:
+    cache = QueryCache(max_size=2)
+    application, calls = create_application(cache)
+
+    async def main() -> None:
+        for key in ("a", "b", "a", "c", "a", "b"):
+            await application.execute_query(CountQuery(key))
+
+    asyncio.run(main())
+    # "b" вытесняется при добавлении "c", т.к. "a" использовался позже.
+    assert calls == ["a", "b", "c", "b"]
+    assert len(cache) == 2
@@ -0,0 +1,76 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import typing
+
+import pytest
+
+# Модуль сервисов рейтинга импортирует драйвер Mongo.
+pytest.importorskip("motor")
+
+from src.modules.csm.domain.csc import CscStatistic
+from src.modules.csm.domain.events import EventsStatistic
+from src.modules.csm.domain.player_stats import PlayerStats
+from src.modules.csm.infrastructure.rating_service import InMemoryPlayerRatingService
+from src.modules.csm.infrastructure.rating_service import RATING_METRICS
+
+
+class FlakyRatingService(InMemoryPlayerRatingService):
+    __slots__: typing.Sequence[str] = ("failures",)
+
+    def __init__(self, failures: int, flush_interval: float = 60.0) -> None:
+        super().__init__(flush_interval)
+        self.failures = failures
+
+    async def _write_sketches(self, sketches: typing.Mapping[str, typing.Mapping[str, typing.Any]]) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("storage is unavailable")
+        await super()._write_sketches(sketches)
+
+
+def make_stats(wins: int) -> PlayerStats:
+    return PlayerStats(
+        csc_stats=CscStatistic(wins, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0),
+        events_stats=EventsStatistic(wins, 0, 0, 0),
+    )
+
+
+def test_rating_service_retries_failed_flush() -> None:
+    async def main() -> None:
+        service = FlakyRatingService(failures=1)
+        service.observe(make_stats(3))
+
+        with pytest.raises(ConnectionError):
+            await service.flush()
+        assert not await service._read_sketches()
+
+        await service.flush()
+        assert set(await service._read_sketches()) == set(RATING_METRICS)
+
+    asyncio.run(main())
+
+
+def test_rating_service_logs_background_flush_failure(caplog: pytest.LogCaptureFixture) -> None:
+    async def main() -> None:
+        service = FlakyRatingService(failures=1, flush_interval=0.0)
+        service.observe(make_stats(3))
+        assert service._flush_task is not None
+        await service._flush_task
+
+    asyncio.run(main())
+
+    assert "Failed to flush rating sketches" in caplog.text
@@ -0,0 +1,61 @@
+# Copyright (c) 2024, II4Jl9HbIC9
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+from __future__ import annotations
+
+import asyncio
+import pathlib
+import sqlite3
+
+import pytest
+
+from src.seedwork.infrastructure.sqlite import SqliteDatabase
+
+SCHEMA = ("CREATE TABLE IF NOT EXISTS items (id TEXT PRIMARY KEY, value INTEGER NOT NULL)",)
+
+
+def test_sqlite_batched_writes(tmp_path: pathlib.Path) -> None:
+    async def main() -> None:
+        database = SqliteDatabase(str(tmp_path / "db.sqlite3"), SCHEMA)
+        # Конкурентные записи одной итерации попадают в одну транзакцию.
+        row_counts = await asyncio.gather(*(
+            database.execute("INSERT INTO items VALUES (?, ?)", (str(i), i)) for i in range(100)
+        ))
+        assert row_counts == [1] * 100
+
+        rows = await database.fetch_all("SELECT value FROM items ORDER BY value")
+        assert [value for value, in rows] == list(range(100))
+        assert await database.fetch_one("PRAGMA journal_mode") == ("wal",)
+        await database.close()
+
+    asyncio.run(main())
+
+
+def test_sqlite_failed_write_is_rolled_back_alone(tmp_path: pathlib.Path) -> None:
+    async def main() -> None:
+        database = SqliteDatabase(str(tmp_path / "db.sqlite3"), SCHEMA)
+        results = await asyncio.gather(
+            database.execute("INSERT INTO items VALUES (?, ?)", ("a", 1)),
+            database.execute("INSERT INTO items VALUES (?, ?)", ("a", 2)),
+            database.execute("INSERT INTO items VALUES (?, ?)", ("c", 3)),
+            return_exceptions=True,
+        )
+        assert results[0] == 1 and results[2] == 1
+        assert isinstance(results[1], sqlite3.IntegrityError)
+        assert await database.fetch_all("SELECT * FROM items ORDER BY id") == [("a", 1), ("c", 3)]
+
+        with pytest.raises(sqlite3.IntegrityError):
+            await database.execute("INSERT INTO items VALUES (?, ?)", ("b", None))
+        await database.close()
+
+    asyncio.run(main())